@@ -0,0 +1,152 @@
+#!/usr/bin/env python3
+#
+# Date: 10/18/2026
+#
+# Description: Resident alert engine. Loads the hardware checks as plugins in one interpreter and runs each
+#              on its own schedule, instead of cron starting a sudo python3 per check every 10 minutes. A
+#              check is a module in this directory with a main() function; CHECK_INTERVAL in the module sets
+#              how often it runs. Each run happens on its own thread, so a check stuck on smartctl or ping
+#              does not delay the others, and a check that is still running when it is next due is skipped
+#              for that round. A check driven by events also has a start(stop) function, called once when the
+#              daemon starts, to run its watcher until the daemon stops. Runs as the cohesity-alerts systemd
+#              service, or once with --once.
+#
+# Usage: ./alert_daemon.py [--once] [--checks net_check,disk_check]
+#
+import argparse
+import importlib
+import signal
+import threading
+import time
+
+import logger_config
+
+# Checks loaded by default, in the order they are first run
+CHECKS = ['net_check', 'ip_reach_check', 'disk_check', 'uptime_check', 'magneto_memory_alerts', 'memory_test']
+
+# Seconds between runs for a check that does not set CHECK_INTERVAL
+DEFAULT_INTERVAL = 600
+
+# Seconds --once waits for all checks to finish
+ONCE_TIMEOUT = 300
+
+
+class Check:
+    """A loaded check plugin and its schedule."""
+
+    def __init__(self, name, module, interval):
+        self.name = name
+        self.module = module
+        self.interval = interval
+        self.next_run = 0.0
+        self.thread = None
+
+    @property
+    def running(self):
+        return self.thread is not None and self.thread.is_alive()
+
+    def start(self):
+        # Daemon thread, a check that never returns must not keep the service from stopping
+        self.thread = threading.Thread(target=self._run, name=f"check-{self.name}", daemon=True)
+        self.thread.start()
+
+    def _run(self):
+        start = time.monotonic()
+        try:
+            self.module.main()
+        except SystemExit:
+            pass
+        except Exception:
+            logger_config.logger.exception(f"Check {self.name} failed")
+        elapsed = time.monotonic() - start
+        if elapsed > self.interval:
+            logger_config.logger.warning(f"Check {self.name} took {elapsed:.1f}s, longer than its "
+                                         f"{self.interval}s interval")
+
+
+def load_checks(names=CHECKS):
+    """
+    Import the check plugins.
+
+    Args:
+        names: Module names of the checks
+
+    Returns:
+        list: Check objects; checks that fail to import are logged and left out
+    """
+    checks = []
+    for name in names:
+        try:
+            module = importlib.import_module(name)
+        except Exception:
+            logger_config.logger.exception(f"Could not load check {name}")
+            continue
+        if not callable(getattr(module, 'main', None)):
+            logger_config.logger.error(f"Check {name} has no main() function")
+            continue
+        checks.append(Check(name, module, getattr(module, 'CHECK_INTERVAL', DEFAULT_INTERVAL)))
+    return checks
+
+
+def run_once(checks, timeout=ONCE_TIMEOUT):
+    """Run every check once at the same time and wait up to timeout seconds for them."""
+    for check in checks:
+        check.start()
+    deadline = time.monotonic() + timeout
+    for check in checks:
+        check.thread.join(max(deadline - time.monotonic(), 0))
+        if check.running:
+            logger_config.logger.error(f"Check {check.name} did not finish within {timeout} seconds")
+
+
+def serve(checks, stop):
+    """
+    Run the checks on their schedules until stop is set.
+
+    Args:
+        checks: Check objects
+        stop: threading.Event that ends the loop
+    """
+    for check in checks:
+        if callable(getattr(check.module, 'start', None)):
+            try:
+                check.module.start(stop)
+            except Exception:
+                logger_config.logger.exception(f"Could not start watcher of check {check.name}")
+    logger_config.logging.info("Alert daemon started: " +
+                               ", ".join(f"{check.name} every {check.interval}s" for check in checks))
+    while not stop.is_set():
+        now = time.monotonic()
+        for check in checks:
+            if now < check.next_run:
+                continue
+            if check.running:
+                logger_config.logger.warning(f"Check {check.name} is still running, skipping this run")
+            else:
+                check.start()
+            check.next_run = now + check.interval
+        stop.wait(max(min(check.next_run for check in checks) - time.monotonic(), 0))
+    logger_config.logging.info("Alert daemon stopped")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the hardware alert checks')
+    parser.add_argument('--once', action='store_true', help='Run every check once and exit')
+    parser.add_argument('--checks', help=f"Comma separated checks to run (default: {','.join(CHECKS)})")
+    args = parser.parse_args()
+
+    checks = load_checks(args.checks.split(',') if args.checks else CHECKS)
+    if not checks:
+        parser.exit(1, "No checks could be loaded\n")
+    if args.once:
+        run_once(checks)
+        return
+
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: stop.set())
+    serve(checks, stop)
+
+
+if __name__ == "__main__":
+    main()
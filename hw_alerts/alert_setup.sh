@@ -1,4 +1,6 @@
 #!/bin/bash
+# Updated: 10/18/2026 - Installs the cohesity-alerts service instead of the cron entry where systemd is available,
+#                       removing the cron entry of an earlier setup; installs reach_probe.py for ip_reach_check.py
 
 # Add Values to logrotate.conf
 # edits /etc/lograte.conf and appends the following lines
@@ -21,11 +23,23 @@ echo "  delaycompress" >> /etc/logrotate.conf
 echo "}" >> /etc/logrotate.conf
 echo "Entries into Logrotate completed."
 
-# Add cron entry to root crontab
-# Adds a check every 10 minutes to crontab for root
-echo "Adding Cron Entry for Root"
-echo "*/10 * * * * /home/support/alerts/alerts.py" >> /var/spool/cron/root
-echo "Completed Cron Entry for Root"
+# Run the checks from the resident alert service, or from a root cron entry every 10 minutes without systemd
+if command -v systemctl >/dev/null 2>&1; then
+    echo "Installing cohesity-alerts service"
+    cp /home/support/alerts/cohesity-alerts.service /etc/systemd/system/cohesity-alerts.service
+    systemctl daemon-reload
+    systemctl enable --now cohesity-alerts.service
+    echo "Completed installing cohesity-alerts service"
+    # Nodes set up before the service ran the checks from cron, remove that entry or every check runs twice
+    if crontab -l 2>/dev/null | grep -q 'alerts/alerts.py'; then
+        crontab -l | grep -v 'alerts/alerts.py' | crontab -
+        echo "Removed the old alerts.py cron entry"
+    fi
+else
+    echo "Adding Cron Entry for Root"
+    echo "*/10 * * * * /home/support/alerts/alerts.py" >> /var/spool/cron/root
+    echo "Completed Cron Entry for Root"
+fi
 
 echo "Creating Empty log file in /var/log"
 # Create logfile in /var/log
@@ -36,6 +50,15 @@ touch /var/log/healthcheck.ERROR.log
 chmod 777 /var/log/healthcheck.ERROR.log
 echo "Completed creating log file in /var/log"
 
+# ip_reach_check.py probes with reach_probe.py from the utils scripts, install it next to the checks
+if [ -f /home/support/utils/reach_probe.py ]; then
+    cp /home/support/utils/reach_probe.py /home/support/alerts/reach_probe.py
+    echo "Installed reach_probe.py in /home/support/alerts"
+else
+    echo "reach_probe.py not found in /home/support/utils, ip_reach_check.py will ping each IP in turn"
+fi
+
 # Set Permissions on Alerts Folder and Files
-chmod 755 /home/support/alerts/*
+chmod 755 /home/support/alerts/*.py /home/support/alerts/*.sh
+chmod 644 /home/support/alerts/cohesity-alerts.service
 echo "Set Permissions on all alerts scripts"
@@ -0,0 +1,209 @@
+#!/usr/bin/env python3
+#
+# Date: 10/18/2026
+#
+# Description: State of the alerts that have been sent, so a fault is reported when it starts, reminded
+#              about every repeat interval while it lasts and resolved once when it clears, instead of being
+#              sent again on every check. Alerts are keyed by alert code and subject (a disk, an interface,
+#              a DIMM) in a dict kept in memory and saved to a JSON file on every change, written atomically
+#              and synced so the state survives a reboot. Every read-modify-write holds an flock on a lock file
+#              next to the state file and reloads the file if another process changed it, so a check run by
+#              hand and the alert daemon never overwrite each other's changes.
+#
+# Usage: ./alert_state.py [--clear CODE SUBJECT]
+#
+import argparse
+import fcntl
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+STATE_FILE = '/home/support/alerts/.alert_state.json'
+
+# Seconds between reminders for an alert that is still active
+REPEAT_INTERVAL = 4 * 3600
+
+
+class AlertState:
+    """
+    Active alerts by (code, subject).
+
+    Args:
+        path: State file
+    """
+
+    def __init__(self, path=STATE_FILE):
+        self.path = path
+        self.lock_path = f"{path}.lock"
+        self.alerts = {}
+        self._version = None
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def _key(code, subject):
+        return f"{code}|{subject}"
+
+    @contextmanager
+    def _locked(self):
+        # The thread lock orders this process's threads, the flock orders processes
+        with self._lock:
+            try:
+                lock_file = open(self.lock_path, 'a')
+            except OSError:
+                # Without a lock file, as without a state file, alerts may repeat but are never lost
+                lock_file = None
+            try:
+                if lock_file is not None:
+                    fcntl.flock(lock_file, fcntl.LOCK_EX)
+                self._load()
+                yield
+            finally:
+                if lock_file is not None:
+                    lock_file.close()
+
+    def _file_version(self):
+        # Every save replaces the file, so a new inode shows a change even within the mtime granularity
+        st = os.stat(self.path)
+        return st.st_ino, st.st_mtime_ns
+
+    def _load(self):
+        try:
+            version = self._file_version()
+        except OSError:
+            return
+        if version == self._version:
+            return
+        try:
+            with open(self.path, 'r') as f:
+                self.alerts = json.load(f)
+            self._version = version
+        except (OSError, ValueError):
+            pass
+
+    def _save(self):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(self.alerts, f, indent=1, sort_keys=True)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+            self._version = self._file_version()
+        except OSError:
+            # Without the state file alerts are repeated on every run, as before, rather than lost
+            pass
+
+    def fire(self, code, subject, repeat_interval=REPEAT_INTERVAL):
+        """
+        Record that a fault is present.
+
+        Args:
+            code: Alert code such as 'CH00000001'
+            subject: What the alert is about, such as 'sda'
+            repeat_interval: Seconds between reminders while the fault lasts, None to never repeat
+
+        Returns:
+            bool: True if the alert should be sent, because it is new or a reminder is due
+        """
+        now = time.time()
+        key = self._key(code, subject)
+        with self._locked():
+            alert = self.alerts.get(key)
+            if alert is None:
+                self.alerts[key] = {'code': code, 'subject': str(subject), 'first_seen': now, 'last_sent': now,
+                                    'sent': 1}
+                self._save()
+                return True
+            if repeat_interval is None or now - alert['last_sent'] < repeat_interval:
+                # Still active and already reported, nothing is written
+                return False
+            alert['last_sent'] = now
+            alert['sent'] += 1
+            self._save()
+            return True
+
+    def clear(self, code, subject):
+        """
+        Record that a fault is gone.
+
+        Returns:
+            dict: The alert that was active, so a resolve notice can be sent, or None if there was none
+        """
+        with self._locked():
+            alert = self.alerts.pop(self._key(code, subject), None)
+            if alert is not None:
+                self._save()
+            return alert
+
+    def active(self, code):
+        """Return the subjects with an active alert for a code."""
+        with self._locked():
+            return [alert['subject'] for alert in self.alerts.values() if alert['code'] == code]
+
+    def reconcile(self, code, subjects):
+        """
+        Clear every alert of a code whose subject is not in subjects, for checks that look at all subjects.
+
+        Returns:
+            list: The alerts that were cleared
+        """
+        current = {str(subject) for subject in subjects}
+        return [self.clear(code, subject) for subject in self.active(code) if subject not in current]
+
+
+_state = None
+_state_lock = threading.Lock()
+
+
+def get_state(path=STATE_FILE):
+    """Return the alert state shared by the whole process."""
+    global _state
+    with _state_lock:
+        if _state is None or _state.path != path:
+            _state = AlertState(path)
+        return _state
+
+
+def send_resolved(alert, alert_name, description):
+    """
+    Send the notice that an alert cleared.
+
+    Args:
+        alert: The cleared alert returned by AlertState.clear()
+        alert_name: Name of the alert, as sent when it fired
+        description: What is back to normal
+    """
+    import send_syslog
+    since = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(alert['first_seen']))
+    attributes = {
+        '"ClusterName"': f'"{send_syslog.value}"',
+        '"AlertCode"': f'"{alert["code"]}"',
+        '"AlertName"': f'"{alert_name}"',
+        '"AlertSeverity"': '"RESOLVED"',
+        '"AlertDescription"': f'"{description}"',
+        '"AlertCause"': f'"Alert active since {since} has cleared."',
+    }
+    send_syslog.send_syslog_message(send_syslog.syslog_host, send_syslog.syslog_port, attributes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='List active alerts or clear one by hand')
+    parser.add_argument('--clear', nargs=2, metavar=('CODE', 'SUBJECT'), help='Forget an active alert')
+    parser.add_argument('--state-file', default=STATE_FILE, help='Alert state file')
+    args = parser.parse_args()
+
+    state = AlertState(args.state_file)
+    if args.clear:
+        if state.clear(*args.clear) is None:
+            parser.exit(1, f"No active alert {args.clear[0]} for {args.clear[1]}\n")
+        return
+    for alert in sorted(state.alerts.values(), key=lambda alert: (alert['code'], alert['subject'])):
+        since = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(alert['first_seen']))
+        print(f"{alert['code']}  {alert['subject']:<20} since {since}, sent {alert['sent']} times")
+
+
+if __name__ == "__main__":
+    main()
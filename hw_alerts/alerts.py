@@ -2,28 +2,27 @@
 #
 # Authort: Doug Austin
 # Date: 8/23/2023
+# Updated: 10/18/2026 - Runs the checks in-process through alert_daemon instead of a sudo python3 per script
 #
 # Desc: This is the primary execution script for all hardware alerts. 
 
 import subprocess
+import alert_daemon
 import logger_config
 
 
-# Path to each test/alert script
-script_paths = [
-    '/home/support/alerts/net_check.py',
-    '/home/support/alerts/ip_reach_check.py',
-    '/home/support/alerts/disk_check.py',
-    '/home/support/alerts/uptime_check.py',
-    '/home/support/alerts/magneto_memory_alerts.py',
-    '/home/support/alerts/memory_test.py'
-]
-# Executing the Scripts as Sudo
-for script in script_paths:
+def service_active():
+    # The cohesity-alerts service already runs every check, a leftover cron entry must not run them again
     try:
-        subprocess.run(["sudo", "python3", script])
-    except subprocess.CalledProcessError as e:
-        logger_config.logger.error(f"Sciprt {script}: {e}")
-
+        return subprocess.run(['systemctl', 'is-active', '--quiet', 'cohesity-alerts.service']).returncode == 0
+    except OSError:
+        return False
 
 
+# Run every check once, for cron; the cohesity-alerts service runs them on their own schedules instead
+if __name__ == "__main__":
+    if service_active():
+        logger_config.logging.info("cohesity-alerts service is running the checks, alerts.py has nothing to do "
+                                   "(use alert_daemon.py --once to run them by hand)")
+    else:
+        alert_daemon.run_once(alert_daemon.load_checks())
@@ -2,63 +2,94 @@
 #
 # Authort: Doug Austin
 # Date: 8/23/2023
+# Updated: 10/18/2026 - Alerts are kept per disk serial and cleared with a resolve notice once the disk is gone
 
-import subprocess
 import socket
 import logger_config
 import send_syslog
+import alert_state
+import smart_collector
 
-# Run lsblk command and capture the output
-lsblk_output = subprocess.check_output(['lsblk', '-o', 'KNAME,TYPE,SIZE,MODEL']).decode()
+# Seconds between runs when loaded by alert_daemon.py
+CHECK_INTERVAL = 600
 
-# Find all disks in the output
-disks = []
-for line in lsblk_output.splitlines():
-    if 'disk' in line:
-        disk = line.split()[0]
-        disks.append(disk)
 
-# Place to store disk assessments
-disk_assessments = {}
+def main():
+    # Probe every disk at once; each report has the health and the wear counters from smartctl -j
+    reports = smart_collector.collect()
+    history = smart_collector.SmartHistory()
+    state = alert_state.get_state()
 
-# Iterate over each disk
-for disk in disks:
-    # Run smartctl command and capture the output
-    smartctl_output = subprocess.check_output(['sudo', 'smartctl', '-H', '/dev/' + disk]).decode()
-
-    # Find the assessment value in the output
-    assessment = None
-    for line in smartctl_output.splitlines():
-        if 'assessment' in line:
-            assessment = line.split()[5]
-            break
-
-    # Store the assessment in the dictionary
-    disk_assessments[disk] = assessment
-
-    # Evaluate Log Disk Failures and paste log info
-    if assessment != 'PASSED':
-        logger_config.logger.error(f"Disk {disk} - SMART Test: {assessment}")
-    if assessment == 'PASSED':
-        logger_config.logging.info(f"Disk: {disk} - SMART Test: {assessment}")
-
-
-failed_disks = [disk for disk, assessment in disk_assessments.items() if assessment != 'PASSED']
-if len(failed_disks) > 0:
-    from send_syslog import send_syslog_message, syslog_host, syslog_port
-    failed_disks_text = f'"Disks that Failed Self-Test: {", ".join(failed_disks)}"'
-    cluster_name = f'"{(send_syslog.value)}"'
-    attributes = {
-        '"ClusterName"': cluster_name,
-        '"AlertCode"': '"CH00000001"',
-        '"AlertName"': '"SMARTTestsFailed"',
-        '"AlertSeverity"': '"CRITICAL"',
-        '"AlertDescription"': failed_disks_text,
-        '"AlertCause"': '"SMART Tests have failed on one or more disks."'
-    }    
-    send_syslog_message(syslog_host, syslog_port, attributes)
+    failed_disks = []
+    # Alerts and history follow the serial number, so a replaced disk under the same name starts clean
+    present = []
+    for report in reports:
+        disk = report.disk
+        if report.error:
+            logger_config.logger.error(f"Disk {disk} - SMART data unavailable: {report.error}")
+            present = None
+            continue
+        subject = smart_collector.SmartHistory.key(report)
+        if present is not None:
+            present.append(subject)
 
+        # Evaluate Log Disk Failures and paste log info
+        counters = ', '.join(f"{name}={value}" for name, value in sorted(report.counters.items()))
+        if report.passed is False or report.failing_attributes:
+            failed_disks.append((disk, subject))
+            logger_config.logger.error(f"Disk {disk} - SMART Test: FAILED {', '.join(report.failing_attributes)} "
+                                       f"{counters}")
+        else:
+            logger_config.logging.info(f"Disk: {disk} - SMART Test: "
+                                       f"{'PASSED' if report.passed else 'UNKNOWN'} {counters}")
+            # Only new failures and reminders are sent, and a notice once a disk passes again
+            alert = state.clear('CH00000001', subject)
+            if alert is not None:
+                alert_state.send_resolved(alert, 'SMARTTestsFailed', f"Disk {disk} passes SMART tests again")
 
+        # Counters growing fast mean the drive is on its way to failing
+        growth = history.add(report)
+        if not growth:
+            alert = state.clear('CH00000007', subject)
+            if alert is not None:
+                alert_state.send_resolved(alert, 'SMARTCountersGrowing', f"Disk {disk} counters are stable")
+            continue
+        growth_text = ', '.join(f"{counter} {old} -> {new} in {hours}h" for counter, old, new, hours in growth)
+        logger_config.logger.error(f"Disk {disk} ({report.serial}) - SMART counters growing: {growth_text}")
+        if state.fire('CH00000007', subject):
+            from send_syslog import send_syslog_message, syslog_host, syslog_port
+            attributes = {
+                '"ClusterName"': f'"{(send_syslog.value)}"',
+                '"AlertCode"': '"CH00000007"',
+                '"AlertName"': '"SMARTCountersGrowing"',
+                '"AlertSeverity"': '"WARNING"',
+                '"AlertDescription"': f'"Disk {disk} ({report.model} {report.serial}): {growth_text}"',
+                '"AlertCause"': '"SMART error counters are growing quickly, the disk is likely to fail soon."'
+            }
+            send_syslog_message(syslog_host, syslog_port, attributes)
+    # A disk that was pulled or replaced has no report any more; its alerts are resolved and its history
+    # dropped. Skipped when a probe failed, that disk's serial is unknown and it may still be there
+    if present is not None:
+        for code, name in (('CH00000001', 'SMARTTestsFailed'), ('CH00000007', 'SMARTCountersGrowing')):
+            for alert in state.reconcile(code, present):
+                alert_state.send_resolved(alert, name, f"Disk {alert['subject']} is no longer present")
+        history.retain(present)
+    history.save()
 
+    if [disk for disk, subject in failed_disks if state.fire('CH00000001', subject)]:
+        from send_syslog import send_syslog_message, syslog_host, syslog_port
+        failed_disks_text = f'"Disks that Failed Self-Test: {", ".join(disk for disk, _ in failed_disks)}"'
+        cluster_name = f'"{(send_syslog.value)}"'
+        attributes = {
+            '"ClusterName"': cluster_name,
+            '"AlertCode"': '"CH00000001"',
+            '"AlertName"': '"SMARTTestsFailed"',
+            '"AlertSeverity"': '"CRITICAL"',
+            '"AlertDescription"': failed_disks_text,
+            '"AlertCause"': '"SMART Tests have failed on one or more disks."'
+        }    
+        send_syslog_message(syslog_host, syslog_port, attributes)
 
 
+if __name__ == "__main__":
+    main()
@@ -2,10 +2,23 @@
 #
 # Authort: Doug Austin
 # Date: 8/23/2023
+# Updated: 10/18/2026 - All IPs are probed at the same time with reach_probe.py instead of one ping each,
+#                       falling back to one ping each where reach_probe.py is not installed
 
-import logger_config
+import sys
 import subprocess
+import logger_config
 import send_syslog
+import alert_state
+# alert_setup.sh installs reach_probe.py next to the checks, older setups only have it in utils or not at all
+sys.path.append('/home/support/utils/')
+try:
+    from reach_probe import local_addresses, probe_ips, is_reachable, loss_percent
+except ImportError:
+    probe_ips = None
+
+# Seconds between runs when loaded by alert_daemon.py
+CHECK_INTERVAL = 60
 
 def check_reachability(ip):
     try:
@@ -15,42 +28,56 @@ def check_reachability(ip):
     except subprocess.CalledProcessError:
         return False
 
+def ip_addresses():
+    """Return (interface, ip) for each IPv4 address on the host, from 'ip -4 addr show'."""
+    ip_output = subprocess.check_output("ip -4 addr show", shell=True).decode("utf-8")
+    addresses = []
+    for line in ip_output.splitlines():
+        split_line = line.split()
+        if "inet" in line and len(split_line) >= 7:
+            addresses.append((split_line[6], split_line[1].split("/")[0]))
+    return addresses
+
 def main():
     # Get the IPs configured on the host
-    ip_output = subprocess.check_output("ip -4 addr show", shell=True)
-
-    ip_output = ip_output.decode("utf-8")
-
     ips = []
     interfaces = set()
-    for line in ip_output.splitlines():
-        if "inet" in line:
-            split_line = line.split()
-            if len(split_line) >= 7:
-                ip = split_line[1].split("/")[0]
-                interface = split_line[6]
-                if interface.startswith("br0") and ip.startswith("10") and interface not in interfaces:
-                    interfaces.add(interface)
-                    ips.append((interface, ip))
-                    
+    for interface, ip in (local_addresses() if probe_ips is not None else ip_addresses()):
+        if interface.startswith("br0") and ip.startswith("10") and interface not in interfaces:
+            interfaces.add(interface)
+            ips.append((interface, ip))
+
+    # Without reach_probe.py each IP is pinged once in turn
+    if probe_ips is not None:
+        results = probe_ips([ip for _, ip in ips])
+    else:
+        results = [None] * len(ips)
     # Loop through ips and check for reachability.. alert when something is not reachable
-    for interface, ip in ips:
-        if check_reachability(ip):
-            logger_config.logging.info(f"IP {ip} is reachable on Interface: {interface}")
+    for (interface, ip), result in zip(ips, results):
+        if result is not None and result.error:
+            logger_config.logging.error(f"Could not probe IP {ip} on Interface {interface}: {result.error}")
+        elif (is_reachable(result) if result is not None else check_reachability(ip)):
+            loss = f" ({loss_percent(result)}% loss)" if result is not None else ""
+            logger_config.logging.info(f"IP {ip} is reachable on Interface: {interface}{loss}")
+            alert = alert_state.get_state().clear('CH00000004', ip)
+            if alert is not None:
+                alert_state.send_resolved(alert, 'IPNotReachable', f"IP {ip} is reachable again on Interface {interface}")
         else:
             logger_config.logging.error(f"IP {ip} is not reachable on Interface {interface}")
-            from send_syslog import send_syslog_message, syslog_host, syslog_port
-            failed_ip_text = f'"IP {ip} is not reachable on Interface {(interface)}"'
-            cluster_name = f'"{(send_syslog.value)}"'
-            attributes = {
-                '"ClusterName"': cluster_name,
-                '"AlertCode"': '"CH00000004"',
-                '"AlertName"': '"IPNotReachable"',
-                '"AlertSeverity"': '"CRITICAL"',
-                '"AlertDescription"': failed_ip_text,
-                '"AlertCause"': '"There is an IP that is not reachable, check the node and ensure connectivity"',
-            }    
-            send_syslog_message(syslog_host, syslog_port, attributes)
+            # Sent when the IP becomes unreachable and as a reminder while it stays that way
+            if alert_state.get_state().fire('CH00000004', ip):
+                from send_syslog import send_syslog_message, syslog_host, syslog_port
+                failed_ip_text = f'"IP {ip} is not reachable on Interface {(interface)}"'
+                cluster_name = f'"{(send_syslog.value)}"'
+                attributes = {
+                    '"ClusterName"': cluster_name,
+                    '"AlertCode"': '"CH00000004"',
+                    '"AlertName"': '"IPNotReachable"',
+                    '"AlertSeverity"': '"CRITICAL"',
+                    '"AlertDescription"': failed_ip_text,
+                    '"AlertCause"': '"There is an IP that is not reachable, check the node and ensure connectivity"',
+                }    
+                send_syslog_message(syslog_host, syslog_port, attributes)
             
 if __name__ == "__main__":
     main()
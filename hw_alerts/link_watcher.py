@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+#
+# Date: 10/18/2026
+#
+# Description: Network interface state kept in memory from rtnetlink. One netlink socket is subscribed to the
+#              kernel's link and address events, after an initial dump of all links and addresses, so a link
+#              going down is known as soon as the kernel reports it, without reading /proc or /sys or running
+#              'ip' on a timer. The interfaces watched are bond0 and br0, their slaves, the VLANs on any of
+#              these, and every other interface carrying an IPv4 address. A watched interface that disappears
+#              stays listed as missing until it comes back.
+#
+# Usage: ./link_watcher.py [--watch]
+#
+import argparse
+import errno
+import socket
+import struct
+import threading
+from collections import namedtuple
+
+# Interfaces watched along with their slaves and VLANs
+ROOT_INTERFACES = ('bond0', 'br0')
+
+# Receive buffer for the netlink socket, large enough for a burst of events from a bond failing over
+RECEIVE_BUFFER = 1024 * 1024
+# Seconds between checks of the stop event while no events arrive
+STOP_POLL = 1.0
+
+# netlink and rtnetlink constants, from linux/netlink.h, linux/rtnetlink.h and linux/if_link.h
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+NLM_F_REQUEST = 0x1
+NLM_F_DUMP = 0x300
+RTM_NEWLINK = 16
+RTM_DELLINK = 17
+RTM_GETLINK = 18
+RTM_NEWADDR = 20
+RTM_DELADDR = 21
+RTM_GETADDR = 22
+RTMGRP_LINK = 0x1
+RTMGRP_IPV4_IFADDR = 0x10
+RTMGRP_IPV6_IFADDR = 0x100
+IFLA_IFNAME = 3
+IFLA_LINK = 5
+IFLA_MASTER = 10
+IFLA_OPERSTATE = 16
+IFLA_LINKINFO = 18
+IFLA_INFO_KIND = 1
+IFA_ADDRESS = 1
+IFA_LOCAL = 2
+NLA_TYPE_MASK = 0x3fff
+IFF_UP = 0x1
+IFF_LOOPBACK = 0x8
+IFF_RUNNING = 0x40
+
+OPERSTATES = ['UNKNOWN', 'NOTPRESENT', 'DOWN', 'LOWERLAYERDOWN', 'TESTING', 'DORMANT', 'UP']
+
+_NLMSGHDR = struct.Struct('=IHHII')
+_IFINFOMSG = struct.Struct('=BxHiII')
+_IFADDRMSG = struct.Struct('=BBBBI')
+
+Link = namedtuple('Link', ['name', 'index', 'up', 'state', 'master', 'kind', 'addresses'])
+Link.__doc__ = """
+One watched interface. up is what alerts go by; state is the kernel's operstate, or MISSING for an interface
+that was deleted; master is the name of the bond or bridge it belongs to.
+"""
+
+
+def _align(length):
+    return (length + 3) & ~3
+
+
+def _attributes(data, offset):
+    attributes = {}
+    while offset + 4 <= len(data):
+        length, kind = struct.unpack_from('=HH', data, offset)
+        if length < 4:
+            break
+        attributes[kind & NLA_TYPE_MASK] = data[offset + 4:offset + length]
+        offset += _align(length)
+    return attributes
+
+
+def _messages(data):
+    offset = 0
+    while offset + _NLMSGHDR.size <= len(data):
+        length, kind, _, sequence, _ = _NLMSGHDR.unpack_from(data, offset)
+        if length < _NLMSGHDR.size:
+            break
+        yield kind, sequence, data[offset + _NLMSGHDR.size:offset + length]
+        offset += _align(length)
+
+
+def _parse_link(body):
+    _, _, index, flags, _ = _IFINFOMSG.unpack_from(body)
+    attributes = _attributes(body, _IFINFOMSG.size)
+    kind = _attributes(attributes.get(IFLA_LINKINFO, b''), 0).get(IFLA_INFO_KIND, b'')
+    return {
+        'index': index,
+        'name': attributes.get(IFLA_IFNAME, b'').rstrip(b'\0').decode('utf-8', 'replace'),
+        'flags': flags,
+        'operstate': attributes.get(IFLA_OPERSTATE, b'\0')[0],
+        'master': struct.unpack('=I', attributes[IFLA_MASTER])[0] if IFLA_MASTER in attributes else 0,
+        'link': struct.unpack('=i', attributes[IFLA_LINK])[0] if IFLA_LINK in attributes else 0,
+        'kind': kind.rstrip(b'\0').decode('utf-8', 'replace') or None,
+    }
+
+
+def _parse_address(body):
+    family, _, _, _, index = _IFADDRMSG.unpack_from(body)
+    attributes = _attributes(body, _IFADDRMSG.size)
+    # On point to point links IFA_ADDRESS is the peer, IFA_LOCAL is ours
+    raw = attributes.get(IFA_LOCAL, attributes.get(IFA_ADDRESS))
+    if raw is None or family not in (socket.AF_INET, socket.AF_INET6):
+        return index, family, None
+    return index, family, socket.inet_ntop(family, raw)
+
+
+def _state_name(operstate):
+    return OPERSTATES[operstate] if operstate < len(OPERSTATES) else str(operstate)
+
+
+def _is_up(link):
+    if not link['flags'] & IFF_UP:
+        return False
+    # Virtual interfaces without carrier reporting leave operstate UNKNOWN and show RUNNING instead
+    if _state_name(link['operstate']) == 'UNKNOWN':
+        return bool(link['flags'] & IFF_RUNNING)
+    return _state_name(link['operstate']) == 'UP'
+
+
+class LinkWatcher:
+    """
+    Interface state from rtnetlink.
+
+    Args:
+        roots: Interfaces watched along with their slaves and VLANs
+        on_change: Called with a Link, outside the watcher's lock, when a watched interface goes up or down
+    """
+
+    def __init__(self, roots=ROOT_INTERFACES, on_change=None):
+        self.roots = set(roots)
+        self.on_change = on_change
+        self.sock = None
+        self.sequence = 0
+        self._links = {}
+        self._addresses = {}
+        self._missing = {}
+        self._lock = threading.Lock()
+        self._reported = {}
+
+    def open(self):
+        """Subscribe to link and address events and load the current state."""
+        self.sock = socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, socket.NETLINK_ROUTE)
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, RECEIVE_BUFFER)
+        self.sock.bind((0, RTMGRP_LINK | RTMGRP_IPV4_IFADDR | RTMGRP_IPV6_IFADDR))
+        self.resync()
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+    def resync(self):
+        """Reload every link and address, after the socket opened or events were lost."""
+        with self._lock:
+            self._links.clear()
+            self._addresses.clear()
+        self._dump(RTM_GETLINK, _IFINFOMSG.pack(socket.AF_UNSPEC, 0, 0, 0, 0))
+        self._dump(RTM_GETADDR, _IFADDRMSG.pack(socket.AF_UNSPEC, 0, 0, 0, 0))
+        self._report()
+
+    def _dump(self, kind, body):
+        self.sequence += 1
+        header = _NLMSGHDR.pack(_NLMSGHDR.size + len(body), kind, NLM_F_REQUEST | NLM_F_DUMP, self.sequence, 0)
+        self.sock.sendto(header + body, (0, 0))
+        # Events that arrive during the dump are applied in order with it
+        while not self._receive(self.sequence):
+            pass
+
+    def _receive(self, sequence=None):
+        """Apply one read of messages; returns True once the dump with this sequence number is done."""
+        data = self.sock.recv(65536)
+        done = False
+        with self._lock:
+            for kind, message_sequence, body in _messages(data):
+                if kind == NLMSG_ERROR:
+                    error = -struct.unpack_from('=i', body)[0]
+                    if error and message_sequence == sequence:
+                        raise OSError(error, f"rtnetlink dump failed: {errno.errorcode.get(error, error)}")
+                elif kind == NLMSG_DONE:
+                    done = done or message_sequence == sequence
+                else:
+                    self._apply(kind, body)
+        return done
+
+    def _apply(self, kind, body):
+        if kind in (RTM_NEWLINK, RTM_DELLINK):
+            link = _parse_link(body)
+            old = self._links.pop(link['index'], None)
+            if kind == RTM_NEWLINK:
+                self._links[link['index']] = link
+                self._missing.pop(link['name'], None)
+            elif old is not None and old['index'] in self._tracked_indexes(extra=old):
+                self._missing[old['name']] = Link(old['name'], old['index'], False, 'MISSING', None, old['kind'], ())
+                self._addresses.pop(old['index'], None)
+        elif kind in (RTM_NEWADDR, RTM_DELADDR):
+            index, family, address = _parse_address(body)
+            if address is None:
+                return
+            addresses = self._addresses.setdefault(index, {})
+            if kind == RTM_NEWADDR:
+                addresses[address] = family
+            else:
+                addresses.pop(address, None)
+
+    def _tracked_indexes(self, extra=None):
+        links = dict(self._links)
+        if extra is not None:
+            links[extra['index']] = extra
+        tracked = {index for index, link in links.items()
+                   if link['name'] in self.roots
+                   or (not link['flags'] & IFF_LOOPBACK
+                       and socket.AF_INET in self._addresses.get(index, {}).values())}
+        # Slaves of a watched bond or bridge and VLANs on a watched interface, through any depth of nesting
+        while True:
+            more = {index for index, link in links.items() if index not in tracked
+                    and (link['master'] in tracked or (link['kind'] == 'vlan' and link['link'] in tracked))}
+            if not more:
+                return tracked
+            tracked |= more
+
+    def links(self):
+        """Return the watched interfaces, missing ones included, sorted by name."""
+        with self._lock:
+            links = [Link(link['name'], index, _is_up(link), _state_name(link['operstate']),
+                          self._links[link['master']]['name'] if link['master'] in self._links else None,
+                          link['kind'], tuple(sorted(self._addresses.get(index, {}))))
+                     for index, link in self._links.items() if index in self._tracked_indexes()]
+            links.extend(self._missing.values())
+        return sorted(links, key=lambda link: link.name)
+
+    def _report(self):
+        links = self.links()
+        changed = [link for link in links if self._reported.get(link.name) != link.up]
+        self._reported = {link.name: link.up for link in links}
+        if self.on_change is not None:
+            for link in changed:
+                self.on_change(link)
+
+    def run(self, stop):
+        """
+        Apply events until stop is set, calling on_change as watched interfaces change.
+
+        Args:
+            stop: threading.Event that ends the loop
+        """
+        if self.sock is None:
+            self.open()
+        self.sock.settimeout(STOP_POLL)
+        try:
+            while not stop.is_set():
+                try:
+                    self._receive()
+                except socket.timeout:
+                    continue
+                except OSError as e:
+                    if e.errno != errno.ENOBUFS:
+                        raise
+                    # The kernel dropped events because we fell behind, only a fresh dump is reliable
+                    self.sock.settimeout(None)
+                    self.resync()
+                    self.sock.settimeout(STOP_POLL)
+                    continue
+                self._report()
+        finally:
+            self.close()
+
+
+def snapshot(roots=ROOT_INTERFACES):
+    """Return the watched interfaces as they are now, for a one-off check."""
+    watcher = LinkWatcher(roots)
+    watcher.open()
+    try:
+        return watcher.links()
+    finally:
+        watcher.close()
+
+
+def format_link(link):
+    master = f" in {link.master}" if link.master else ''
+    kind = f" ({link.kind})" if link.kind else ''
+    return f"{link.name:<16} {'UP' if link.up else 'DOWN':<5} {link.state:<15}{kind}{master} {' '.join(link.addresses)}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Show the state of the bond, bridge, slave and VLAN interfaces')
+    parser.add_argument('--watch', action='store_true', help='Keep running and print interfaces as they change')
+    args = parser.parse_args()
+
+    if not args.watch:
+        for link in snapshot():
+            print(format_link(link))
+        return
+    stop = threading.Event()
+    try:
+        LinkWatcher(on_change=lambda link: print(format_link(link), flush=True)).run(stop)
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
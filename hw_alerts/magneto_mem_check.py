@@ -1,42 +1,66 @@
 #!/usr/bin/env python3
-import subprocess
+#
+# Updated: 10/18/2026 - Reads the process list and the mapped size from /proc instead of running ps and pmap,
+#                       and can be imported so the alert daemon checks magneto without starting this script
 import os
+import pwd
 
+PROC = '/proc'
 
-process = subprocess.Popen(
-    ["ps", "-ef"],
-    stdout=subprocess.PIPE,
-    stderr=subprocess.PIPE,
-)
 
-out, err = process.communicate()
-out = out.decode("utf-8")
+def find_magneto(proc=PROC):
+    """Return (pid, command path) of the cohesity magneto_exec process, or None when it isn't running."""
+    found = None
+    for pid in sorted((name for name in os.listdir(proc) if name.isdigit()), key=int):
+        try:
+            with open(os.path.join(proc, pid, 'cmdline'), 'rb') as f:
+                argv = f.read().decode('utf-8', 'replace').split('\0')
+            owner = pwd.getpwuid(os.stat(os.path.join(proc, pid)).st_uid).pw_name
+        except (OSError, KeyError):
+            continue
+        # Same match as 'ps -ef' lines holding both bin/magneto_exec and cohesity
+        command = ' '.join(argv)
+        if "bin/magneto_exec" in command and ("cohesity" in command or owner == "cohesity"):
+            found = (int(pid), argv[0])
+    return found
 
-magneto_pid = None
-magneto_name = None 
 
-for line in out.split("\n"):
-    if "bin/magneto_exec" in line and "cohesity" in line:
-        magneto_pid = line.split()[1]
-        magneto_name = line.split()[7]
+def mapped_kb(pid, proc=PROC):
+    """Total mapped size of a process in KB, the total line of 'pmap'."""
+    with open(os.path.join(proc, str(pid), 'status'), 'r') as f:
+        for line in f:
+            if line.startswith('VmSize:'):
+                return int(line.split()[1])
+    return 0
 
-if magneto_pid:
-    process = subprocess.Popen(
-        ["sudo", "pmap", magneto_pid],
-        stdout=subprocess.PIPE,
-        stderr=subprocess.PIPE,
-    )
 
-    out, err = process.communicate()
-    out = out.decode("utf-8")
+def magneto_memory(proc=PROC):
+    """
+    Memory mapped by magneto.
 
-    kb = out.split("\n")[-2].split()[1]
-    mb = int(kb.rstrip("K")) // 1024
+    Returns:
+        tuple: (executable name, pid, MB), or None when magneto is not running
+    """
+    found = find_magneto(proc)
+    if found is None:
+        return None
+    pid, magneto_name = found
+    try:
+        mb = mapped_kb(pid, proc) // 1024
+    except OSError:
+        # Exited since it was found
+        return None
+    magneto_exec = os.path.basename(magneto_name).split("_")[0]
+    return magneto_exec, pid, mb
 
-    filename = os.path.basename(magneto_name)
-    magneto_exec = filename.split("_")[0]
-    print("%s (%s): %d MB" % (magneto_exec, magneto_pid, mb))
 
-else:
-    print("Magneto process not found.")
+def main():
+    memory = magneto_memory()
+    if memory:
+        print("%s (%s): %d MB" % memory)
+    else:
+        print("Magneto process not found.")
 
+
+if __name__ == "__main__":
+    main()
@@ -2,87 +2,115 @@
 #
 # Authort: Doug Austin
 # Date: 8/23/2023
+# Updated: 10/18/2026 - Runs in the alert daemon without starting any process: the threshold is read from
+#                       magneto's /flagz page over HTTP and cached, the memory comes from magneto_mem_check
 
-import os
+import html
+import re
+import time
+import urllib.request
 import logger_config
-import subprocess
 import send_syslog
-
-# Setup to get Threashold configured on cluster
-command1 = "elinks -dump-width 1024 \"`links http:localhost:20000 | awk '/master/{print $2}' |sed 's/master//'`flagz\" > /tmp/flagz.txt"
-subprocess.run(command1, shell=True)
-# Execute commands against temp file to get set threasold
-command2 = "cat /tmp/flagz.txt | grep memory_usage_checker_additional | awk -F '=' '{print $2}' | awk '{print $1}'"
-result = subprocess.check_output(command2, shell=True)
-# Cleanup temp file created in command1
-command3 = "sudo rm -f /tmp/flagz.txt"
-subprocess.run(command3, shell=True)
-
-# Define Threashold and calculate 80% 
-Threashold = int(result)
-eighty_percent_threashold = int(Threashold * 0.8)
-percentage = int(Threashold * 0.8)
-calc_percent = (percentage / Threashold) * 100
+import alert_state
+import magneto_mem_check
+
+# Seconds between runs when loaded by alert_daemon.py
+CHECK_INTERVAL = 60
+
+# Magneto status page, it links to the master instance whose /flagz holds the threshold
+MAGNETO_URL = 'http://localhost:20000/'
+HTTP_TIMEOUT = 10
+# Seconds the threshold is cached, so a change to the gflag is picked up within this long
+THRESHOLD_TTL = 600
+
+# (threshold, time it was read)
+_threshold = None
+
+
+def _page_lines(url):
+    """Fetch a page and return its text lines, roughly as a text browser dumps it."""
+    with urllib.request.urlopen(url, timeout=HTTP_TIMEOUT) as response:
+        page = response.read().decode('utf-8', 'replace')
+    page = re.sub(r'<(br|/?p|/?div|/?tr|/?li|/?pre|/?h\d)\b[^>]*>', '\n', page, flags=re.I)
+    return [html.unescape(line) for line in re.sub(r'<[^>]+>', ' ', page).splitlines()]
+
+
+def _master_url():
+    # The line naming the master carries its address, such as "master http://10.0.0.1:20000/master"
+    for line in _page_lines(MAGNETO_URL):
+        if 'master' in line:
+            parts = line.split()
+            if len(parts) > 1 and parts[1].replace('master', '').startswith('http'):
+                return parts[1].replace('master', '')
+    # This node is the master
+    return MAGNETO_URL
+
+
+def read_threshold():
+    """Read memory_usage_checker_additional from the master's /flagz page; returns None if it isn't there."""
+    for line in _page_lines(f"{_master_url().rstrip('/')}/flagz"):
+        if 'memory_usage_checker_additional' in line and '=' in line:
+            value = line.split('=', 1)[1].split()
+            if value and value[0].isdigit():
+                return int(value[0])
+    return None
+
+
+def get_threshold():
+    """Return 80% of magneto's memory threshold in MB, read again once THRESHOLD_TTL has passed."""
+    global _threshold
+    now = time.monotonic()
+    if _threshold is None or now - _threshold[1] >= THRESHOLD_TTL:
+        try:
+            threshold = read_threshold()
+        except (OSError, ValueError) as e:
+            threshold = None
+            logger_config.logger.error(f"Could not read the magneto memory threshold: {e}")
+        if threshold is not None:
+            _threshold = (threshold, now)
+        elif _threshold is None:
+            return None
+    # Define Threashold and calculate 80%
+    return int(_threshold[0] * 0.8)
 
 
 def main():
-    # Execute the magneto_mem_check.sh script using subprocess
-    result = subprocess.run(['/home/support/alerts/magneto_mem_check.py'], stdout=subprocess.PIPE, shell=True)
-    output_lines = result.stdout.decode('utf-8').split('\n')
-    
-    # Remove any empty lines from the output_lines list
-    output_lines = [line.strip() for line in output_lines if line.strip()]
-
-    if len(output_lines) >= 1:
-        third_line = output_lines[0]  # Assuming the value is in the first line
-        extracted_value = extract_value(third_line)
-
-        if extracted_value is not None:
-            if extracted_value > eighty_percent_threashold:
-                # Perform an action when the value is over the value Threashold
-                logger_config.logger.error(f"Magneto memory is approaching 80% of max threashold: {eighty_percent_threashold} MB, Sending Alert")
-                from send_syslog import send_syslog_message, syslog_host, syslog_port
-                failed_mem_text = f'"Magneto memory is has reached {extracted_value} MB, above the 80% threashold of {eighty_percent_threashold} MB"'
-                cluster_name = f'"{(send_syslog.value)}"'
-                attributes = {
-                    '"ClusterName"': cluster_name,
-                    '"AlertCode"': '"CH00000005"',
-                    '"AlertName"': '"MagnetoOutOfMemory"',
-                    '"AlertSeverity"': '"WARNING"',
-                    '"AlertDescription"': failed_mem_text,
-                    '"AlertCause"': '"Magneto is consuming too much memory, Service Crash likely soon, open support case with Cohesity"',
-                }    
-                send_syslog_message(syslog_host, syslog_port, attributes)   
-                
-            else:
-                # Write the current output to a log file
-                logger_config.logger.info(f"Current Magneto Memory Allocated: {extracted_value} MB, below the 80% threashold of {eighty_percent_threashold} MB")
-        else:
-            print("Value extraction failed")
+    eighty_percent_threashold = get_threshold()
+    if eighty_percent_threashold is None:
+        logger_config.logger.error("Magneto memory threshold not found in /flagz, check skipped")
+        return
+
+    memory = magneto_mem_check.magneto_memory()
+    if memory is None:
+        logger_config.logger.info("Magneto process not found.")
+        return
+
+    extracted_value = memory[2]
+    if extracted_value > eighty_percent_threashold:
+        # Perform an action when the value is over the value Threashold
+        logger_config.logger.error(f"Magneto memory is approaching 80% of max threashold: {eighty_percent_threashold} MB, Sending Alert")
+        # Sent when magneto crosses the threshold and as a reminder while it stays over it
+        if alert_state.get_state().fire('CH00000005', 'magneto'):
+            from send_syslog import send_syslog_message, syslog_host, syslog_port
+            failed_mem_text = f'"Magneto memory is has reached {extracted_value} MB, above the 80% threashold of {eighty_percent_threashold} MB"'
+            cluster_name = f'"{(send_syslog.value)}"'
+            attributes = {
+                '"ClusterName"': cluster_name,
+                '"AlertCode"': '"CH00000005"',
+                '"AlertName"': '"MagnetoOutOfMemory"',
+                '"AlertSeverity"': '"WARNING"',
+                '"AlertDescription"': failed_mem_text,
+                '"AlertCause"': '"Magneto is consuming too much memory, Service Crash likely soon, open support case with Cohesity"',
+            }    
+            send_syslog_message(syslog_host, syslog_port, attributes)   
+        
     else:
-        print("Not enough lines in the output")
-
-def extract_value(line):
-    # Extract the value from a line of the format "magneto (PID): VALUE MB"
-    value_start = line.find(':') + 2  # Find the position after the colon and space
-    value_end = line.find(' MB', value_start)  # Find the position before " MB"
-    
-    if value_start != -1 and value_end != -1:
-        value_part = line[value_start:value_end]
-        try:
-            extracted_value = int(value_part)
-            return extracted_value
-        except ValueError:
-            return None
-    else:
-        return None
+        # Write the current output to a log file
+        logger_config.logger.info(f"Current Magneto Memory Allocated: {extracted_value} MB, below the 80% threashold of {eighty_percent_threashold} MB")
+        alert = alert_state.get_state().clear('CH00000005', 'magneto')
+        if alert is not None:
+            alert_state.send_resolved(alert, 'MagnetoOutOfMemory', f"Magneto memory back to {extracted_value} MB, below {eighty_percent_threashold} MB")
+
 
 if __name__ == "__main__":
     main()
-
-
-
-
-
-
-
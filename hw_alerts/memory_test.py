@@ -6,11 +6,15 @@
 import os
 import logger_config
 import send_syslog
+import alert_state
 import socket
 
 # Error Count Threshold
 THRESHOLD = 5
 
+# Seconds between runs when loaded by alert_daemon.py
+CHECK_INTERVAL = 60
+
 def read_ue_count(mc_number):
     ue_count_file_path = f"/sys/devices/system/edac/mc/mc{mc_number}/ue_count"
 
@@ -29,20 +33,25 @@ def main():
         
         if ue_count > THRESHOLD:
             logger_config.logger.error(f"DIMM Module: {mc_count}, Error Count: {ue_count}")
-            from send_syslog import send_syslog_message, syslog_host, syslog_port
-            failed_dimm_text = f'"DIMM {(mc_count)} showing excessive uncorrectable errors."'
-            cluster_name = f'"{(send_syslog.value)}"'
-            attributes = {
-            '"ClusterName"': cluster_name,
-            '"AlertCode"': '"CH00000006"',
-            '"AlertName"': '"DimmMemoryError"',
-            '"AlertSeverity"': '"WARNING"',
-            '"AlertDescription"': failed_dimm_text,
-            '"AlertCause"': '"Likely caused by a DIMM starting to fail."',
-            }    
-            send_syslog_message(syslog_host, syslog_port, attributes)   
+            # Sent when the DIMM crosses the threshold and as a reminder while it stays over it
+            if alert_state.get_state().fire('CH00000006', f"mc{mc_count}"):
+                from send_syslog import send_syslog_message, syslog_host, syslog_port
+                failed_dimm_text = f'"DIMM {(mc_count)} showing excessive uncorrectable errors."'
+                cluster_name = f'"{(send_syslog.value)}"'
+                attributes = {
+                '"ClusterName"': cluster_name,
+                '"AlertCode"': '"CH00000006"',
+                '"AlertName"': '"DimmMemoryError"',
+                '"AlertSeverity"': '"WARNING"',
+                '"AlertDescription"': failed_dimm_text,
+                '"AlertCause"': '"Likely caused by a DIMM starting to fail."',
+                }    
+                send_syslog_message(syslog_host, syslog_port, attributes)   
         else: 
             logger_config.logger.info(f"DIMM Error Count (MC{mc_count}): {ue_count}")
+            alert = alert_state.get_state().clear('CH00000006', f"mc{mc_count}")
+            if alert is not None:
+                alert_state.send_resolved(alert, 'DimmMemoryError', f"DIMM {mc_count} uncorrectable errors back under the threshold")
         mc_count += 1
 
 if __name__ == "__main__":
@@ -2,49 +2,35 @@
 #
 # Authort: Doug Austin
 # Date: 8/23/2023
+# Updated: 10/18/2026 - Interface state comes from rtnetlink through link_watcher.py; under the alert daemon
+#                       links are watched for events and a link going down is alerted as soon as it happens
 
 
-import os
-import socket
+import threading
 import logger_config
 import send_syslog
+import alert_state
+import link_watcher
 
-def get_interfaces_with_ip():
-    interfaces = []
-    with open('/proc/net/dev', 'r') as f:
-        lines = f.readlines()[2:]
-        for line in lines:
-            interface = line.split(':')[0].strip()
-            if check_interface_ip(interface):
-                interfaces.append(interface)
-    return interfaces
-
-def check_interface_ip(interface):
-    with open('/sys/class/net/{}/operstate'.format(interface), 'r') as f:
-        status = f.read().strip()
-
-    if status != 'up':
-        return False
-
-    output = os.popen('ip addr show {}'.format(interface)).read()
-    if 'inet ' in output:
-        return True
-    else:
-        return False
-
-# Get interfaces with assigned IP addresses
-interfaces = get_interfaces_with_ip()
-
-# Print interface details and status
-for interface in interfaces:
-    status = check_interface_ip(interface)
-    state = 'UP' if status else 'DOWN'
-    logger_config.logging.info(f"Interface: {interface}, State: {state}")
-
-    if state == 'DOWN':
-        logger_config.logger.error(f"Interface: {interface}, State: {state}")
+# Seconds between runs when loaded by alert_daemon.py
+CHECK_INTERVAL = 30
+
+# Watcher started by the alert daemon; without it each run takes a snapshot of the links
+_watcher = None
+
+def report_link(link):
+    """Alert on a watched interface that is down, resolve the alert once it is up."""
+    if link.up:
+        alert = alert_state.get_state().clear('CH00000002', link.name)
+        if alert is not None:
+            alert_state.send_resolved(alert, 'NetworkInterfaceDown', f"Interface up: {link.name}")
+        return
+
+    logger_config.logger.error(f"Interface: {link.name}, State: DOWN ({link.state})")
+    # Sent when the interface goes down and as a reminder while it stays down
+    if alert_state.get_state().fire('CH00000002', link.name):
         from send_syslog import send_syslog_message, syslog_host, syslog_port
-        failed_nic_text = f'"Interface down: {(interface)}"'
+        failed_nic_text = f'"Interface down: {(link.name)}"'
         cluster_name = f'"{(send_syslog.value)}"'
         attributes = {
             '"ClusterName"': cluster_name,
@@ -53,5 +39,36 @@ for interface in interfaces:
             '"AlertSeverity"': '"WARNING"',
             '"AlertDescription"': failed_nic_text,
             '"AlertCause"': '"Network Interface is Down."',
-        }    
+        }
         send_syslog_message(syslog_host, syslog_port, attributes)
+
+def start(stop):
+    """Called once by alert_daemon.py: watch link events until stop is set."""
+    global _watcher
+    watcher = link_watcher.LinkWatcher(on_change=report_link)
+    watcher.open()
+    _watcher = watcher
+
+    def run():
+        global _watcher
+        try:
+            watcher.run(stop)
+        except Exception:
+            logger_config.logger.exception("Link watcher failed, interfaces are checked every run instead")
+        _watcher = None
+
+    threading.Thread(target=run, name='link-watcher', daemon=True).start()
+
+def main():
+    # Watched interfaces from the running watcher, or read from the kernel once
+    links = _watcher.links() if _watcher is not None else link_watcher.snapshot()
+
+    # Down interfaces are alerted, again as reminders when due
+    for link in links:
+        if link.up:
+            logger_config.logging.info(f"Interface: {link.name}, State: UP")
+        report_link(link)
+
+
+if __name__ == "__main__":
+    main()
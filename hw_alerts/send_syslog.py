@@ -2,54 +2,206 @@
 #
 # Authort: Doug Austin
 # Date: 8/23/2023
+# Updated: 10/18/2026 - Persistent connection, octet-counted batches and an on-disk spool for undelivered alerts,
+#                       the framing and the spool are in syslog_spool.py
 # Script to connect to Splunk and send a message
 # Set syslog server and port in this script
+#
+# Messages are queued and sent by a background thread over one connection per collector, kept open between
+# alerts and framed with RFC 6587 octet counting ("<length> <message>") so several can go in one write.
+# When the collector can't be reached, messages are appended to a spool file instead of being dropped; the
+# spool is replayed in batches, oldest first, once the collector answers again, and new messages queue
+# behind it so the order is kept. Reconnects back off, so a network flap costs one connection attempt per
+# node every so often instead of one per alert. Anything still queued when the process exits is spooled.
 
 
+import atexit
+import queue
+import select
 import socket
+import threading
+import time
 import logger_config
+from syslog_spool import BATCH_SIZE, BATCH_BYTES, Spool, frame
 
 # Syslog Server and Port information
 
 syslog_host = '<VIP for Syslog instance>'  # <<< Change to syslog server name
 syslog_port = <port>                       # <<< Change to syslog server port
 
+# Seconds the sender waits for more messages before writing a batch
+BATCH_DELAY = 0.2
+# Seconds between spool batches during replay, so a cluster coming back at once doesn't flood the collector
+REPLAY_DELAY = 0.5
+
+CONNECT_TIMEOUT = 5
+SEND_TIMEOUT = 10
+# Reconnect backoff in seconds, doubling from the first to the last
+MIN_BACKOFF = 1
+MAX_BACKOFF = 60
+
+# Messages held in memory; past this they go straight to the spool
+MAX_QUEUE = 10000
+# Seconds allowed at exit to send what is queued before it is spooled
+FLUSH_TIMEOUT = 10
+
 
 # Get Cluster name from alerting system
 hostname = socket.gethostname()
 parts = hostname.split("-")
 value = "-".join(parts[:2])
 
-def send_syslog_message(syslog_host, syslog_port, attributes=None):
-    # Create a TCP socket
-    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-
-    try:
-        # Connect to the syslog server
-        sock.connect((syslog_host, syslog_port))
-        original_host = socket.gethostname()
-        formatted_message = f"{original_host} cohesity_alerts: "
-
-        # Add structured data attributes
-        if attributes is not None:
-            attribute_list = []
-            for key, value in attributes.items():
-                if key == "original_host":
-                    attribute_list.append(f'{key}: "{value}"')
+
+class SyslogTransport:
+    """Queue and background sender for one collector."""
+
+    def __init__(self, host, port, spool=None):
+        self.host = host
+        self.port = port
+        self.spool = spool or Spool()
+        self.queue = queue.Queue(MAX_QUEUE)
+        self.sock = None
+        self.backoff = MIN_BACKOFF
+        self.next_connect = 0.0
+        self.stopping = threading.Event()
+        self.thread = threading.Thread(target=self._run, name=f"syslog-{host}:{port}", daemon=True)
+        self.thread.start()
+
+    def send(self, message):
+        try:
+            self.queue.put_nowait(frame(message))
+        except queue.Full:
+            self.spool.append([frame(message)])
+
+    def _connected(self):
+        if self.sock is not None:
+            # A collector that closed the connection shows as readable with nothing to read
+            try:
+                readable, _, _ = select.select([self.sock], [], [], 0)
+                if not readable or self.sock.recv(1, socket.MSG_PEEK):
+                    return True
+            except OSError:
+                pass
+            self._disconnect()
+        if time.monotonic() < self.next_connect:
+            return False
+        try:
+            self.sock = socket.create_connection((self.host, self.port), timeout=CONNECT_TIMEOUT)
+            self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            self.sock.settimeout(SEND_TIMEOUT)
+        except OSError as e:
+            logger_config.logging.error(f"Failed to connect to splunk {self.host}:{self.port}: {e}")
+            self.sock = None
+            self.next_connect = time.monotonic() + self.backoff
+            self.backoff = min(self.backoff * 2, MAX_BACKOFF)
+            return False
+        self.backoff = MIN_BACKOFF
+        return True
+
+    def _disconnect(self):
+        if self.sock is not None:
+            try:
+                self.sock.close()
+            except OSError:
+                pass
+        self.sock = None
+
+    def _write(self, frames):
+        if not self._connected():
+            return False
+        try:
+            self.sock.sendall(b''.join(frames))
+        except OSError as e:
+            logger_config.logging.error(f"Failed to send message to splunk: {e}")
+            self._disconnect()
+            return False
+        return True
+
+    def _next_batch(self, wait):
+        try:
+            frames = [self.queue.get(timeout=wait)]
+        except queue.Empty:
+            return []
+        size = len(frames[0])
+        deadline = time.monotonic() + BATCH_DELAY
+        while len(frames) < BATCH_SIZE and size < BATCH_BYTES:
+            try:
+                frames.append(self.queue.get(timeout=max(deadline - time.monotonic(), 0)))
+            except queue.Empty:
+                break
+            size += len(frames[-1])
+        return frames
+
+    def _run(self):
+        replaying = self.spool.pending()
+        while not (self.stopping.is_set() and self.queue.empty() and not replaying):
+            frames = self._next_batch(REPLAY_DELAY if replaying else 1)
+            if frames:
+                # Behind a spool that hasn't been replayed yet, messages join the spool to keep their order
+                if replaying or not self._write(frames):
+                    replaying = self.spool.append(frames) or replaying
                 else:
-                    attribute_list.append(f'{key}: {value}')
-            formatted_message += "{" + ", ".join(attribute_list) + "}"
-            
+                    logger_config.logging.info(f"Splunk alert sent successfully ({len(frames)} messages).")
+            elif not replaying and not self.stopping.is_set():
+                # Pick up alerts other processes spooled
+                replaying = self.spool.pending()
+            if replaying:
+                if self.stopping.is_set() and self.sock is None and time.monotonic() < self.next_connect:
+                    # Exiting while the collector is down, what is left stays spooled
+                    break
+                replaying = not self.spool.replay(self._write)
+                if not replaying:
+                    logger_config.logging.info("Splunk alert spool replayed.")
+
+    def close(self, timeout=FLUSH_TIMEOUT):
+        """Send or spool everything queued and stop the sender."""
+        self.stopping.set()
+        self.thread.join(timeout)
+        leftover = []
+        while True:
+            try:
+                leftover.append(self.queue.get_nowait())
+            except queue.Empty:
+                break
+        if leftover:
+            self.spool.append(leftover)
+        self._disconnect()
+
+
+_transports = {}
+_transports_lock = threading.Lock()
 
-        # Send the syslog message
-        sock.sendall(formatted_message.encode())
-        logger_config.logging.info(f"Splunk alert sent successfully.")
-        
-    except socket.error as e:
-        logger_config.logging.error(f"Failed to send message to splunk")
-    finally:
-        sock.close()
 
+def get_transport(syslog_host, syslog_port):
+    """Return the transport of a collector, one per process."""
+    with _transports_lock:
+        key = (syslog_host, syslog_port)
+        if key not in _transports:
+            _transports[key] = SyslogTransport(syslog_host, syslog_port)
+        return _transports[key]
+
+
+@atexit.register
+def close_transports():
+    with _transports_lock:
+        for transport in _transports.values():
+            transport.close()
+        _transports.clear()
+
+
+def send_syslog_message(syslog_host, syslog_port, attributes=None):
+    original_host = socket.gethostname()
+    formatted_message = f"{original_host} cohesity_alerts: "
 
+    # Add structured data attributes
+    if attributes is not None:
+        attribute_list = []
+        for key, value in attributes.items():
+            if key == "original_host":
+                attribute_list.append(f'{key}: "{value}"')
+            else:
+                attribute_list.append(f'{key}: {value}')
+        formatted_message += "{" + ", ".join(attribute_list) + "}"
 
- 
+    # Queue the syslog message, the transport sends it or spools it
+    get_transport(syslog_host, syslog_port).send(formatted_message)
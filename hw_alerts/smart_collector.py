@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+#
+# Date: 10/18/2026
+#
+# Description: SMART collection for the disk check. Every disk is probed at the same time with
+#              'smartctl -j', each with its own timeout, and the JSON is parsed into the overall health plus
+#              the counters that show a drive wearing out: reallocated, pending and offline uncorrectable
+#              sectors, reported uncorrectable errors and interface CRC errors on ATA drives, grown defects
+#              and uncorrected errors on SCSI drives, and media errors, critical warnings, spare and wear on
+#              NVMe drives. A per-disk history of the counters is kept so their growth can be alerted on
+#              before the drive itself reports FAILED.
+#
+# Usage: ./smart_collector.py [--timeout 30] [--json] [disk ...]
+#
+import argparse
+import json
+import os
+import subprocess
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+
+HISTORY_FILE = '/home/support/alerts/.smart_history.json'
+
+# Seconds to wait for smartctl on one disk; a disk that hangs is reported, not waited for
+PROBE_TIMEOUT = 30
+MAX_WORKERS = 16
+
+# Samples kept per disk and the age after which they are dropped
+MAX_SAMPLES = 1000
+MAX_SAMPLE_AGE = 7 * 24 * 3600
+
+# Growth over GROWTH_WINDOW seconds that is alerted on, per counter
+GROWTH_WINDOW = 24 * 3600
+GROWTH_THRESHOLDS = {
+    'reallocated': 5,
+    'pending': 1,
+    'offline_uncorrectable': 1,
+    'reported_uncorrect': 1,
+    'crc_errors': 10,
+    'grown_defects': 5,
+    'uncorrected_errors': 1,
+    'media_errors': 1,
+}
+
+# ATA attribute IDs of the counters kept
+ATA_COUNTERS = {5: 'reallocated', 187: 'reported_uncorrect', 197: 'pending', 198: 'offline_uncorrectable',
+                199: 'crc_errors'}
+
+# Block devices that are not physical disks
+_VIRTUAL_PREFIXES = ('loop', 'ram', 'zram', 'dm-', 'md', 'sr', 'nbd', 'fd')
+
+SmartReport = namedtuple('SmartReport', ['disk', 'passed', 'protocol', 'model', 'serial', 'temperature',
+                                         'counters', 'failing_attributes', 'error'])
+SmartReport.__doc__ = """
+SMART state of one disk. passed is True, False, or None when the drive doesn't report it; counters holds
+the wear counters the drive has; error is set when smartctl could not be run or its output read.
+"""
+
+
+def list_disks(sys_block='/sys/block'):
+    """Return the kernel names of the physical disks, such as ['sda', 'nvme0n1']."""
+    try:
+        names = os.listdir(sys_block)
+    except OSError:
+        return []
+    return sorted(name for name in names if not name.startswith(_VIRTUAL_PREFIXES))
+
+
+def _raw(attribute):
+    raw = attribute.get('raw', {})
+    # Some drives pack other data in the upper bytes, the string form starts with the count
+    try:
+        return int(str(raw.get('string', raw.get('value', 0))).split()[0])
+    except (ValueError, IndexError):
+        return raw.get('value', 0)
+
+
+def parse_report(disk, data):
+    """
+    Turn 'smartctl -j' output into a SmartReport.
+
+    Args:
+        disk: Kernel name of the disk
+        data: Parsed JSON from smartctl
+
+    Returns:
+        SmartReport
+    """
+    passed = data.get('smart_status', {}).get('passed')
+    protocol = data.get('device', {}).get('protocol')
+    counters = {}
+    failing = []
+
+    for attribute in data.get('ata_smart_attributes', {}).get('table', []):
+        if attribute.get('id') in ATA_COUNTERS:
+            counters[ATA_COUNTERS[attribute['id']]] = _raw(attribute)
+        if attribute.get('when_failed') == 'now':
+            failing.append(attribute.get('name', str(attribute.get('id'))))
+
+    nvme = data.get('nvme_smart_health_information_log')
+    if nvme:
+        counters['media_errors'] = nvme.get('media_errors', 0)
+        counters['critical_warning'] = nvme.get('critical_warning', 0)
+        counters['percentage_used'] = nvme.get('percentage_used', 0)
+        counters['available_spare'] = nvme.get('available_spare', 100)
+        if counters['critical_warning']:
+            failing.append(f"critical_warning=0x{counters['critical_warning']:x}")
+        if counters['available_spare'] < nvme.get('available_spare_threshold', 0):
+            failing.append('available_spare')
+
+    if 'scsi_grown_defect_list' in data:
+        counters['grown_defects'] = data['scsi_grown_defect_list']
+    error_log = data.get('scsi_error_counter_log')
+    if error_log:
+        counters['uncorrected_errors'] = sum(error_log.get(direction, {}).get('total_uncorrected_errors', 0)
+                                             for direction in ('read', 'write', 'verify'))
+
+    messages = [message.get('string', '') for message in data.get('smartctl', {}).get('messages', [])
+                if message.get('severity') == 'error']
+    # Bits 0 and 1 of the exit status: the command line or opening the device failed
+    error = None
+    if data.get('smartctl', {}).get('exit_status', 0) & 3:
+        error = '; '.join(messages) or 'smartctl failed'
+    return SmartReport(disk, passed, protocol, data.get('model_name'), data.get('serial_number'),
+                       data.get('temperature', {}).get('current'), counters, failing, error)
+
+
+def probe(disk, timeout=PROBE_TIMEOUT):
+    """Run smartctl on one disk and return its SmartReport."""
+    command = ['smartctl', '-j', '-i', '-H', '-A', f"/dev/{disk}"]
+    if os.geteuid() != 0:
+        command.insert(0, 'sudo')
+    try:
+        result = subprocess.run(command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return SmartReport(disk, None, None, None, None, None, {}, [], f"timed out after {timeout} seconds")
+    except OSError as e:
+        return SmartReport(disk, None, None, None, None, None, {}, [], str(e))
+    try:
+        return parse_report(disk, json.loads(result.stdout.decode('utf-8', 'replace')))
+    except ValueError:
+        error = result.stderr.decode('utf-8', 'replace').strip() or f"exit status {result.returncode}"
+        return SmartReport(disk, None, None, None, None, None, {}, [], error)
+
+
+def collect(disks=None, timeout=PROBE_TIMEOUT, workers=MAX_WORKERS):
+    """
+    Probe disks concurrently.
+
+    Args:
+        disks: Kernel disk names, all physical disks by default
+        timeout: Seconds to wait for each disk
+        workers: Disks probed at the same time
+
+    Returns:
+        list: SmartReport per disk, in disk order
+    """
+    disks = list_disks() if disks is None else disks
+    if not disks:
+        return []
+    with ThreadPoolExecutor(max_workers=min(workers, len(disks))) as pool:
+        return list(pool.map(lambda disk: probe(disk, timeout), disks))
+
+
+class SmartHistory:
+    """Counter samples per disk, keyed by serial number so a disk keeps its history if it is renamed."""
+
+    def __init__(self, path=HISTORY_FILE):
+        self.path = path
+        self.disks = {}
+        try:
+            with open(path, 'r') as f:
+                self.disks = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    @staticmethod
+    def key(report):
+        return report.serial or report.disk
+
+    def add(self, report, now=None):
+        """Record the counters of a report and return the growth over GROWTH_WINDOW worth alerting on."""
+        now = time.time() if now is None else now
+        samples = [sample for sample in self.disks.get(self.key(report), []) if now - sample[0] < MAX_SAMPLE_AGE]
+        growth = growth_alerts(samples, report.counters, now)
+        samples.append([now, report.counters])
+        self.disks[self.key(report)] = samples[-MAX_SAMPLES:]
+        return growth
+
+    def retain(self, keys):
+        """Drop the history of disks not in keys, such as disks that were pulled or replaced."""
+        keys = set(keys)
+        self.disks = {key: samples for key, samples in self.disks.items() if key in keys}
+
+    def save(self):
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(self.disks, f, separators=(',', ':'))
+            os.replace(tmp_path, self.path)
+        except OSError:
+            pass
+
+
+def growth_alerts(samples, counters, now):
+    """
+    Compare counters with the oldest sample inside GROWTH_WINDOW.
+
+    Returns:
+        list: (counter, old value, new value, hours between them) for counters that grew past their threshold
+    """
+    window = [sample for sample in samples if now - sample[0] <= GROWTH_WINDOW]
+    if not window:
+        return []
+    then, old = window[0]
+    alerts = []
+    for counter, threshold in GROWTH_THRESHOLDS.items():
+        if counter in counters and counter in old and counters[counter] - old[counter] >= threshold:
+            alerts.append((counter, old[counter], counters[counter], round((now - then) / 3600, 1)))
+    return alerts
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Show the SMART state of the disks')
+    parser.add_argument('disks', nargs='*', help='Disks such as sda (default: all physical disks)')
+    parser.add_argument('--timeout', type=float, default=PROBE_TIMEOUT, help='Seconds to wait for each disk')
+    parser.add_argument('--json', action='store_true', help='Print the reports as JSON')
+    args = parser.parse_args()
+
+    reports = collect(args.disks or None, args.timeout)
+    if args.json:
+        print(json.dumps([report._asdict() for report in reports], indent=2))
+        return
+    for report in reports:
+        health = 'ERROR' if report.error else {True: 'PASSED', False: 'FAILED', None: 'UNKNOWN'}[report.passed]
+        counters = ', '.join(f"{name}={value}" for name, value in sorted(report.counters.items()))
+        print(f"{report.disk:<10} {health:<8} {report.model or '':<24} {report.serial or '':<20} "
+              f"{counters or report.error or ''}")
+
+
+if __name__ == '__main__':
+    main()
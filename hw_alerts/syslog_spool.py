@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+#
+# Date: 10/18/2026
+#
+# Description: RFC 6587 octet-counted framing ("<length> <message>") and the on-disk spool of undelivered
+#              alerts used by send_syslog.py. The spool is an append-only file of framed messages plus the
+#              offset up to which they have been sent; it is replayed in batches, oldest first, and a frame
+#              that does not parse is skipped on its own so the alerts spooled after it still go out.
+#
+# Usage: imported by send_syslog.py
+#
+import fcntl
+import os
+import re
+import logger_config
+
+# Undelivered messages, appended to while the collector is unreachable
+SPOOL_FILE = '/home/support/alerts/.syslog_spool'
+# Spool size limit; past it new messages are logged as lost instead of filling the disk
+MAX_SPOOL_BYTES = 64 * 1024 * 1024
+
+# Messages and bytes per write, live or replayed from the spool; no single frame may be larger
+BATCH_SIZE = 100
+BATCH_BYTES = 256 * 1024
+
+# Longest length prefix looked at, digits and the space after them
+MAX_PREFIX = 12
+# Where a frame can start again after a corrupt entry: a length not preceded by another digit
+_FRAME_START = re.compile(rb'(?<![0-9])[1-9][0-9]{0,%d} ' % (MAX_PREFIX - 2))
+
+
+def frame(message):
+    """Frame a message with RFC 6587 octet counting."""
+    data = message.encode('utf-8')
+    return str(len(data)).encode() + b' ' + data
+
+
+def frame_length(data, pos=0):
+    """
+    Read the length prefix of the frame starting at pos.
+
+    Returns:
+        int: Bytes the whole frame takes, prefix included; 0 if data ends inside the prefix, None if it is corrupt
+    """
+    space = data.find(b' ', pos, pos + MAX_PREFIX)
+    if space == -1:
+        return 0 if len(data) - pos < MAX_PREFIX and data[pos:].isdigit() else None
+    if not data[pos:space].isdigit():
+        return None
+    return space + 1 - pos + int(data[pos:space])
+
+
+def parse_frames(data, max_frames=BATCH_SIZE):
+    """
+    Split octet-counted data into frames.
+
+    Returns:
+        tuple: (list of up to max_frames complete frames including their length prefix, bytes consumed)
+    """
+    frames = []
+    pos = 0
+    while pos < len(data) and len(frames) < max_frames:
+        length = frame_length(data, pos)
+        if length is None:
+            # Skip only the bad entry, up to the next place a frame can start
+            match = _FRAME_START.search(data, pos + 1)
+            skip_to = match.start() if match else max(pos + 1, len(data) - MAX_PREFIX + 1)
+            logger_config.logger.error(f"Corrupt syslog spool entry, {skip_to - pos} bytes skipped")
+            pos = skip_to
+            continue
+        if not length or pos + length > len(data):
+            break
+        frames.append(data[pos:pos + length])
+        pos += length
+    return frames, pos
+
+
+class Spool:
+    """Append-only file of framed messages and the offset up to which they have been sent."""
+
+    def __init__(self, path=SPOOL_FILE, max_bytes=MAX_SPOOL_BYTES):
+        self.path = path
+        self.offset_path = f"{path}.offset"
+        self.max_bytes = max_bytes
+
+    def _offset(self):
+        try:
+            with open(self.offset_path, 'r') as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+
+    def pending(self):
+        try:
+            return os.path.getsize(self.path) > self._offset()
+        except OSError:
+            return False
+
+    def append(self, frames):
+        """Append frames; returns False if they could not be written."""
+        oversized = [data for data in frames if len(data) > BATCH_BYTES]
+        if oversized:
+            # A frame that doesn't fit a batch could never be replayed in one
+            logger_config.logger.error(f"{len(oversized)} alerts over {BATCH_BYTES} bytes not spooled")
+            frames = [data for data in frames if len(data) <= BATCH_BYTES]
+            if not frames:
+                return False
+        data = b''.join(frames)
+        try:
+            with open(self.path, 'ab') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                if f.tell() + len(data) > self.max_bytes:
+                    logger_config.logger.error(f"Syslog spool {self.path} is full, {len(frames)} alerts lost")
+                    return False
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+        except OSError as e:
+            logger_config.logger.error(f"Could not spool {len(frames)} alerts: {e}")
+            return False
+        return True
+
+    def replay(self, send):
+        """
+        Send the next batch of spooled frames.
+
+        The spool stays locked while the batch is sent, so two processes never replay the same messages.
+
+        Args:
+            send: Function taking a list of frames and returning True once they are written
+
+        Returns:
+            bool: True if the spool is now empty, False if frames are left or the send failed
+        """
+        try:
+            with open(self.path, 'r+b') as f:
+                fcntl.flock(f, fcntl.LOCK_EX)
+                offset = self._offset()
+                size = os.fstat(f.fileno()).st_size
+                f.seek(offset)
+                data = f.read(BATCH_BYTES)
+                frames, consumed = parse_frames(data)
+                if not frames and not consumed and data:
+                    length = frame_length(data)
+                    if length and offset + length <= size:
+                        # Larger than a batch, spooled before such frames were refused: sent on its own
+                        f.seek(offset)
+                        frames, consumed = [f.read(length)], length
+                    else:
+                        # Appends hold the lock, so this is a write torn at the end of the spool
+                        logger_config.logger.error(f"Torn syslog spool entry, {size - offset} bytes skipped")
+                        consumed = size - offset
+                if frames and not send(frames):
+                    return False
+                offset += consumed
+                if offset >= size:
+                    # Everything has been sent, start the spool over
+                    f.truncate(0)
+                    self._write_offset(0)
+                    return True
+                self._write_offset(offset)
+                return False
+        except FileNotFoundError:
+            return True
+        except OSError as e:
+            logger_config.logger.error(f"Could not replay syslog spool: {e}")
+            return False
+
+    def _write_offset(self, offset):
+        tmp_path = f"{self.offset_path}.tmp"
+        with open(tmp_path, 'w') as f:
+            f.write(str(offset))
+        os.replace(tmp_path, self.offset_path)
@@ -5,35 +5,48 @@
 
 import logger_config
 import send_syslog
+import alert_state
 import socket
-import subprocess
+
+# Seconds between runs when loaded by alert_daemon.py
+CHECK_INTERVAL = 600
 
 
 def get_linux_uptime():
-    output = subprocess.check_output(["sudo", "uptime", "-p"]).decode("utf-8").strip()
-    return output
+    # Seconds since boot, read directly instead of running uptime
+    with open("/proc/uptime", "r") as f:
+        return float(f.read().split()[0])
+
+def boot_id():
+    # Changes on every boot, so each reboot is its own alert
+    with open("/proc/sys/kernel/random/boot_id", "r") as f:
+        return f.read().strip()
 
 def main():
     uptime = get_linux_uptime()
 
-    # Extract the number of hours from the uptime string
-    uptime_hours = int(uptime.split()[3].split()[0]) 
+    # Whole hours the server has been up
+    uptime_hours = int(uptime // 3600)
     if uptime_hours < 1:
         logger_config.logger.error(f"Server has been online less than 1 hours")
-        from send_syslog import send_syslog_message, syslog_host, syslog_port
-        uptime_text = f'"Server Uptime: {(uptime_hours)} hours"'
-        cluster_name = f'"{(send_syslog.value)}"'
-        attributes = {
-            '"ClusterName"': cluster_name,
-            '"AlertCode"': '"CH00000003"',
-            '"AlertName"': '"ServerRebooted"',
-            '"AlertSeverity"': '"CRITICAL"',
-            '"AlertDescription"': uptime_text ,
-            '"AlertCause"': '"Server Rebooted less than 1 hours ago."'
-        }    
-        send_syslog_message(syslog_host, syslog_port, attributes)
+        # A reboot is reported once per boot
+        if alert_state.get_state().fire('CH00000003', boot_id(), repeat_interval=None):
+            from send_syslog import send_syslog_message, syslog_host, syslog_port
+            uptime_text = f'"Server Uptime: {(uptime_hours)} hours"'
+            cluster_name = f'"{(send_syslog.value)}"'
+            attributes = {
+                '"ClusterName"': cluster_name,
+                '"AlertCode"': '"CH00000003"',
+                '"AlertName"': '"ServerRebooted"',
+                '"AlertSeverity"': '"CRITICAL"',
+                '"AlertDescription"': uptime_text ,
+                '"AlertCause"': '"Server Rebooted less than 1 hours ago."'
+            }    
+            send_syslog_message(syslog_host, syslog_port, attributes)
     else:
         logger_config.logging.info(f"Server has been online for 1 hour or longer")
+        # Forget earlier boots; a reboot is an event, there is nothing to resolve
+        alert_state.get_state().reconcile('CH00000003', [])
         #print(send_syslog.value)
 
 if __name__ == "__main__":
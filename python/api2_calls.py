@@ -9,131 +9,279 @@
 #
 # Original Script: Sahil Dhull (sahil.dhull@cohesity.com)
 #
-# Usage: ./api-calls.py 
+# Usage: ./api-calls.py [--interval hour|4hours|24hours] [--incremental] [--workers N] [--cluster]
+#        ./api-calls.py --follow [--every 10] [--window 60]
 # Note: Run as sudo or cohesity user. 
 #
+import argparse
+import glob
+import json
+import os
+import socket
 import subprocess
 from datetime import datetime, timedelta
 
-# Set initial values
-overall_total_calls = 0
-total_refresh_calls = 0
-total_backup_calls = 0
-total_throttled_calls = 0
-
-# Get the current date and time
-current_date = datetime.now()
-
-# Change this option to process logs for the last hour or every 4 hours
-process_interval = "hour"  # Change to "4hours" to process every 4 hours
-
-if process_interval == "hour":
-    start_date = current_date - timedelta(hours=1)  # Start from one hour ago
-    interval = timedelta(hours=1)
-elif process_interval == "4hours":
-    start_date = current_date - timedelta(hours=4)  # Start from 4 hours ago
-    interval = timedelta(hours=4)
-else:
-    raise ValueError("Invalid process_interval option")
-
-hour = start_date.strftime("%H")
-mmdd = start_date.strftime("%m%d")
-
-# Construct the find command to locate relevant log files modified in the interval
-find_command_magneto = f"find /home/cohesity/logs/ -name 'magneto_exec.*INFO*' -newermt '{start_date.strftime('%Y-%m-%d %H:%M:%S')}'"
-find_command_bridge_proxy = f"find /home/cohesity/logs/ -name 'bridge_proxy_exec.*INFO*' -newermt '{start_date.strftime('%Y-%m-%d %H:%M:%S')}'"
-
-# Execute the find command to get the list of relevant log files
-magneto_log_files = subprocess.check_output(find_command_magneto, shell=True, universal_newlines=True).splitlines()
-bridge_proxy_log_files = subprocess.check_output(find_command_bridge_proxy, shell=True, universal_newlines=True).splitlines()
-
-log_output = []  # To store log lines
-
-for magneto_log_file in magneto_log_files:
-
-    # Construct the zgrep commands
-    magneto_single_calls_one_hour_cmd = (
-        f"zgrep 'I{mmdd} {hour}.*graph_base_op.cc.*Refreshing the token. Attempt number' {magneto_log_file} | wc -l"
-    )
-    magneto_batch_calls_one_hour_cmd = (
-        f"zgrep 'I{mmdd} {hour}.*generic_batch_request_op.cc.*Making a batch request of size' {magneto_log_file} | wc -l"
-    )
-    refresh_single_calls_one_hour_cmd = (
-        f"zgrep 'I{mmdd} {hour}.*graph_base_op.cc.*Task id -1: Refreshing the token. Attempt number' {magneto_log_file} | wc -l"
-    )
-    refresh_batch_calls_one_hour_cmd = (
-        f"zgrep 'I{mmdd} {hour}.*generic_batch_request_op.cc.*Task id -1: Making a batch request of size' {magneto_log_file} | wc -l"
-    )
-    magneto_throttled_calls_one_hour_cmd = (
-        f"zgrep 'I{mmdd} {hour}.*graph_base_op.cc.*Received error in MS Graph Response.*The request has been throttled' {magneto_log_file} | wc -l"
-    )
-
-    # Execute the zgrep commands and get the counts
-    magneto_single_calls_one_hour = int(subprocess.check_output(magneto_single_calls_one_hour_cmd, shell=True))
-    magneto_batch_calls_one_hour = int(subprocess.check_output(magneto_batch_calls_one_hour_cmd, shell=True))
-    refresh_single_calls_one_hour = int(subprocess.check_output(refresh_single_calls_one_hour_cmd, shell=True))
-    refresh_batch_calls_one_hour = int(subprocess.check_output(refresh_batch_calls_one_hour_cmd, shell=True))
-    magneto_throttled_calls_one_hour = int(subprocess.check_output(magneto_throttled_calls_one_hour_cmd, shell=True))
- 
-
-    # Perform calculations based on extracted data
-    total_magneto_calls_one_hour = (
-        magneto_single_calls_one_hour +
-        magneto_batch_calls_one_hour * 19
-    )
-    refresh_total_calls_one_hour = (
-        refresh_single_calls_one_hour +
-        refresh_batch_calls_one_hour * 19
-    )
-    total_refresh_calls += refresh_total_calls_one_hour
-    overall_total_calls += total_magneto_calls_one_hour
-    total_throttled_calls += magneto_throttled_calls_one_hour
-
-for bridge_proxy_log_file in bridge_proxy_log_files:
-
-    bridge_proxy_single_calls_one_hour_cmd = (
-        f"zgrep 'I{mmdd} {hour}.*graph_base_op.cc.*Refreshing the token. Attempt number' {bridge_proxy_log_file} | wc -l"
-    )
-    bridge_proxy_batch_calls_one_hour_cmd = (
-        f"zgrep 'I{mmdd} {hour}.*generic_batch_request_op.cc.*Making a batch request of size' {bridge_proxy_log_file} | wc -l"
-    )
-    bridge_proxy_throttled_calls_one_hour_cmd = (
-        f"zgrep 'I{mmdd} {hour}.*graph_base_op.cc.*Received error in MS Graph Response.*The request has been throttled' {bridge_proxy_log_file} | wc -l"
-    )
-
-    # Execute the zgrep commands and get the counts
-    bridge_proxy_single_calls_one_hour = int(subprocess.check_output(bridge_proxy_single_calls_one_hour_cmd, shell=True))
-    bridge_proxy_batch_calls_one_hour = int(subprocess.check_output(bridge_proxy_batch_calls_one_hour_cmd, shell=True))
-    bridge_proxy_throttled_calls_one_hour = int(subprocess.check_output(bridge_proxy_throttled_calls_one_hour_cmd, shell=True))
-
-    # Perform calculations based on extracted data
-    total_bridge_proxy_calls_one_hour = (
-        bridge_proxy_single_calls_one_hour +
-        bridge_proxy_batch_calls_one_hour * 19
-    )
-    overall_total_calls += total_bridge_proxy_calls_one_hour
-    total_throttled_calls +=  bridge_proxy_throttled_calls_one_hour
-
-total_backup_calls = overall_total_calls - total_refresh_calls
-
-# Print the final metrics to be written to log file
-final_metrics = [
-    f"Timestamp:            {current_date.strftime('%m-%d-%Y %H:%M:%S')}",
-    f"Total calls:          {overall_total_calls:20}",
-    f"Total refresh calls:  {total_refresh_calls:20}",
-    f"Total backup calls:   {total_backup_calls:20}",
-    f"Total throttled calls: {total_throttled_calls:19}"
-]
-
-# Combine log lines and final metrics
-log_output.extend(final_metrics)
-#log_output.append(' '.join(final_metrics))
-
-# Write the log to a file
-log_file_path = "/home/support/utils/apicalls.out"
-with open(log_file_path, "a") as log_file:
-    for line in log_output:
-        log_file.write(line + "\n")
-    log_file.write("\n")
-
-# Print the final metrics to the console
+from glog_scanner import ScanResult, TopK, TOP_K, scan_file, scan_files_parallel, hour_prefixes, IO_CLASSES
+from glog_checkpoint import CheckpointStore, DEFAULT_CHECKPOINT_FILE
+from glog_index import scan_window, window_keys
+import apicalls_store
+import glog_follow
+from cluster_exec import get_host_ips, run_on_nodes
+
+LOGS_DIRECTORY = "/home/cohesity/logs/"
+LOG_FILE_PATH = "/home/support/utils/apicalls.out"
+
+# Hours of logs processed for each --interval option
+INTERVALS = {'hour': 1, '4hours': 4, '24hours': 24}
+
+METRIC_NAMES = ('total_calls', 'refresh_calls', 'backup_calls', 'throttled_calls')
+
+
+def find_log_files(name_pattern, start_date):
+    # Construct the find command to locate relevant log files modified in the interval
+    find_command = f"find {LOGS_DIRECTORY} -name '{name_pattern}' -newermt '{start_date.strftime('%Y-%m-%d %H:%M:%S')}'"
+    return subprocess.check_output(find_command, shell=True, universal_newlines=True).splitlines()
+
+
+def list_log_files(name_pattern):
+    # Every log file on disk, skipping the glog symlinks to the active file and
+    # plain files that are in the middle of being gzipped
+    paths = [p for p in glob.glob(os.path.join(LOGS_DIRECTORY, name_pattern)) if not os.path.islink(p)]
+    return [p for p in paths if not (p.endswith('.gz') and p[:-3] in paths)]
+
+
+def service_name(log_file):
+    # magneto_exec.<host>... -> magneto, bridge_proxy_exec.<host>... -> bridge_proxy
+    return os.path.basename(log_file).split('_exec')[0]
+
+
+def scan_files(log_files, prefixes, checkpoints=None, workers=1, nice=0, io_class=None, window=None):
+    # Scan each file once, only reading bytes appended since the last run when checkpoints are used
+    # and only the slice holding the time window when a (start, end) window is given
+    jobs = []
+    scan = scan_file
+    for log_file in log_files:
+        if window is not None:
+            scan = scan_window
+            jobs.append((log_file, prefixes) + window)
+            continue
+        offset = 0
+        if checkpoints is not None:
+            offset = checkpoints.start_offset(log_file)
+            if offset is None:
+                continue
+        jobs.append((log_file, prefixes, offset))
+
+    if workers > 1:
+        results = scan_files_parallel(jobs, workers, nice, io_class, scan)
+    else:
+        results = [scan(*job) for job in jobs]
+
+    if checkpoints is not None:
+        for job, result in zip(jobs, results):
+            checkpoints.update(job[0], result.offset)
+    return [(job[0], result) for job, result in zip(jobs, results)]
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Count MS Graph API calls made by Magneto and Bridge_proxy')
+    parser.add_argument('--interval', choices=list(INTERVALS), default='hour',
+                        help='Process logs for the last hour, 4 hours or 24 hours')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only read log lines written since the previous incremental run')
+    parser.add_argument('--checkpoint-file', default=DEFAULT_CHECKPOINT_FILE,
+                        help='Where incremental read offsets are kept')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Scan log files on this many processes (0 uses every core)')
+    parser.add_argument('--nice', type=int, default=10,
+                        help='Niceness increment for the scanner processes in parallel mode')
+    parser.add_argument('--ionice', choices=sorted(IO_CLASSES), default='idle',
+                        help='IO scheduling class for the scanner processes in parallel mode')
+    parser.add_argument('--no-index', action='store_true',
+                        help='Scan whole log files instead of seeking to the interval with the timestamp index')
+    parser.add_argument('--db', default=apicalls_store.DEFAULT_DB_FILE,
+                        help='Per minute time series database')
+    parser.add_argument('--no-db', action='store_true',
+                        help='Do not write the per minute time series')
+    parser.add_argument('--json', action='store_true',
+                        help='Print this node\'s metrics as JSON instead of writing them to the log file')
+    parser.add_argument('--cluster', action='store_true',
+                        help='Run on every node in the cluster at once and report the combined metrics')
+    parser.add_argument('--node-timeout', type=int, default=600,
+                        help='Seconds to wait for each node in cluster mode')
+    parser.add_argument('--top', type=int, default=5,
+                        help='How many tasks, tenants and protection groups to list per breakdown (0 for none)')
+    parser.add_argument('--follow', action='store_true',
+                        help='Follow the live logs and print the call and throttle rate until interrupted')
+    parser.add_argument('--every', type=int, default=10,
+                        help='Seconds between sample lines in follow mode')
+    parser.add_argument('--window', type=int, default=60,
+                        help='Sliding window length in seconds in follow mode')
+    return parser.parse_args()
+
+
+def count_local(args, current_date):
+    # Count the API calls logged on this node, returns the metrics dictionary
+    workers = args.workers or os.cpu_count()
+    interval = timedelta(hours=INTERVALS[args.interval])
+    start_date = current_date - interval
+
+    if args.incremental:
+        # Everything appended since the last run is counted, no matter which hour it was logged in
+        checkpoints = CheckpointStore(args.checkpoint_file)
+        prefixes = None
+        window = None
+        magneto_log_files = list_log_files('magneto_exec.*INFO*')
+        bridge_proxy_log_files = list_log_files('bridge_proxy_exec.*INFO*')
+    else:
+        checkpoints = None
+        prefixes = hour_prefixes(start_date, INTERVALS[args.interval])
+        window = None if args.no_index else window_keys(start_date, INTERVALS[args.interval])
+        magneto_log_files = find_log_files('magneto_exec.*INFO*', start_date)
+        bridge_proxy_log_files = find_log_files('bridge_proxy_exec.*INFO*', start_date)
+
+    # Set initial values
+    overall_total_calls = 0
+    total_refresh_calls = 0
+    total_throttled_calls = 0
+
+    # Each file is read once and all API call signatures are counted in the same pass
+    results = scan_files(magneto_log_files + bridge_proxy_log_files, prefixes, checkpoints,
+                         workers, args.nice, args.ionice, window)
+
+    service_results = {}
+    total = ScanResult()
+    for log_file, result in results:
+        # Perform calculations based on extracted data
+        service = service_name(log_file)
+        if service == 'magneto':
+            total_refresh_calls += result.refresh_calls()
+        overall_total_calls += result.total_calls()
+        total_throttled_calls += result.counts['throttled']
+        service_results.setdefault(service, ScanResult()).merge(result)
+        total.merge(result)
+
+    # Keep the per minute buckets so bursts inside the interval can be queried later
+    if not args.no_db:
+        conn = apicalls_store.connect(args.db)
+        for service, result in service_results.items():
+            apicalls_store.record(conn, service, result.minutes, accumulate=args.incremental)
+        conn.close()
+
+    if checkpoints is not None:
+        checkpoints.save(current_date.timestamp())
+
+    return {
+        'total_calls': overall_total_calls,
+        'refresh_calls': total_refresh_calls,
+        'backup_calls': overall_total_calls - total_refresh_calls,
+        'throttled_calls': total_throttled_calls,
+        # Heaviest tasks, tenants and protection groups, as {'task/calls': [[key, count], ...]}
+        'top': {f"{dimension}/{metric}": top.top(TOP_K) for (dimension, metric), top in total.top.items()},
+    }
+
+
+def count_cluster(args):
+    # Run this script on every node at the same time, returns {ip: metrics or error message}
+    remote_args = ['--json', '--interval', args.interval, '--workers', str(args.workers)]
+    if args.incremental:
+        remote_args.append('--incremental')
+    if args.no_index:
+        remote_args.append('--no-index')
+    if args.no_db:
+        remote_args.append('--no-db')
+    command = f"python3 {os.path.abspath(__file__)} {' '.join(remote_args)}"
+
+    node_metrics = {}
+    for ip, (returncode, output, error) in run_on_nodes(get_host_ips(), command, args.node_timeout).items():
+        try:
+            if returncode != 0:
+                raise ValueError(error or f"Exited with status {returncode}")
+            node_metrics[ip] = json.loads(output.strip().splitlines()[-1])
+        except (ValueError, IndexError) as e:
+            node_metrics[ip] = f"Error: {e}"
+    return node_metrics
+
+
+def format_metrics(current_date, metrics):
+    # Print the final metrics to be written to log file
+    return [
+        f"Timestamp:            {current_date.strftime('%m-%d-%Y %H:%M:%S')}",
+        f"Total calls:          {metrics['total_calls']:20}",
+        f"Total refresh calls:  {metrics['refresh_calls']:20}",
+        f"Total backup calls:   {metrics['backup_calls']:20}",
+        f"Total throttled calls: {metrics['throttled_calls']:19}"
+    ]
+
+
+def format_breakdown(top_lists, count, metrics):
+    # Top keys for each breakdown that has any, e.g. which task drives most of the throttling.
+    # Shares are of all calls counted, not just of the keys listed
+    totals = {'calls': metrics['total_calls'], 'throttled': metrics['throttled_calls']}
+    lines = []
+    for name, entries in top_lists.items():
+        if not entries or not count:
+            continue
+        dimension, metric = name.split('/')
+        lines.append(f"Top {dimension}s by {'API' if metric == 'calls' else metric} calls:")
+        total = totals[metric] or sum(n for _, n in entries)
+        for key, n in entries[:count]:
+            lines.append(f"  {key:<40} {n:>12} {n * 100.0 / total:>6.1f}%")
+    return lines
+
+
+def format_cluster_metrics(current_date, node_metrics, top_count):
+    # Per node breakdown followed by the cluster totals
+    cluster_metrics = dict.fromkeys(METRIC_NAMES, 0)
+    cluster_top = {}
+    lines = [f"{'Node':<16} {'Total calls':>14} {'Refresh calls':>14} {'Backup calls':>14} {'Throttled calls':>16}"]
+    for ip, metrics in node_metrics.items():
+        if isinstance(metrics, str):
+            lines.append(f"{ip:<16} {metrics}")
+            continue
+        lines.append(f"{ip:<16} {metrics['total_calls']:>14} {metrics['refresh_calls']:>14} "
+                     f"{metrics['backup_calls']:>14} {metrics['throttled_calls']:>16}")
+        for name in METRIC_NAMES:
+            cluster_metrics[name] += metrics[name]
+        for name, entries in metrics.get('top', {}).items():
+            top = cluster_top.setdefault(name, TopK())
+            for key, n in entries:
+                top.add(key, n)
+    lines.append("")
+    breakdown = format_breakdown({name: top.top(TOP_K) for name, top in cluster_top.items()}, top_count,
+                                 cluster_metrics)
+    return format_metrics(current_date, cluster_metrics) + breakdown + [""] + lines
+
+
+def main():
+    args = parse_args()
+
+    if args.follow:
+        try:
+            glog_follow.follow(args.every, args.window, LOGS_DIRECTORY)
+        except KeyboardInterrupt:
+            print('\nStopped following')
+        return
+
+    # Get the current date and time
+    current_date = datetime.now()
+
+    if args.cluster:
+        log_output = format_cluster_metrics(current_date, count_cluster(args), args.top)
+        print("\n".join(log_output))
+    else:
+        metrics = count_local(args, current_date)
+        if args.json:
+            print(json.dumps(dict(metrics, node=socket.gethostname())))
+            return
+        log_output = format_metrics(current_date, metrics) + format_breakdown(metrics['top'], args.top, metrics)
+
+    # Write the log to a file
+    with open(LOG_FILE_PATH, "a") as log_file:
+        for line in log_output:
+            log_file.write(line + "\n")
+        log_file.write("\n")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+#
+# Date: 10/18/2026
+#
+# Description: Per minute MS Graph API call time series kept in a small SQLite database. api2_calls.py
+#              writes one row per minute and service, and this script answers range queries such as
+#              "throttled calls per minute over the last 7 days" straight from the database.
+#
+# Usage: ./apicalls_store.py [--days 7] [--column throttled] [--service magneto] [--per hour]
+#
+import argparse
+import sqlite3
+from datetime import datetime, timedelta
+
+from glog_scanner import BATCH_SIZE
+
+DEFAULT_DB_FILE = "/home/support/utils/apicalls.db"
+
+# Raw counters stored for every minute, matching the glog_scanner counter names
+COLUMNS = ('single', 'batch', 'refresh_single', 'refresh_batch', 'throttled')
+
+# Values that can be queried, as SQL expressions over the raw counters
+QUERY_COLUMNS = {
+    'calls': f"single + batch * {BATCH_SIZE}",
+    'refresh': f"refresh_single + refresh_batch * {BATCH_SIZE}",
+    'throttled': "throttled",
+    'single': "single",
+    'batch': "batch",
+}
+
+BUCKETS = {'minute': 60, 'hour': 3600, 'day': 86400}
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS api_calls (
+    minute INTEGER NOT NULL,
+    service TEXT NOT NULL,
+    {', '.join(f'{column} INTEGER NOT NULL DEFAULT 0' for column in COLUMNS)},
+    PRIMARY KEY (minute, service)
+) WITHOUT ROWID
+"""
+
+
+def connect(db_path=DEFAULT_DB_FILE):
+    """Open the time series database, creating the table if needed."""
+    conn = sqlite3.connect(db_path)
+    conn.execute(SCHEMA)
+    return conn
+
+
+def minute_epoch(minute_key, now=None):
+    """
+    Convert a glog minute key (b'MMDD HH:MM') to a unix timestamp.
+
+    glog lines carry no year, so the current year is assumed unless that would put the
+    minute more than a day in the future (December logs read in January).
+    """
+    now = now or datetime.now()
+    ts = datetime.strptime(f"{now.year}{minute_key.decode()}", '%Y%m%d %H:%M')
+    if ts > now + timedelta(days=1):
+        ts = ts.replace(year=now.year - 1)
+    return int(ts.timestamp())
+
+
+def record(conn, service, minutes, accumulate=True):
+    """
+    Write per minute counters for a service.
+
+    Args:
+        conn: Database connection from connect()
+        service: Service the counters came from (magneto or bridge_proxy)
+        minutes: Counter keyed by (minute key, counter name) from a ScanResult
+        accumulate: Add to existing rows (incremental runs) instead of replacing them (full window runs)
+    """
+    now = datetime.now()
+    rows = {}
+    for (minute_key, name), count in minutes.items():
+        row = rows.setdefault(minute_epoch(minute_key, now), dict.fromkeys(COLUMNS, 0))
+        row[name] += count
+
+    assignments = ', '.join(f"{column} = {column} + ?" for column in COLUMNS)
+    placeholders = ', '.join('?' for _ in COLUMNS)
+    with conn:
+        for minute, row in rows.items():
+            values = [row[column] for column in COLUMNS]
+            if accumulate:
+                conn.execute("INSERT OR IGNORE INTO api_calls (minute, service) VALUES (?, ?)", (minute, service))
+                conn.execute(f"UPDATE api_calls SET {assignments} WHERE minute = ? AND service = ?",
+                             values + [minute, service])
+            else:
+                conn.execute(f"INSERT OR REPLACE INTO api_calls (minute, service, {', '.join(COLUMNS)}) "
+                             f"VALUES (?, ?, {placeholders})", [minute, service] + values)
+
+
+def query_range(conn, start, end, column='calls', service=None, bucket='minute'):
+    """
+    Sum a value over fixed size time buckets.
+
+    Args:
+        conn: Database connection from connect()
+        start: First unix timestamp to include
+        end: Unix timestamp to stop before
+        column: One of QUERY_COLUMNS
+        service: Limit to one service (None sums every service)
+        bucket: One of BUCKETS
+
+    Returns:
+        list: (bucket start timestamp, value) tuples in time order
+    """
+    size = BUCKETS[bucket]
+    sql = (f"SELECT (minute / {size}) * {size} AS bucket, SUM({QUERY_COLUMNS[column]}) FROM api_calls "
+           "WHERE minute >= ? AND minute < ?")
+    params = [start, end]
+    if service:
+        sql += " AND service = ?"
+        params.append(service)
+    sql += " GROUP BY bucket ORDER BY bucket"
+    return conn.execute(sql, params).fetchall()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Query the per minute MS Graph API call time series')
+    parser.add_argument('--db', default=DEFAULT_DB_FILE, help='Time series database')
+    parser.add_argument('--days', type=float, default=1, help='How many days back to query')
+    parser.add_argument('--column', choices=list(QUERY_COLUMNS), default='calls', help='Value to report')
+    parser.add_argument('--service', choices=['magneto', 'bridge_proxy'], help='Only report one service')
+    parser.add_argument('--per', choices=list(BUCKETS), default='minute', help='Bucket size')
+    args = parser.parse_args()
+
+    end = datetime.now()
+    start = end - timedelta(days=args.days)
+    conn = connect(args.db)
+    rows = query_range(conn, int(start.timestamp()), int(end.timestamp()), args.column, args.service, args.per)
+
+    print(f"{'Time':<20} {args.column.capitalize():>12}")
+    print("-" * 33)
+    for bucket, value in rows:
+        print(f"{datetime.fromtimestamp(bucket).strftime('%Y-%m-%d %H:%M'):<20} {value:>12}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+#
+# Date: 10/18/2026
+#
+# Description: Run a command on every node of the cluster at the same time. Nodes are discovered with
+#              hostips and each node gets its own timeout, so one slow or unreachable node only costs
+#              its own timeout instead of holding up the rest of the cluster.
+#
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+
+# Upper bound on concurrent ssh sessions
+MAX_WORKERS = 32
+
+SSH_OPTIONS = ['-q', '-o', 'StrictHostKeyChecking=no', '-o', 'BatchMode=yes', '-o', 'ConnectTimeout=10']
+
+# Reuse one ssh connection per node for a minute, so repeated runs skip the key exchange and login
+MULTIPLEX_OPTIONS = SSH_OPTIONS + ['-o', 'ControlMaster=auto', '-o', 'ControlPath=/tmp/.ssh-cluster-%r@%h:%p',
+                                   '-o', 'ControlPersist=60']
+
+
+def get_host_ips():
+    """Return the IPs of every node in the cluster."""
+    return subprocess.check_output(['hostips']).decode().strip().split()
+
+
+def run_on_node(ip, command, timeout, ssh_options=SSH_OPTIONS):
+    """
+    Run a command on one node over ssh.
+
+    Returns:
+        tuple: (return code or None on failure, stdout, error message)
+    """
+    try:
+        result = subprocess.run(['ssh'] + ssh_options + [ip, command],
+                                stdout=subprocess.PIPE, stderr=subprocess.PIPE, timeout=timeout)
+        return result.returncode, result.stdout.decode('utf-8', 'replace'), \
+            result.stderr.decode('utf-8', 'replace').strip()
+    except subprocess.TimeoutExpired:
+        return None, '', f"Timed out after {timeout} seconds"
+    except OSError as e:
+        return None, '', str(e)
+
+
+def run_on_nodes(ips, command, timeout, max_workers=MAX_WORKERS, ssh_options=SSH_OPTIONS):
+    """
+    Run a command on many nodes concurrently.
+
+    Args:
+        ips: Node IPs to run on
+        command: Shell command to run on each node
+        timeout: Seconds to wait for each node
+        max_workers: Maximum number of concurrent ssh sessions
+        ssh_options: Options passed to ssh
+
+    Returns:
+        dict: IP -> (return code or None on failure, stdout, error message), in the order of ips
+    """
+    if not ips:
+        return {}
+    with ThreadPoolExecutor(max_workers=min(max_workers, len(ips))) as pool:
+        futures = {ip: pool.submit(run_on_node, ip, command, timeout, ssh_options) for ip in ips}
+        return {ip: future.result() for ip, future in futures.items()}
@@ -19,8 +19,9 @@ for ip in ips:
     prod_helper_serial = f'ssh -o StrictHostKeyChecking=no -q {ip} "dmesg | grep -i \'cpu clock throttled\' | wc -l"'
     node_serial = subprocess.check_output(dmesg_command, shell=True).decode().strip()
 
-    # Run the "product_helper" command on the current IP to get the serial number
-    product_helper_command = f'ssh {ip} "product_helper -op=GET_COHESITY_NODE_SERIAL"'
+    # Get the serial number from the node's facts cache, falling back to product_helper where it isn't installed
+    product_helper_command = (f'ssh {ip} "python3 /home/support/utils/node_facts.py node_serial 2>/dev/null '
+                              f'|| product_helper -op=GET_COHESITY_NODE_SERIAL"')
     serial_number = subprocess.check_output(product_helper_command, shell=True).decode().strip()
 
     print(f'{ip}    {serial_number}           {node_serial}         {thrott_count}')
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+#
+# Date: 10/18/2026
+#
+# Description: Latest FATAL entries of a service. Finds every rotated <service>.*FATAL* file, orders them by
+#              the timestamp glog puts in the file name and reads entries backward from the end of the newest
+#              file in fixed size blocks until enough have been found, so the cost depends on how many entries
+#              are wanted and not on how large or how many the files are. An entry is a FATAL line together
+#              with the stack trace lines that follow it. Entries are returned oldest first.
+#
+# Usage: ./fatal_logs.py [-n 10] <service> [service ...]
+#
+import argparse
+import glob
+import os
+import re
+from collections import deque, namedtuple
+from datetime import datetime
+
+from glog_index import line_key
+from glog_scanner import open_log, is_gzip
+
+LOGS_DIRECTORY = "/home/cohesity/logs/"
+
+# Entries shown per service by default
+ENTRY_COUNT = 10
+
+# Bytes read per backward seek
+BLOCK_SIZE = 64 * 1024
+
+# Continuation lines kept per entry, stack traces can run to hundreds of lines
+MAX_ENTRY_LINES = 40
+
+# glog names files <service>.<host>.<user>.log.FATAL.<YYYYMMDD-HHMMSS>.<pid>
+_FILE_TIMESTAMP = re.compile(r'\.(\d{8}-\d{6})\.\d+(?:\.gz)?$')
+
+# Lines glog writes at the top of every file
+_HEADER_PREFIXES = (b'Log file created at:', b'Running on machine:', b'Running duration', b'Log line format:')
+
+FatalEntry = namedtuple('FatalEntry', ['time', 'path', 'lines'])
+FatalEntry.__doc__ = """One FATAL entry: when it was logged, the file it came from and its lines (decoded)."""
+
+
+def _file_time(path):
+    match = _FILE_TIMESTAMP.search(os.path.basename(path))
+    if match:
+        return datetime.strptime(match.group(1), '%Y%m%d-%H%M%S')
+    return datetime.fromtimestamp(os.path.getmtime(path))
+
+
+def fatal_files(service, logs_directory=LOGS_DIRECTORY):
+    """
+    Find the FATAL files of a service.
+
+    Returns:
+        list: (file time, path) tuples, newest first; glog's symlink to the latest file is skipped
+    """
+    files = {}
+    for path in glob.glob(os.path.join(logs_directory, f"{service}.*FATAL*")):
+        real_path = os.path.realpath(path)
+        if os.path.isfile(real_path) and real_path not in files:
+            files[real_path] = _file_time(real_path)
+    return sorted(((file_time, path) for path, file_time in files.items()), reverse=True)
+
+
+def _reverse_lines(f, size):
+    # Lines of a seekable file from the last to the first, reading BLOCK_SIZE bytes at a time
+    pos = size
+    partial = b''
+    while pos > 0:
+        length = min(BLOCK_SIZE, pos)
+        pos -= length
+        f.seek(pos)
+        lines = (f.read(length) + partial).split(b'\n')
+        partial = lines[0]
+        yield from reversed(lines[1:])
+    yield partial
+
+
+def _forward_lines_tail(f, keep):
+    # gzip files can't be read backward, stream them and keep only the tail
+    return reversed(deque((line.rstrip(b'\n') for line in f), maxlen=keep))
+
+
+def _entry_time(key, file_time):
+    # glog timestamps have no year, take it from the file and roll over if the entry is in the next year
+    try:
+        ts = datetime.strptime(f"{file_time.year}{key}", '%Y%m%d %H:%M:%S.%f')
+    except ValueError:
+        return file_time
+    if ts < file_time.replace(microsecond=0) and (file_time - ts).days > 180:
+        ts = ts.replace(year=file_time.year + 1)
+    return ts
+
+
+def read_entries(path, file_time, count):
+    """
+    Read the last entries of one FATAL file.
+
+    Args:
+        path: Plain or gzipped glog file
+        file_time: Time the file was created, used to give entries a year
+        count: Maximum number of entries
+
+    Returns:
+        list: FatalEntry tuples, newest first
+    """
+    entries = []
+    continuation = []
+    with open_log(path) as f:
+        if is_gzip(path):
+            lines = _forward_lines_tail(f, count * (MAX_ENTRY_LINES + 1) + len(_HEADER_PREFIXES))
+        else:
+            lines = _reverse_lines(f, os.fstat(f.fileno()).st_size)
+        for line in lines:
+            if not line or line.startswith(_HEADER_PREFIXES):
+                continue
+            key = line_key(line)
+            if key is None:
+                continuation.append(line)
+                continue
+            text = [line] + continuation[::-1][:MAX_ENTRY_LINES]
+            entries.append(FatalEntry(_entry_time(key, file_time), path,
+                                      [part.decode('utf-8', 'replace') for part in text]))
+            continuation = []
+            if len(entries) == count:
+                break
+    return entries
+
+
+def latest_fatals(service, count=ENTRY_COUNT, logs_directory=LOGS_DIRECTORY):
+    """
+    Return the newest FATAL entries of a service across all its FATAL files.
+
+    Args:
+        service: Service binary name such as 'magneto_exec'
+        count: Number of entries wanted
+        logs_directory: Directory holding the glog files
+
+    Returns:
+        list: Up to count FatalEntry tuples, oldest first
+    """
+    entries = []
+    for file_time, path in fatal_files(service, logs_directory):
+        # Files are newest first, stop as soon as enough entries have been found
+        try:
+            entries.extend(read_entries(path, file_time, count - len(entries)))
+        except OSError:
+            continue
+        if len(entries) >= count:
+            break
+    return sorted(entries, key=lambda entry: entry.time)
+
+
+def format_entries(entries):
+    """Return the text lines of FATAL entries, one blank line between entries."""
+    lines = []
+    for entry in entries:
+        if lines:
+            lines.append('')
+        lines.extend(entry.lines)
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Print the latest FATAL log entries of services')
+    parser.add_argument('services', nargs='+', help='Service binary names such as magneto_exec')
+    parser.add_argument('-n', '--count', type=int, default=ENTRY_COUNT, help='Entries per service')
+    parser.add_argument('--logs-directory', default=LOGS_DIRECTORY, help='Directory holding the glog files')
+    args = parser.parse_args()
+
+    for service in args.services:
+        print(f"========= {service} FATAL Log =========")
+        print('\n'.join(format_entries(latest_fatals(service, args.count, args.logs_directory))))
+        print("")
+
+
+if __name__ == '__main__':
+    main()
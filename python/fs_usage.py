@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+#
+# Date: 10/18/2026
+#
+# Description: Filesystem usage for the health checks without running df. The mount table is read once
+#              from /proc/self/mountinfo and every mount is checked with os.statvfs at the same time, each
+#              on its own thread with a timeout, so a hung NFS mount is reported as hung instead of
+#              stalling the whole report. Used and free bytes and inode usage come straight from statvfs.
+#
+# Usage: ./fs_usage.py [--timeout 5] [--threshold 60] [--cohesity-threshold 80] [--inodes]
+#
+import argparse
+import os
+import re
+import threading
+import time
+from collections import namedtuple
+
+MOUNTINFO = "/proc/self/mountinfo"
+
+# Seconds to wait for statvfs on one mount
+STATVFS_TIMEOUT = 5
+
+# Mounts left out of the OS partition list, as in the df based checks
+EXCLUDED_PARTITIONS = re.compile(r'tmpfs|devtmpfs|/boot|/home_cohesity_data|/home/cohesity')
+EXCLUDED_FSTYPES = ('tmpfs', 'devtmpfs')
+COHESITY_PREFIX = '/home_cohesity'
+
+Mount = namedtuple('Mount', ['mountpoint', 'source', 'fstype'])
+
+MountUsage = namedtuple('MountUsage', ['mountpoint', 'source', 'fstype', 'size', 'used', 'avail', 'percent',
+                                       'inodes', 'inodes_used', 'inode_percent', 'error'])
+MountUsage.__doc__ = """Usage of one mount in bytes and inodes. error is None, 'hung' or the statvfs error."""
+
+
+def _unescape(field):
+    # mountinfo escapes space, tab, newline and backslash as \ooo
+    return re.sub(r'\\([0-7]{3})', lambda match: chr(int(match.group(1), 8)), field)
+
+
+def read_mounts(path=MOUNTINFO):
+    """
+    Read the mount table.
+
+    Returns:
+        list: Mount tuples in mount order, only the last mount on each mount point is kept
+    """
+    mounts = {}
+    with open(path, 'r') as f:
+        for line in f:
+            fields = line.split()
+            # Optional fields end with '-', followed by fstype, source and super block options
+            separator = fields.index('-', 6)
+            mountpoint = _unescape(fields[4])
+            mounts.pop(mountpoint, None)
+            mounts[mountpoint] = Mount(mountpoint, _unescape(fields[separator + 2]), fields[separator + 1])
+    return list(mounts.values())
+
+
+def _percent(used, avail):
+    # Same rounding as df: used / (used + available), rounded up
+    total = used + avail
+    return -(-used * 100 // total) if total else 0
+
+
+def statvfs_usage(mount):
+    """Return the MountUsage of one mount, calling statvfs directly."""
+    try:
+        st = os.statvfs(mount.mountpoint)
+    except OSError as e:
+        return MountUsage(*mount, 0, 0, 0, 0, 0, 0, 0, e.strerror or str(e))
+    size = st.f_blocks * st.f_frsize
+    used = (st.f_blocks - st.f_bfree) * st.f_frsize
+    avail = st.f_bavail * st.f_frsize
+    inodes_used = st.f_files - st.f_ffree
+    return MountUsage(*mount, size, used, avail, _percent(used, avail), st.f_files, inodes_used,
+                      _percent(inodes_used, st.f_favail), None)
+
+
+def filesystem_usage(mounts=None, timeout=STATVFS_TIMEOUT, include_pseudo=False):
+    """
+    Check every mount concurrently.
+
+    Each mount gets a daemon thread, so a mount that never answers is reported as hung after timeout
+    seconds and its thread can't keep the process from exiting.
+
+    Args:
+        mounts: Mount tuples to check (default: every mount in /proc/self/mountinfo)
+        timeout: Seconds to wait for each mount
+        include_pseudo: Keep filesystems with no blocks (proc, sysfs, cgroup...), which df leaves out
+
+    Returns:
+        list: MountUsage tuples in mount order
+    """
+    mounts = read_mounts() if mounts is None else mounts
+    results = {}
+
+    def check(mount):
+        results[mount.mountpoint] = statvfs_usage(mount)
+
+    threads = []
+    for mount in mounts:
+        thread = threading.Thread(target=check, args=(mount,), daemon=True)
+        thread.start()
+        threads.append(thread)
+    # All the threads started together, so one deadline gives every mount the same timeout
+    deadline = time.monotonic() + timeout
+    for thread in threads:
+        thread.join(max(deadline - time.monotonic(), 0))
+
+    usages = []
+    for mount in mounts:
+        usage = results.get(mount.mountpoint)
+        if usage is None:
+            usage = MountUsage(*mount, 0, 0, 0, 0, 0, 0, 0, 'hung')
+        elif not include_pseudo and usage.error is None and usage.size == 0:
+            continue
+        usages.append(usage)
+    return usages
+
+
+def split_partitions(usages):
+    """
+    Split mounts into OS partitions and Cohesity data partitions.
+
+    Returns:
+        tuple: (normal_partitions, cohesity_partitions) as lists of MountUsage
+    """
+    normal = [usage for usage in usages if usage.fstype not in EXCLUDED_FSTYPES
+              and not EXCLUDED_PARTITIONS.match(usage.mountpoint)]
+    cohesity = [usage for usage in usages if usage.mountpoint.startswith(COHESITY_PREFIX)]
+    return normal, cohesity
+
+
+def format_size(size):
+    """Format a byte count like df -h."""
+    for unit in ('B', 'K', 'M', 'G', 'T'):
+        if size < 1024:
+            return f"{size:.0f}{unit}" if unit == 'B' or size >= 10 else f"{size:.1f}{unit}"
+        size /= 1024
+    return f"{size:.1f}P"
+
+
+def print_partitions(usages, threshold, inodes=False):
+    # Same layout as fs_check.sh, red above the threshold
+    for usage in usages:
+        if usage.error:
+            status = 'Hung' if usage.error == 'hung' else f"Error: {usage.error}"
+            print(f"{usage.mountpoint:<85} | \033[031m{status}\033[0m")
+            continue
+        color = '\033[031m' if usage.percent > threshold else '\033[032m'
+        line = f"{usage.mountpoint:<85} | {color}{usage.percent:>3}%\033[0m"
+        if inodes:
+            color = '\033[031m' if usage.inode_percent > threshold else '\033[032m'
+            line += f" {format_size(usage.used):>6}/{format_size(usage.size):<6} inodes {color}{usage.inode_percent:>3}%\033[0m"
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Filesystem usage of every mount, without df')
+    parser.add_argument('--timeout', type=float, default=STATVFS_TIMEOUT, help='Seconds to wait for each mount')
+    parser.add_argument('--threshold', type=int, default=60, help='Warning percentage for OS partitions')
+    parser.add_argument('--cohesity-threshold', type=int, default=80,
+                        help='Warning percentage for Cohesity partitions')
+    parser.add_argument('--inodes', action='store_true', help='Also show sizes and inode usage')
+    args = parser.parse_args()
+
+    normal, cohesity = split_partitions(filesystem_usage(timeout=args.timeout))
+    print("")
+    print(f"{'Partition':<15}  {'Used Percentage':>85}")
+    print("-" * 108)
+    print_partitions(normal, args.threshold, args.inodes)
+    print("")
+    print("-" * 108)
+    print("")
+    print(f"{'Partition':<15}  {'Used Percentage':>85}")
+    print_partitions(cohesity, args.cohesity_threshold, args.inodes)
+
+
+if __name__ == '__main__':
+    main()
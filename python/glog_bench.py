@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+#
+# Date: 10/18/2026
+#
+# Description: Offline benchmark for the API call log scanners. Generates realistic magneto_exec and
+#              bridge_proxy_exec INFO files (plain and gzipped, with rotation) and times the original
+#              zgrep | wc -l counting against the glog_scanner engines, reporting MB/s and lines/s.
+#              MB/s and lines/s are measured over the whole generated file set, so an engine that skips
+#              data (the timestamp index) shows its effective speed. Counts from every engine are compared
+#              so a faster engine that gives different answers is caught. Runs on any Linux box with zgrep.
+#
+# Usage: ./glog_bench.py [--size-mb 64] [--files 4] [--density 0.05] [--gzip rotated] [--engines zgrep,scanner]
+#
+import argparse
+import gzip
+import os
+import random
+import shutil
+import subprocess
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+from glog_scanner import ScanResult, scan_file, scan_files_parallel, hour_prefixes
+import glog_index
+
+SERVICES = ('magneto_exec', 'bridge_proxy_exec')
+ENGINES = ('zgrep', 'scanner', 'parallel', 'index')
+
+# zgrep patterns used by the original api2_calls.py, per service
+ZGREP_PATTERNS = {
+    'magneto_exec': {
+        'single': "graph_base_op.cc.*Refreshing the token. Attempt number",
+        'batch': "generic_batch_request_op.cc.*Making a batch request of size",
+        'refresh_single': "graph_base_op.cc.*Task id -1: Refreshing the token. Attempt number",
+        'refresh_batch': "generic_batch_request_op.cc.*Task id -1: Making a batch request of size",
+        'throttled': "graph_base_op.cc.*Received error in MS Graph Response.*The request has been throttled",
+    },
+    'bridge_proxy_exec': {
+        'single': "graph_base_op.cc.*Refreshing the token. Attempt number",
+        'batch': "generic_batch_request_op.cc.*Making a batch request of size",
+        'throttled': "graph_base_op.cc.*Received error in MS Graph Response.*The request has been throttled",
+    },
+}
+
+# Lines that look like normal service chatter
+NOISE = (
+    "rpc_server.cc:{n}] Received RPC {rpc} from 10.2.{a}.{b}:{port}",
+    "mailbox_backup_op.cc:{n}] Task id {task}: Backed up {count} items for mailbox {mailbox}",
+    "scribe_client.cc:{n}] Updated {count} rows in table magneto_jobs for tenant {tenant}",
+    "graph_base_op.cc:{n}] Task id {task}: Received response with status 200 in {ms} ms",
+    "throttler_client.cc:{n}] Acquired {count} tokens for entity {mailbox}",
+)
+
+# MS Graph API call signatures, with the refresh (task -1) variants
+SIGNATURES = (
+    "graph_base_op.cc:{n}] Task id {task}: Refreshing the token. Attempt number {attempt}",
+    "graph_base_op.cc:{n}] Task id -1: Refreshing the token. Attempt number {attempt}",
+    "generic_batch_request_op.cc:{n}] Task id {task}: Making a batch request of size 19 for tenant {tenant}",
+    "generic_batch_request_op.cc:{n}] Task id -1: Making a batch request of size 19",
+    "graph_base_op.cc:{n}] Task id {task}: Received error in MS Graph Response: Status 429 for mailbox "
+    "{mailbox}. The request has been throttled",
+)
+
+
+def random_fields(rng):
+    return {
+        'n': rng.randint(50, 2500), 'rpc': rng.choice(('GetJobs', 'Heartbeat', 'UpdateStats')),
+        'a': rng.randint(0, 255), 'b': rng.randint(0, 255), 'port': rng.randint(1024, 65535),
+        'task': rng.choice((rng.randint(1000, 99999), rng.randint(1000, 1050))),
+        'count': rng.randint(1, 5000), 'mailbox': f"user{rng.randint(1, 20000)}@contoso.com",
+        'tenant': f"tenant-{rng.randint(1, 12)}", 'ms': rng.randint(5, 9000), 'attempt': rng.randint(1, 3),
+    }
+
+
+def generate_logs(directory, size_mb, files, density, gzip_mode, start, seed=1):
+    """
+    Write rotated INFO files for every service.
+
+    Args:
+        directory: Where the files go
+        size_mb: Uncompressed size of each file in MB
+        files: Number of files per service, the last one is the active file
+        density: Fraction of lines that are API call signatures
+        gzip_mode: 'none', 'rotated' (all but the active file) or 'all'
+        start: Timestamp of the first line, each file covers one hour
+
+    Returns:
+        tuple: (list of file paths, total uncompressed bytes, total lines)
+    """
+    rng = random.Random(seed)
+    paths, total_bytes, total_lines = [], 0, 0
+    target = size_mb * 1024 * 1024
+    for service in SERVICES:
+        for i in range(files):
+            file_start = start + timedelta(hours=i)
+            name = f"{service}.bench-node-1.cohesity.log.INFO.{file_start.strftime('%Y%m%d-%H%M%S')}.{1000 + i}"
+            path = os.path.join(directory, name)
+            # Average glog line is a bit over 110 bytes, spread the lines evenly over the hour
+            line_count = max(target // 115, 1)
+            step = 3600.0 / line_count
+            written = 0
+            with open(path, 'wb') as f:
+                lines = []
+                for n in range(line_count):
+                    ts = file_start + timedelta(seconds=n * step)
+                    templates = SIGNATURES if rng.random() < density else NOISE
+                    message = rng.choice(templates).format(**random_fields(rng))
+                    severity = 'E' if 'throttled' in message and rng.random() < 0.1 else 'I'
+                    lines.append(f"{severity}{ts.strftime('%m%d %H:%M:%S.%f')} {rng.randint(1000, 9999):>5} "
+                                 f"{message}\n".encode())
+                    if len(lines) == 10000:
+                        written += f.write(b''.join(lines))
+                        lines = []
+                written += f.write(b''.join(lines))
+            total_bytes += written
+            total_lines += line_count
+
+            if gzip_mode == 'all' or (gzip_mode == 'rotated' and i < files - 1):
+                with open(path, 'rb') as src, gzip.open(f"{path}.gz", 'wb', compresslevel=6) as dst:
+                    shutil.copyfileobj(src, dst)
+                os.remove(path)
+                path = f"{path}.gz"
+            paths.append(path)
+    return paths, total_bytes, total_lines
+
+
+def run_zgrep(paths, hour_start):
+    # One zgrep | wc -l pipeline per pattern per file, exactly as the original script did
+    prefix = hour_start.strftime('I%m%d %H')
+    counts = ScanResult().counts
+    for path in paths:
+        service = 'magneto_exec' if os.path.basename(path).startswith('magneto_exec') else 'bridge_proxy_exec'
+        for name, pattern in ZGREP_PATTERNS[service].items():
+            output = subprocess.check_output(f"zgrep '{prefix}.*{pattern}' {path} | wc -l", shell=True)
+            counts[name] += int(output)
+    return counts
+
+
+def merge_counts(paths, results):
+    # zgrep only counts refresh calls for magneto, so drop them for bridge_proxy to compare like for like
+    total = ScanResult()
+    for path, result in zip(paths, results):
+        if not os.path.basename(path).startswith('magneto_exec'):
+            result.counts['refresh_single'] = result.counts['refresh_batch'] = 0
+        total.merge(result)
+    return total.counts
+
+
+def run_engine(engine, paths, hour_start, workers):
+    prefixes = hour_prefixes(hour_start)
+    if engine == 'zgrep':
+        return run_zgrep(paths, hour_start)
+    if engine == 'scanner':
+        return merge_counts(paths, [scan_file(path, prefixes) for path in paths])
+    if engine == 'parallel':
+        return merge_counts(paths, scan_files_parallel([(path, prefixes, 0) for path in paths], workers))
+    if engine == 'index':
+        window = glog_index.window_keys(hour_start, 1)
+        return merge_counts(paths, [glog_index.scan_window(path, prefixes, *window) for path in paths])
+    raise ValueError(f"Unknown engine {engine}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the API call log scanners on generated glog files')
+    parser.add_argument('--size-mb', type=int, default=64, help='Uncompressed size of each INFO file')
+    parser.add_argument('--files', type=int, default=4, help='Rotated files per service, each covers an hour')
+    parser.add_argument('--density', type=float, default=0.05, help='Fraction of lines that are API calls')
+    parser.add_argument('--gzip', choices=['none', 'rotated', 'all'], default='rotated',
+                        help='Which files are gzipped')
+    parser.add_argument('--engines', default=','.join(ENGINES),
+                        help=f"Comma separated engines to run ({', '.join(ENGINES)})")
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help='Workers for the parallel engine')
+    parser.add_argument('--dir', help='Directory for the generated files (default: a temporary directory)')
+    parser.add_argument('--keep', action='store_true', help='Keep the generated files')
+    args = parser.parse_args()
+
+    directory = args.dir or tempfile.mkdtemp(prefix='glog_bench.')
+    os.makedirs(directory, exist_ok=True)
+    glog_index.INDEX_DIR = os.path.join(directory, '.glog_index')
+    start = datetime(datetime.now().year, 8, 14, 10)
+
+    print(f"Generating {args.files} x {args.size_mb} MB INFO files per service in {directory}")
+    t = time.time()
+    paths, total_bytes, total_lines = generate_logs(directory, args.size_mb, args.files, args.density,
+                                                    args.gzip, start)
+    print(f"Generated {total_bytes / 1e6:.1f} MB, {total_lines} lines in {time.time() - t:.1f}s\n")
+
+    # Count the second hour, like the hourly run does in the middle of a rotated file set
+    hour_start = start + timedelta(hours=min(1, args.files - 1))
+    engines = [engine.strip() for engine in args.engines.split(',') if engine.strip()]
+    if 'index' in engines:
+        # The first index run builds the index, time it on its own so the seek cost is visible
+        engines.insert(engines.index('index'), 'index-build')
+
+    print(f"{'Engine':<12} {'Seconds':>9} {'MB/s':>10} {'Lines/s':>14}  Counts")
+    print("-" * 80)
+    reference = None
+    try:
+        for engine in engines:
+            t = time.time()
+            counts = run_engine('index' if engine == 'index-build' else engine, paths, hour_start, args.workers)
+            elapsed = max(time.time() - t, 1e-6)
+            counts = dict(counts)
+            check = ''
+            if reference is None:
+                reference = counts
+            elif counts != reference:
+                check = '  MISMATCH'
+            summary = ' '.join(f"{name}={value}" for name, value in sorted(counts.items()))
+            print(f"{engine:<12} {elapsed:>9.2f} {total_bytes / 1e6 / elapsed:>10.1f} "
+                  f"{total_lines / elapsed:>14.0f}  {summary}{check}")
+    finally:
+        if not args.keep and not args.dir:
+            shutil.rmtree(directory, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
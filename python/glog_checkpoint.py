@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+#
+# Date: 10/18/2026
+#
+# Description: Persistent checkpoints for incremental glog reading. For every log file the inode, size and
+#              byte offset already consumed are recorded so the next run only reads what was appended.
+#              glog rotation and gzip recompression of rotated files are both handled:
+#                - A rotated file keeps its name and inode, so it is simply read to its end
+#                - When a rotated file is gzipped (X -> X.gz) the checkpoint follows it by name and reading
+#                  resumes at the same uncompressed offset inside the gzip stream
+#                - A file that was replaced or truncated (new inode or smaller size) is read from the start
+#
+import json
+import os
+
+from glog_scanner import is_gzip
+
+DEFAULT_CHECKPOINT_FILE = "/home/support/utils/apicalls.checkpoint"
+
+
+def checkpoint_key(path):
+    """Return the name a log file is tracked under, which is the same before and after gzip."""
+    name = os.path.basename(path)
+    if name.endswith('.gz'):
+        name = name[:-3]
+    return name
+
+
+class CheckpointStore:
+    """JSON backed store of per-file read offsets."""
+
+    def __init__(self, path=DEFAULT_CHECKPOINT_FILE):
+        self.path = path
+        self.last_run = None
+        self.files = {}
+        self._seen = set()
+        # Stat and gzip flag of each file taken before it was read, what a checkpoint records
+        self._stats = {}
+        try:
+            with open(path, 'r') as f:
+                data = json.load(f)
+            self.last_run = data.get('last_run')
+            self.files = data.get('files', {})
+        except (OSError, ValueError):
+            pass
+
+    def start_offset(self, path):
+        """
+        Work out where reading of a log file should start.
+
+        Args:
+            path: Path to a plain or gzipped glog file
+
+        Returns:
+            int: Uncompressed offset to start reading from, or None if there is nothing new to read
+        """
+        key = checkpoint_key(path)
+        self._seen.add(key)
+        st = os.stat(path)
+        compressed = is_gzip(path)
+        self._stats[key] = (st, compressed)
+        entry = self.files.get(key)
+
+        if entry is None:
+            if self.last_run is None:
+                # First run ever: start tracking the file without counting its history
+                self.files[key] = {'inode': st.st_ino, 'size': st.st_size, 'gzip': compressed,
+                                   'offset': None if compressed else st.st_size}
+                return None
+            # File appeared since the last run, all of it is new
+            return 0
+
+        if entry['inode'] == st.st_ino and entry['gzip'] == compressed and \
+                (entry['size'] == st.st_size if compressed else entry['offset'] == st.st_size):
+            # Unchanged since the last run; a plain file only when it was read up to its current size,
+            # anything appended while or after it was read is still to come
+            return None
+
+        if compressed and not entry['gzip']:
+            # Rotated file was recompressed, resume inside the gzip stream
+            return entry['offset'] or 0
+
+        if not compressed and entry['inode'] == st.st_ino and entry['offset'] is not None \
+                and st.st_size >= entry['offset']:
+            # Same file has grown
+            return entry['offset']
+
+        # Replaced or truncated
+        return 0
+
+    def update(self, path, offset):
+        """Record the offset a log file has been read up to."""
+        # The stat from before the read; one taken now could include lines appended after the reader stopped,
+        # or fail because the file was gzipped away in the meantime
+        st, compressed = self._stats.pop(checkpoint_key(path), None) or (os.stat(path), is_gzip(path))
+        self.files[checkpoint_key(path)] = {'inode': st.st_ino, 'size': st.st_size, 'gzip': compressed,
+                                            'offset': offset}
+
+    def save(self, run_time):
+        """Write the store to disk, dropping files that no longer exist."""
+        self.files = {key: entry for key, entry in self.files.items() if key in self._seen}
+        self.last_run = run_time
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({'last_run': self.last_run, 'files': self.files}, f)
+        os.replace(tmp_path, self.path)
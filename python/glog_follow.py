@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+#
+# Date: 10/18/2026
+#
+# Description: Live follow mode for MS Graph API calls. Tails the active magneto_exec and bridge_proxy_exec
+#              INFO files like 'tail -F', switching to the new file when glog rotates, and prints the total
+#              and throttled call rate over a sliding window every few seconds. Between writes the process
+#              sleeps in select() on an inotify descriptor so it costs next to no CPU, and a burst of writes is
+#              read at most once per READ_INTERVAL; if inotify is not available it falls back to polling once a
+#              second. Also available as api2_calls.py --follow.
+#
+# Usage: ./glog_follow.py [--every 10] [--window 60]
+#
+import argparse
+import ctypes
+import ctypes.util
+import os
+import select
+import sys
+import time
+from collections import deque
+from datetime import datetime
+
+from glog_scanner import classify, BATCH_SIZE
+
+LOGS_DIRECTORY = "/home/cohesity/logs/"
+SERVICES = ('magneto_exec', 'bridge_proxy_exec')
+
+# inotify constants from <sys/inotify.h>
+IN_MODIFY = 0x00000002
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = 0o2000000
+
+POLL_INTERVAL = 1
+# Minimum seconds between reads while inotify reports writes, a busy log is read in one go instead of per write
+READ_INTERVAL = 1
+READ_SIZE = 1024 * 1024
+
+
+class Inotify:
+    """Minimal ctypes wrapper around the Linux inotify API."""
+
+    def __init__(self):
+        libc = ctypes.CDLL(ctypes.util.find_library('c') or None, use_errno=True)
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+
+    def add_watch(self, path, mask):
+        """Watch a path and return the watch descriptor."""
+        wd = self._add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            raise OSError(ctypes.get_errno(), f"inotify_add_watch failed for {path}")
+        return wd
+
+    def rm_watch(self, wd):
+        # Fails harmlessly when the file was deleted, the kernel already dropped its watch
+        self._rm_watch(self.fd, wd)
+
+    def wait(self, timeout):
+        """Block until something changed or timeout seconds passed; returns True if something changed."""
+        readable, _, _ = select.select([self.fd], [], [], max(timeout, 0))
+        return bool(readable)
+
+    def drain(self):
+        """Discard the queued events, the files are read in full anyway."""
+        try:
+            while os.read(self.fd, 65536):
+                pass
+        except BlockingIOError:
+            pass
+
+    def close(self):
+        os.close(self.fd)
+
+
+class LogFollower:
+    """Follows the active INFO file of one service across glog rotation."""
+
+    def __init__(self, service, logs_directory=LOGS_DIRECTORY):
+        self.link = os.path.join(logs_directory, f"{service}.INFO")
+        self.path = None
+        self.f = None
+        self.partial = b''
+        # Start at the end of the current file, only new lines are counted
+        self._open(os.SEEK_END)
+
+    def _open(self, whence):
+        try:
+            path = os.path.realpath(self.link)
+            f = open(path, 'rb')
+        except OSError:
+            return False
+        f.seek(0, whence)
+        if self.f:
+            self.f.close()
+        self.path, self.f, self.partial = path, f, b''
+        return True
+
+    def read_lines(self):
+        """Return the complete lines written since the last call."""
+        lines = []
+        if self.f is None:
+            self._open(os.SEEK_SET)
+            if self.f is None:
+                return lines
+        while True:
+            lines.extend(self._read_available())
+            if os.path.realpath(self.link) == self.path:
+                return lines
+            # glog points the symlink at a new file on rotation, finish the old file first. Nothing more is
+            # written to it, so its last line counts even without a newline
+            lines.extend(self._read_available())
+            partial = self.partial
+            if not self._open(os.SEEK_SET):
+                return lines
+            if partial:
+                lines.append(partial)
+
+    def _read_available(self):
+        data = self.f.read(READ_SIZE)
+        while data:
+            data = self.partial + data
+            cut = data.rfind(b'\n') + 1
+            self.partial = data[cut:]
+            yield from data[:cut].splitlines()
+            data = self.f.read(READ_SIZE)
+
+
+class RateWindow:
+    """Per second call counts over a sliding window."""
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.buckets = deque()
+
+    def add(self, now, calls, throttled):
+        second = int(now)
+        if self.buckets and self.buckets[-1][0] == second:
+            self.buckets[-1][1] += calls
+            self.buckets[-1][2] += throttled
+        else:
+            self.buckets.append([second, calls, throttled])
+
+    def rates(self, now):
+        """Return (calls per second, throttled per second) over the window ending now."""
+        oldest = int(now) - self.seconds
+        while self.buckets and self.buckets[0][0] <= oldest:
+            self.buckets.popleft()
+        calls = sum(bucket[1] for bucket in self.buckets)
+        throttled = sum(bucket[2] for bucket in self.buckets)
+        return calls / self.seconds, throttled / self.seconds
+
+
+def count_calls(lines):
+    # Same weighting as the batch counter: a batch request carries BATCH_SIZE calls
+    calls = throttled = 0
+    for line in lines:
+        for name in classify(line):
+            if name == 'single':
+                calls += 1
+            elif name == 'batch':
+                calls += BATCH_SIZE
+            elif name == 'throttled':
+                throttled += 1
+    return calls, throttled
+
+
+def follow(every=10, window=60, logs_directory=LOGS_DIRECTORY, out=sys.stdout):
+    """
+    Print the call rate of every followed service until interrupted.
+
+    Args:
+        every: Seconds between sample lines
+        window: Length of the sliding window in seconds
+        logs_directory: Directory holding the glog files
+        out: Stream the sample lines are written to
+    """
+    followers = [LogFollower(service, logs_directory) for service in SERVICES]
+    rate_window = RateWindow(window)
+    try:
+        inotify = Inotify()
+        # Directory events catch rotation, file events catch new lines
+        inotify.add_watch(logs_directory, IN_CREATE | IN_MOVED_TO)
+    except (OSError, AttributeError):
+        inotify = None
+
+    # Watch descriptors of the files being followed, by path
+    watched = {}
+    last_read = 0
+    next_emit = time.time() + every
+    try:
+        while True:
+            if inotify is not None:
+                current = {follower.path for follower in followers if follower.path}
+                for path in set(watched) - current:
+                    # Rotated away from, glog won't write it again
+                    inotify.rm_watch(watched.pop(path))
+                for path in current - set(watched):
+                    try:
+                        watched[path] = inotify.add_watch(path, IN_MODIFY)
+                    except OSError:
+                        # Rotated and removed before it could be watched, the follower moves on
+                        pass
+                if inotify.wait(next_emit - time.time()):
+                    # Let a burst of writes collect, then read it all at once
+                    time.sleep(max(min(last_read + READ_INTERVAL, next_emit) - time.time(), 0))
+                    inotify.drain()
+            else:
+                time.sleep(max(min(POLL_INTERVAL, next_emit - time.time()), 0))
+
+            now = last_read = time.time()
+            for follower in followers:
+                calls, throttled = count_calls(follower.read_lines())
+                if calls or throttled:
+                    rate_window.add(now, calls, throttled)
+
+            if now >= next_emit:
+                calls_rate, throttled_rate = rate_window.rates(now)
+                out.write(f"{datetime.fromtimestamp(now).strftime('%m-%d-%Y %H:%M:%S')} "
+                          f"calls/s: {calls_rate:8.2f} throttled/s: {throttled_rate:8.2f} (last {window}s)\n")
+                out.flush()
+                next_emit += every
+                if next_emit < now:
+                    next_emit = now + every
+    finally:
+        if inotify is not None:
+            inotify.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Follow the MS Graph API call and throttle rate live')
+    parser.add_argument('--every', type=int, default=10, help='Seconds between sample lines')
+    parser.add_argument('--window', type=int, default=60, help='Sliding window length in seconds')
+    args = parser.parse_args()
+
+    try:
+        follow(args.every, args.window)
+    except KeyboardInterrupt:
+        print('\nStopped following')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+#
+# Date: 10/18/2026
+#
+# Description: Sparse timestamp index for glog files. Every INDEX_INTERVAL bytes the index records the byte
+#              offset of a line together with its timestamp, so a time window can be found with a binary
+#              search instead of regex matching every line of a multi-GB INFO file.
+#
+#              The index of a plain file is built by seeking to every sample point rather than reading every
+#              line. It is kept in INDEX_DIR, one per log file, and is extended in place while the active log
+#              file grows. For gzipped files the offsets are positions in the uncompressed stream; a gzip
+#              stream can only seek by decompressing from the start, so it is indexed in one forward pass
+#              that looks at the lines only around the sample points, and rotated gzip files never change so
+#              their index is built only once.
+#
+#              glog timestamps carry no year, so a window that spans New Year is not supported.
+#
+# Usage: ./glog_index.py slice '<MMDD HH[:MM[:SS]]>' '<MMDD HH[:MM[:SS]]>' <log file> [log file ...]
+#        Prints the lines logged from the first time up to (not including) the second time
+#
+import bisect
+import json
+import os
+import sys
+from datetime import datetime, timedelta
+
+from glog_scanner import open_log, is_gzip, scan_file
+from glog_checkpoint import checkpoint_key
+
+INDEX_DIR = "/home/support/utils/.glog_index"
+
+# Uncompressed bytes between index entries
+INDEX_INTERVAL = 1024 * 1024
+
+# Bytes read around each sample point
+SAMPLE_SIZE = 64 * 1024
+
+# glog threads log slightly out of order, so windows are widened by this much when seeking
+SLACK = timedelta(minutes=1)
+
+# glog lines start with <severity>MMDD HH:MM:SS.uuuuuu
+_SEVERITIES = b'IWEF'
+_KEY_END = 21
+_PARTIAL_KEY_SUFFIX = ' 00:00:00'
+
+
+def line_key(line):
+    """Return the 'MMDD HH:MM:SS.uuuuuu' timestamp of a glog line, or None for continuation lines."""
+    if line[1:5].isdigit() and line[:1] in _SEVERITIES and line[5:6] == b' ':
+        return line[1:_KEY_END].decode('ascii', 'replace')
+    return None
+
+
+def index_path(path):
+    return os.path.join(INDEX_DIR, f"{checkpoint_key(path)}.idx")
+
+
+def _load(path):
+    try:
+        with open(index_path(path), 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save(path, index):
+    os.makedirs(INDEX_DIR, exist_ok=True)
+    tmp_path = f"{index_path(path)}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f)
+    os.replace(tmp_path, index_path(path))
+
+
+def _sample(f, mark):
+    # First timestamped line that starts after mark, as (offset, key), or None past the last complete line
+    while True:
+        f.seek(mark)
+        chunk = f.read(SAMPLE_SIZE)
+        # Unless at the start of the file, mark is somewhere inside a line so skip to the next one
+        pos = 0 if mark == 0 else chunk.find(b'\n') + 1
+        if pos or mark == 0:
+            stop = chunk.find(b'\n', pos)
+            while stop != -1:
+                key = line_key(chunk[pos:stop])
+                if key is not None:
+                    return mark + pos, key
+                pos = stop + 1
+                stop = chunk.find(b'\n', pos)
+        if len(chunk) < SAMPLE_SIZE:
+            return None
+        # Only continuation lines in this chunk, carry on from the start of its last partial line
+        mark += max(pos - 1, 1) if pos else len(chunk)
+
+
+def _tail(f, offset):
+    # Read from offset to the end, returns (end of the last complete line, key of the last timestamped line)
+    f.seek(offset)
+    last = b''
+    while True:
+        data = f.read(SAMPLE_SIZE * 16)
+        if not data:
+            break
+        last = (last + data)[-SAMPLE_SIZE:]
+        offset += len(data)
+    end = offset - (len(last) - last.rfind(b'\n') - 1)
+    for line in reversed(last[:last.rfind(b'\n')].split(b'\n')):
+        key = line_key(line)
+        if key is not None:
+            return end, key
+    return end, ''
+
+
+def _last_key(block):
+    # Key of the last timestamped line in a block of complete lines, or None
+    stop = len(block)
+    while stop > 0:
+        start = block.rfind(b'\n', 0, stop - 1) + 1
+        key = line_key(block[start:stop])
+        if key is not None:
+            return key
+        stop = start
+    return None
+
+
+def _index_forward(f, offset, entries):
+    """
+    Sample a stream in one forward pass, for gzip files that must not seek backward.
+
+    Args:
+        f: Open log, positioned at offset, the start of a line
+        offset: Uncompressed offset to index from
+        entries: Index entries to extend
+
+    Returns:
+        tuple: (end of the last complete line, key of the last timestamped line)
+    """
+    next_mark = entries[-1][1] + INDEX_INTERVAL if entries else 0
+    last_key = ''
+    pending = b''
+    while True:
+        data = f.read(SAMPLE_SIZE * 16)
+        if not data:
+            break
+        # block holds complete lines and starts at offset, the start of a line
+        block = pending + data
+        cut = block.rfind(b'\n') + 1
+        block, pending = block[:cut], block[cut:]
+        while next_mark < offset + cut:
+            # First line that starts at or after the mark
+            pos = 0 if next_mark <= offset else block.find(b'\n', next_mark - offset - 1) + 1
+            while pos < cut:
+                stop = block.find(b'\n', pos) + 1
+                key = line_key(block[pos:stop])
+                if key is not None:
+                    break
+                pos = stop
+            if pos >= cut:
+                # Only continuation lines left in this block, carry on from the next one
+                next_mark = offset + cut
+                break
+            if entries and key < entries[-1][0]:
+                key = entries[-1][0]
+            entries.append([key, offset + pos])
+            next_mark = offset + pos + INDEX_INTERVAL
+        last_key = _last_key(block) or last_key
+        offset += cut
+    return offset, last_key
+
+
+def build_index(path):
+    """
+    Load the index for a log file, building or extending it as needed.
+
+    The index is built by sampling one line every INDEX_INTERVAL bytes rather than parsing every line, by
+    seeking in plain files and in one forward pass through gzip files.
+    Each entry is [timestamp, offset]; timestamps are kept non-decreasing so they can be bisected.
+
+    Returns:
+        dict: The index, with entries in offset order
+    """
+    st = os.stat(path)
+    compressed = is_gzip(path)
+    index = _load(path)
+    if index and index['inode'] == st.st_ino and index['size'] == st.st_size and index['gzip'] == compressed:
+        return index
+
+    if index and not index['gzip'] and (compressed or (index['inode'] == st.st_ino
+                                                       and st.st_size >= index['indexed_to'])):
+        # The active log grew, or a rotated log was gzipped which leaves its uncompressed offsets
+        # unchanged, so carry on from where indexing stopped
+        entries = index['entries']
+    else:
+        entries = []
+
+    with open_log(path) as f:
+        if compressed:
+            # Seeking back in a gzip stream decompresses it again from the start, read it forward once
+            start = entries[-1][1] if entries else 0
+            if start:
+                f.seek(start)
+            indexed_to, last_key = _index_forward(f, start, entries)
+        else:
+            next_mark = entries[-1][1] + INDEX_INTERVAL if entries else 0
+            while True:
+                sample = _sample(f, next_mark)
+                if sample is None:
+                    break
+                offset, key = sample
+                if entries and key < entries[-1][0]:
+                    key = entries[-1][0]
+                entries.append([key, offset])
+                next_mark = offset + INDEX_INTERVAL
+            indexed_to, last_key = _tail(f, entries[-1][1] if entries else 0)
+
+    index = {'inode': st.st_ino, 'size': st.st_size, 'gzip': compressed, 'indexed_to': indexed_to,
+             'last_key': last_key, 'entries': entries}
+    _save(path, index)
+    return index
+
+
+def _shift(key, delta):
+    # Pad 'MMDD HH' or 'MMDD HH:MM' out to seconds, keys have no year and 2000 is a leap year so 0229 parses
+    key = key[:13] + _PARTIAL_KEY_SUFFIX[len(key) - 4:] if len(key) < 13 else key[:13]
+    ts = datetime.strptime(f"2000{key}", '%Y%m%d %H:%M:%S')
+    return (ts + delta).strftime('%m%d %H:%M:%S')
+
+
+def seek_range(path, start_key, end_key):
+    """
+    Find the slice of a log file that holds a time window.
+
+    Args:
+        path: Path to a plain or gzipped glog file
+        start_key: Start of the window as 'MMDD HH[:MM[:SS]]', inclusive
+        end_key: End of the window as 'MMDD HH[:MM[:SS]]', exclusive
+
+    Returns:
+        tuple: (start offset, end offset or None to read to the end of the file)
+    """
+    index = build_index(path)
+    keys = [entry[0] for entry in index['entries']]
+    low = _shift(start_key, -SLACK)
+    if index['last_key'] and index['last_key'] < low:
+        # Every line in the file is older than the window
+        return index['indexed_to'], index['indexed_to']
+
+    # Last sampled line that is clearly before the window
+    i = bisect.bisect_left(keys, low) - 1
+    start = index['entries'][i][1] if i >= 0 else 0
+
+    # First sampled line that is clearly past the end of the window
+    j = bisect.bisect_left(keys, _shift(end_key, SLACK))
+    end = index['entries'][j][1] if j < len(keys) else None
+    return start, end
+
+
+def window_keys(start, hours):
+    """Return the (start, end) keys covering a number of whole hours from a datetime."""
+    begin = start.replace(minute=0, second=0, microsecond=0)
+    return begin.strftime('%m%d %H'), (begin + timedelta(hours=hours)).strftime('%m%d %H')
+
+
+def scan_window(path, prefixes, start_key, end_key):
+    """Scan only the slice of a log file that holds a time window (see glog_scanner.scan_file)."""
+    start, end = seek_range(path, start_key, end_key)
+    return scan_file(path, prefixes, start, end)
+
+
+def iter_window(path, start_key, end_key):
+    """Yield the raw lines of a log file logged inside a time window, including continuation lines."""
+    start, end = seek_range(path, start_key, end_key)
+    in_window = False
+    with open_log(path) as f:
+        if start:
+            f.seek(start)
+        offset = start
+        for line in f:
+            if end is not None and offset >= end:
+                break
+            offset += len(line)
+            key = line_key(line)
+            if key is not None:
+                in_window = start_key <= key < end_key
+            if in_window:
+                yield line
+
+
+def main():
+    if len(sys.argv) < 5 or sys.argv[1] != 'slice':
+        print("Usage: glog_index.py slice '<MMDD HH[:MM[:SS]]>' '<MMDD HH[:MM[:SS]]>' <log file> [log file ...]")
+        sys.exit(1)
+
+    start_key, end_key = sys.argv[2], sys.argv[3]
+    seen = set()
+    out = sys.stdout.buffer
+    for path in sys.argv[4:]:
+        # glog keeps a symlink to the active file, only read it once
+        real_path = os.path.realpath(path)
+        if real_path in seen or not os.path.isfile(real_path):
+            continue
+        seen.add(real_path)
+        for line in iter_window(real_path, start_key, end_key):
+            out.write(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,325 @@
+#!/usr/bin/env python3
+#
+# Date: 10/18/2026
+#
+# Description: Single pass scanner for Magneto and Bridge_proxy glog INFO files. Every file is opened
+#              (and decompressed if gzipped) exactly once and each line is checked against all of the
+#              MS Graph API call signatures at the same time, replacing one zgrep pipeline per pattern.
+#
+# Usage: ./glog_scanner.py <mmdd> <hh> <log file> [log file ...]
+#
+import gzip
+import io
+import os
+import re
+import subprocess
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+
+GZIP_MAGIC = b'\x1f\x8b'
+
+# Logs are read in blocks of this many bytes
+READ_SIZE = 1024 * 1024
+
+# Every batch request carries up to 19 Graph API calls
+BATCH_SIZE = 19
+
+# (counter name, source file, message fragments that must follow the source file in order)
+SIGNATURES = (
+    ('single', b'graph_base_op.cc', (b'Refreshing the token. Attempt number',)),
+    ('refresh_single', b'graph_base_op.cc', (b'Task id -1: Refreshing the token. Attempt number',)),
+    ('throttled', b'graph_base_op.cc', (b'Received error in MS Graph Response', b'The request has been throttled')),
+    ('batch', b'generic_batch_request_op.cc', (b'Making a batch request of size',)),
+    ('refresh_batch', b'generic_batch_request_op.cc', (b'Task id -1: Making a batch request of size',)),
+)
+COUNTER_NAMES = tuple(name for name, _, _ in SIGNATURES)
+
+# ionice scheduling classes accepted by scan_files_parallel
+IO_CLASSES = {'idle': ['-c', '3'], 'best-effort': ['-c', '2', '-n', '7']}
+
+# glog lines start with <severity>MMDD HH:MM:SS.uuuuuu, so line[1:11] is the minute the line was logged in
+MINUTE_KEY_END = 11
+
+# Breakdown dimensions pulled from matched lines, where the line has them
+DIMENSIONS = (
+    ('task', re.compile(rb'Task id (-?\d+)')),
+    ('tenant', re.compile(rb'[Tt]enant(?:[ _]id)?[:= ]+"?([\w.@-]+)')),
+    ('group', re.compile(rb'(?:[Pp]rotection [Gg]roup|[Jj]ob)(?:[ _]id)?[:= ]+"?([\w.@-]+)')),
+)
+
+# Keys tracked per breakdown, only the heaviest survive when there are more
+TOP_K = 100
+
+# Both source files end in this, so lines without it can be skipped with one substring test
+_SOURCE_SUFFIX = b'_op.cc'
+
+
+class TopK:
+    """
+    Space-Saving heavy hitter counter. At most k keys are kept; when a new key arrives and the table is
+    full it replaces the smallest key and inherits its count, so memory is bounded and any key holding
+    more than 1/k of the total is guaranteed to be present with a count that is never under-estimated.
+    """
+
+    def __init__(self, k=TOP_K):
+        self.k = k
+        self.counts = {}
+        # Keys that held the smallest count when it was last looked up, so a long tail of one-off keys
+        # does not cost a full min() over the table for every eviction
+        self._smallest = []
+        self._smallest_count = 0
+
+    def add(self, key, n=1):
+        counts = self.counts
+        if key in counts:
+            counts[key] += n
+        elif len(counts) < self.k:
+            counts[key] = n
+        else:
+            smallest = self._pop_smallest()
+            counts[key] = counts.pop(smallest) + n
+
+    def _pop_smallest(self):
+        counts = self.counts
+        while self._smallest:
+            key = self._smallest.pop()
+            if counts.get(key) == self._smallest_count:
+                return key
+        self._smallest_count = min(counts.values())
+        self._smallest = [key for key, n in counts.items() if n == self._smallest_count]
+        return self._smallest.pop()
+
+    def merge(self, other):
+        for key, n in other.counts.items():
+            self.add(key, n)
+        return self
+
+    def top(self, n=10):
+        """Return the n heaviest (key, count) pairs."""
+        return sorted(self.counts.items(), key=lambda item: item[1], reverse=True)[:n]
+
+
+class ScanResult:
+    """Counters collected from one or more scanned log files."""
+
+    def __init__(self):
+        self.counts = Counter({name: 0 for name in COUNTER_NAMES})
+        self.files = 0
+        self.lines = 0
+        self.bytes_read = 0
+        self.offset = 0
+        # Per minute counters keyed by (b'MMDD HH:MM', counter name)
+        self.minutes = Counter()
+        # Heaviest keys per breakdown, keyed by (dimension, 'calls' or 'throttled')
+        self.top = {(dimension, metric): TopK() for dimension, _ in DIMENSIONS
+                    for metric in ('calls', 'throttled')}
+
+    def merge(self, other):
+        """Add the counters of another ScanResult to this one."""
+        self.counts.update(other.counts)
+        self.minutes.update(other.minutes)
+        for key, top in other.top.items():
+            self.top[key].merge(top)
+        self.files += other.files
+        self.lines += other.lines
+        self.bytes_read += other.bytes_read
+        return self
+
+    def total_calls(self):
+        return self.counts['single'] + self.counts['batch'] * BATCH_SIZE
+
+    def refresh_calls(self):
+        return self.counts['refresh_single'] + self.counts['refresh_batch'] * BATCH_SIZE
+
+
+def is_gzip(path):
+    """Return True if the file starts with the gzip magic bytes."""
+    with open(path, 'rb') as f:
+        return f.read(2) == GZIP_MAGIC
+
+
+def open_log(path):
+    """Open a log file for binary reading, transparently decompressing gzip files."""
+    if is_gzip(path):
+        return gzip.open(path, 'rb')
+    return open(path, 'rb')
+
+
+def hour_prefixes(start, interval_hours=1):
+    """Return the glog line prefixes (e.g. b'I0814 13') for each hour starting at start."""
+    prefixes = []
+    for i in range(interval_hours):
+        ts = start + timedelta(hours=i)
+        prefixes.append(ts.strftime('I%m%d %H').encode())
+    return tuple(prefixes)
+
+
+def classify(line):
+    """Return the names of all signatures that match a glog line."""
+    matched = []
+    if _SOURCE_SUFFIX not in line:
+        return matched
+    for name, source, fragments in SIGNATURES:
+        pos = line.find(source)
+        if pos == -1:
+            continue
+        pos += len(source)
+        for fragment in fragments:
+            pos = line.find(fragment, pos)
+            if pos == -1:
+                break
+            pos += len(fragment)
+        else:
+            matched.append(name)
+    return matched
+
+
+def _count_breakdown(line, names, top):
+    # Attribute the calls on a matched line to its task, tenant and protection group
+    calls = ('single' in names) + ('batch' in names) * BATCH_SIZE
+    throttled = 'throttled' in names
+    for dimension, pattern in DIMENSIONS:
+        match = pattern.search(line)
+        if match is None:
+            continue
+        key = match.group(1).decode('utf-8', 'replace')
+        if calls:
+            top[(dimension, 'calls')].add(key, calls)
+        if throttled:
+            top[(dimension, 'throttled')].add(key)
+
+
+def _scan_block(block, prefixes, result):
+    # Jump straight to the lines that mention a source file with bytes.find instead of
+    # splitting the block into lines, most lines in a busy log never reach classify()
+    counts, minutes = result.counts, result.minutes
+    pos = block.find(_SOURCE_SUFFIX)
+    while pos != -1:
+        start = block.rfind(b'\n', 0, pos) + 1
+        stop = block.find(b'\n', pos)
+        if stop == -1:
+            stop = len(block)
+        line = block[start:stop]
+        if prefixes is None or line.startswith(prefixes):
+            names = classify(line)
+            for name in names:
+                counts[name] += 1
+                minutes[(line[1:MINUTE_KEY_END], name)] += 1
+            if names:
+                _count_breakdown(line, names, result.top)
+        pos = block.find(_SOURCE_SUFFIX, stop)
+
+
+def scan_file(path, prefixes=None, offset=0, end=None):
+    """
+    Count every API call signature in a log file in a single pass.
+
+    Args:
+        path: Path to a plain or gzipped glog file
+        prefixes: Tuple of glog line prefixes to count (None counts every line)
+        offset: Uncompressed byte offset to start reading from
+        end: Uncompressed byte offset to stop reading at (None reads to the end of the file).
+             Reading stops at the end of the block that crosses it.
+
+    Returns:
+        ScanResult: Counters for the file, with offset set to the end of the last complete line
+    """
+    result = ScanResult()
+    result.files = 1
+    result.offset = offset
+    pending = b''
+    with open_log(path) as f:
+        compressed = not isinstance(f, io.BufferedReader)
+        if offset:
+            f.seek(offset)
+        while end is None or result.offset < end:
+            data = f.read(READ_SIZE)
+            if not data:
+                break
+            block = pending + data
+            cut = block.rfind(b'\n') + 1
+            pending = block[cut:]
+            if cut:
+                _scan_block(block[:cut], prefixes, result)
+                result.lines += block.count(b'\n', 0, cut)
+                result.bytes_read += cut
+                result.offset += cut
+
+    # A plain file that is still being written may end in a partial line, leave it for the next read.
+    # Rotated gzip files are complete so their last line is counted even without a newline.
+    if pending and compressed and (end is None or result.offset < end):
+        _scan_block(pending, prefixes, result)
+        result.lines += 1
+        result.bytes_read += len(pending)
+        result.offset += len(pending)
+    return result
+
+
+def set_scan_priority(nice=0, io_class=None):
+    """Lower the CPU and IO priority of the current process so scanning does not starve the data path."""
+    if nice:
+        os.nice(nice)
+    if io_class in IO_CLASSES:
+        subprocess.run(['ionice'] + IO_CLASSES[io_class] + ['-p', str(os.getpid())],
+                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+
+
+def _size(path):
+    # A file rotated or gzipped away since it was listed sorts last
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def scan_files_parallel(jobs, workers, nice=0, io_class=None, scan=scan_file):
+    """
+    Scan log files on a bounded process pool.
+
+    Args:
+        jobs: List of argument tuples for scan, each starting with the file path
+        workers: Maximum number of scanner processes
+        nice: Niceness increment applied to each scanner process
+        io_class: ionice class for each scanner process ('idle', 'best-effort' or None)
+        scan: Module level scan function to run for each job
+
+    Returns:
+        list: ScanResult for each job, in the same order as jobs
+    """
+    if not jobs:
+        return []
+    # Start the largest files first so one big file does not finish last on its own
+    order = sorted(range(len(jobs)), key=lambda i: _size(jobs[i][0]), reverse=True)
+    results = [None] * len(jobs)
+    with ProcessPoolExecutor(max_workers=max(1, min(workers, len(jobs))),
+                             initializer=set_scan_priority, initargs=(nice, io_class)) as pool:
+        futures = {i: pool.submit(scan, *jobs[i]) for i in order}
+        for i, future in futures.items():
+            results[i] = future.result()
+    return results
+
+
+def main():
+    if len(sys.argv) < 4:
+        print("Usage: glog_scanner.py <mmdd> <hh> <log file> [log file ...]")
+        sys.exit(1)
+
+    prefixes = (f"I{sys.argv[1]} {sys.argv[2]}".encode(),)
+    total = ScanResult()
+    for path in sys.argv[3:]:
+        total.merge(scan_file(path, prefixes))
+
+    for name in COUNTER_NAMES:
+        print(f"{name + ':':<20} {total.counts[name]:20}")
+
+    for (dimension, metric), top in total.top.items():
+        if top.counts:
+            print(f"\nTop {dimension}s by {metric}:")
+            for key, count in top.top(5):
+                print(f"  {key:<40} {count:>12}")
+
+
+if __name__ == '__main__':
+    main()
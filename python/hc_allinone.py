@@ -1,11 +1,23 @@
 #!/usr/bin/env python3
+import argparse
+import json
 import subprocess
 import os
 import sys
-import re
 import logging
 from datetime import datetime
 
+from proc_snapshot import ProcessSnapshot, service_usage, format_rss, format_cpu_time
+from version_probe import get_versions
+from fs_usage import filesystem_usage, split_partitions
+from node_facts import get_fact
+from fatal_logs import latest_fatals, format_entries
+from cluster_exec import get_host_ips
+from hc_cluster import run_cluster, merge_reports, format_matrix, NODE_TIMEOUT
+from health_history import DEFAULT_HISTORY_DIR, save_snapshot, load_snapshot, diff_snapshots, format_diff
+import health_profile
+from health_sections import SectionRegistry, ERROR, run_sections, render_text, build_report
+
 # ANSI escape sequences
 RED_BACKGROUND = '\033[41m'
 BOLD = '\033[1m'
@@ -22,182 +34,241 @@ logging.basicConfig(
     format='%(asctime)s - %(levelname)s - %(message)s'
 )
 
-def print_header(title):
-    print(f"------------- {RED_BACKGROUND} {title} {RESET} ---------------")
+# Thresholds for partition usage warnings
+OS_THRESHOLD = 60
+COHESITY_THRESHOLD = 80
 
-def get_node_uptime():
-    try:
-        output = subprocess.check_output("uptime", shell=True).decode().strip()
-        dateo = subprocess.check_output("date", shell=True).decode().strip()
-        print(f"Current Date: {dateo}")
-        print(f"Server Uptime: {output}")
-        logging.info(f"\n{dateo}\n{output}\n{'-'*40}")
-    except Exception as e:
-        print(f"Error getting uptime: {e}")
+PROCESSES = [
+    'aegis', 'alerts', 'apollo', 'athena', 'atom', 'bifrost', 'bifrost_broker', 'bridge', 'bridge_proxy',
+    'compass', 'eagle_agent', 'elrond', 'etl_server', 'gandalf', 'groot', 'heimdall', 'icebox', 'iris',
+    'iris_proxy', 'janus', 'keychain', 'librarian', 'logwatcher', 'magneto', 'newscribe', 'nexus',
+    'nexus_proxy', 'nfs_proxy', 'node_exporter', 'patch', 'pushclient', 'rtclient', 'smb2_proxy',
+    'smb_proxy', 'spire_agent', 'spire_server', 'stats', 'statscollector', 'storage_proxy', 'throttler',
+    'vault_proxy', 'yoda'
+]
+
+SERVICES = [
+    "aegis_exec", "alerts_exec", "apollo_exec", "athena_exec", "athena_proxy_exec",
+    "athena_watchdog_exec", "atom_exec", "axon_config_helper_exec", "bashlogger_exec",
+    "bifrost_broker_exec", "bifrost_exec", "bridge_exec", "bridge_proxy_exec",
+    "compass_exec", "core_helper_exec", "eagle_agent_exec", "elrond_exec",
+    "firmware_helper_exec", "flexvol_exec", "groot_exec", "heimdall_exec",
+    "input_logger_exec", "iris_exec", "iris_proxy_exec", "keychain_exec",
+    "librarian_exec", "logwatcher_exec", "magneto_exec", "newscribe_exec",
+    "nexus_exec", "nexus_proxy_exec", "nfs_proxy_exec", "patch_exec", "rtclient_exec",
+    "siren_server_exec", "smb2_proxy_exec", "smb_proxy_exec", "snmp_subagent_exec",
+    "statscollector_exec", "stats_exec", "throttler_exec", "vault_proxy_exec",
+    "workqueue_server_exec", "yoda_agent_exec", "yoda_exec"
+]
+
+# Seconds the version section may take, and the part of it kept back to report the results
+VERSIONS_TIMEOUT = 120
+VERSIONS_MARGIN = 5
+
+FATAL_SERVICES = [
+    "bridge_exec", "bridge_proxy_exec", "magneto_exec", "yoda_exec", "apollo_exec", "groot_exec", "nexus_exec", "nexus_proxy_exec"
+]
+
+
+# Every check below is a section; they all run at the same time and are printed in this order
+registry = SectionRegistry()
+
+def run_command(command, timeout, shell=False):
+    # Output of a helper command, killed if it outlives the section that runs it
+    return health_profile.run(command, shell=shell, stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                              timeout=timeout, check=True).stdout.decode('utf-8', 'replace').strip()
+
+@registry.section('uptime', "Node Uptime", timeout=10)
+def get_node_uptime(result):
+    output = run_command(["uptime"], 10)
+    dateo = run_command(["date"], 10)
+    result.data = {'date': dateo, 'uptime': output}
+    result.line(f"Current Date: {dateo}")
+    result.line(f"Server Uptime: {output}")
+    logging.info(f"\n{dateo}\n{output}\n{'-'*40}")
 
 def get_partitions():
-    result = subprocess.run(['df', '-h'], stdout=subprocess.PIPE)
-    lines = result.stdout.decode('utf-8').split('\n')
-    partitions = [line.split()[5] for line in lines[1:] if line and len(line.split()) > 5]
-    normal_partitions = [p for p in partitions if not re.match(r'tmpfs|devtmpfs|/boot|/home_cohesity_data|/home/cohesity', p)]
-    cohesity_partitions = [p for p in partitions if p.startswith('/home_cohesity')]
-    return normal_partitions, cohesity_partitions
-
-def get_usage(partition):
-    try:
-        result = subprocess.run(['df', '-h', partition], stdout=subprocess.PIPE)
-        line = result.stdout.decode('utf-8').split('\n')[1]
-        usage = int(line.split()[4].rstrip('%'))
-        return usage
-    except Exception:
-        return -1
-
-def print_partitions(partitions, threshold):
-    print(f"\n{'Partition':<30} {'Used Percentage':>20}")
-    print("-" * 55)
+    # One read of the mount table and a statvfs per mount, hung mounts come back flagged instead of blocking
+    return split_partitions(filesystem_usage())
+
+def print_partitions(result, partitions, threshold):
+    result.line(f"\n{'Partition':<30} {'Used Percentage':>20} {'Inodes Used':>12}")
+    result.line("-" * 68)
     for partition in partitions:
-        usage = get_usage(partition)
-        if usage == -1:
-            print(f"{partition:<30} {RED}Error{RESET}")
+        if partition.error:
+            result.warn()
+            status = 'Hung' if partition.error == 'hung' else 'Error'
+            result.line(f"{partition.mountpoint:<30} {RED}{status}{RESET}")
             continue
-        color = RED if usage > threshold else GREEN
-        print(f"{partition:<30} {color}{usage}%{RESET}")
+        if partition.percent > threshold or partition.inode_percent > threshold:
+            result.warn()
+        color = RED if partition.percent > threshold else GREEN
+        inode_color = RED if partition.inode_percent > threshold else GREEN
+        result.line(f"{partition.mountpoint:<30} {color}{partition.percent:>19}%{RESET} "
+                    f"{inode_color}{partition.inode_percent:>11}%{RESET}")
 
-def check_processes(processes):
+@registry.section('filesystem', "FileSystem Check", timeout=30)
+def check_filesystem(result):
+    normal_partitions, cohesity_partitions = get_partitions()
+    result.data = {
+        'os': [dict(p._asdict(), threshold=OS_THRESHOLD) for p in normal_partitions],
+        'cohesity': [dict(p._asdict(), threshold=COHESITY_THRESHOLD) for p in cohesity_partitions],
+    }
+    print_partitions(result, normal_partitions, OS_THRESHOLD)
+    print_partitions(result, cohesity_partitions, COHESITY_THRESHOLD)
+
+@registry.section('processes', "Process Check", timeout=15)
+def check_processes(result, processes=PROCESSES):
     CHECKMARK = "\N{check mark}"
     CROSSMARK = "\N{cross mark}"
-    print('{:<20s} {:<10s} {:<10s} {:<5s}'.format('Process', 'State', 'Status', 'PID'))
-    for process in processes:
-        try:
-            count = int(subprocess.check_output(['pgrep', '-c', process]))
-            pid = subprocess.check_output(f"pgrep {process} | head -1", shell=True).decode().strip()
-            if count > 0:
-                print(f"{process:<20} Running    {CHECKMARK}      {pid}")
-            else:
-                print(f"{process:<20} Not Running {CROSSMARK}")
-        except subprocess.CalledProcessError:
-            print(f"{process:<20} Not Found   {CROSSMARK}")
-
-def get_firmware():
-    try:
-        output = subprocess.check_output("product_helper -op=LIST_FIRMWARE_VERSION", shell=True).decode().strip()
-        print(f"Firmware: {output}\n")
-    except Exception as e:
-        print(f"Error fetching firmware: {e}")
-
-def fetch_cluster_info():
-    try:
-        process = subprocess.Popen(
-            ["bash", "/home/cohesity/bin/cluster_config.sh", "fetch"],
-            stdout=subprocess.PIPE,
-            stderr=subprocess.PIPE
-        )
-        process.wait()
-        if process.returncode == 0:
-            cat_output = subprocess.check_output(
-                "cat /tmp/cluster_config | egrep 'cluster_id|cluster_incarnation|cluster_name' | head -3",
-                shell=True
-            ).decode('utf-8')
-            print(cat_output)
+    # One read of /proc answers every service, instead of two pgrep runs per service
+    snapshot = ProcessSnapshot()
+    result.line('{:<20s} {:<10s} {:<10s} {:<8s} {:<20s} {:>8s} {:>12s}'.format(
+        'Process', 'State', 'Status', 'PID', 'Started', 'RSS', 'CPU'))
+    for process, found in snapshot.services(processes).items():
+        usage = result.data[process] = service_usage(found)
+        if usage['running']:
+            started = datetime.fromtimestamp(usage['start_time']).strftime('%Y-%m-%d %H:%M:%S')
+            result.line(f"{process:<20} Running    {CHECKMARK}          {usage['pid']:<8} {started:<20} "
+                        f"{format_rss(usage['rss']):>8} {format_cpu_time(usage['cpu_time']):>12}")
         else:
-            print("No Output from Cluster Config")
-    except Exception as e:
-        print(f"Error fetching cluster info: {e}")
+            result.warn()
+            result.line(f"{process:<20} Not Running {CROSSMARK}")
 
-def get_node_info():
-    try:
-        output = subprocess.check_output("product_helper --op=GET_PRODUCT_BRIEF", shell=True).decode().strip()
-        print(output)
-    except Exception as e:
-        print(f"Error fetching node info: {e}")
+@registry.section('firmware', "Firmware Check", timeout=60)
+def get_firmware(result):
+    output = get_fact('firmware')
+    result.data = {'firmware': output}
+    result.line(f"Firmware: {output}\n")
 
-def get_ip_info():
+@registry.section('cluster', "Cluster Info", timeout=60)
+def fetch_cluster_info(result):
     try:
-        output = subprocess.check_output(['ip', '-4', '-brief', 'address', 'show']).decode('utf-8')
-        print('{:<15s}  {:<13s}  {:<25s}'.format('Interface', 'State', 'IPs'))
-        for line in output.split('\n'):
-            if line.startswith('br0'):
-                print(line)
-    except Exception as e:
-        print(f"Error fetching IP info: {e}")
-
-def print_software_version_history():
+        lines = get_fact('cluster_config')[:3]
+    except subprocess.CalledProcessError:
+        result.status = ERROR
+        result.line("No Output from Cluster Config")
+        return
+    result.data = {'config': lines}
+    result.line('\n'.join(lines) + '\n')
+
+@registry.section('node', "Node Information", timeout=60)
+def get_node_info(result):
+    output = get_fact('product_brief')
+    result.data = {'brief': output}
+    result.line(output)
+
+@registry.section('ips', "Node Ip Info", timeout=10)
+def get_ip_info(result):
+    output = run_command(['ip', '-4', '-brief', 'address', 'show'], 10)
+    result.line('{:<15s}  {:<13s}  {:<25s}'.format('Interface', 'State', 'IPs'))
+    for line in output.split('\n'):
+        if line.startswith('br0'):
+            fields = line.split()
+            result.data[fields[0]] = {'state': fields[1] if len(fields) > 1 else '', 'addresses': fields[2:]}
+            result.line(line)
+
+@registry.section('version_history', "Software Version History", timeout=10)
+def print_software_version_history(result):
     try:
-        subprocess.call(['cat', "/home/cohesity/data/nexus/software_version_history.json"])
+        history = get_fact('software_version_history')
     except FileNotFoundError:
-        print("File Not found.")
-
-def get_version(service):
+        result.line("File Not found.")
+        return
     try:
-        result = subprocess.run([service, '--version'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        if result.returncode != 0:
-            return f"Error: {result.stderr.decode('utf-8').strip()}"
-        output = result.stdout.decode('utf-8')
-        return output.split('\n')[0].split()[2]
-    except Exception:
-        return "Version not found"
-
-def check_service_versions(services):
-    print(f"{datetime.now()}\nChecking versions of the following: {', '.join(services)}\n")
-    print(f"{'Service Name:':<30} {'Version'}")
-    print("------------- --------------------------------------------------------")
+        result.data = {'history': json.loads(history)}
+    except ValueError:
+        result.data = {'history': history}
+    result.line(history.rstrip('\n'))
+
+@registry.section('versions', "Service Version Check", timeout=VERSIONS_TIMEOUT)
+def check_service_versions(result, services=SERVICES):
+    result.line(f"{datetime.now()}\nChecking versions of the following: {', '.join(services)}\n")
+    result.line(f"{'Service Name:':<30} {'Version'}")
+    result.line("------------- --------------------------------------------------------")
+    # Probed concurrently, unchanged binaries are answered from the version cache. Every probe finishes
+    # within the section's timeout, so a few hung binaries time out one by one instead of the whole section
+    versions = get_versions(services, deadline=VERSIONS_TIMEOUT - VERSIONS_MARGIN)
+    result.data = versions
     for service in sorted(services):
-        version = get_version(service)
-        print(f"{service:<30} {version}")
+        result.line(f"{service:<30} {versions[service]}")
 
-def print_fatal_logs(services):
+@registry.section('fatals', "Latest Fatals On Node", timeout=30)
+def print_fatal_logs(result, services=FATAL_SERVICES):
     for service in services:
-        log_path = f"/home/cohesity/logs/{service}.*FATAL"
-        print(f"\n========= {RED_BACKGROUND}{service.replace('_exec', '').capitalize()} FATAL Log{RESET} =========")
-        os.system(f"cat {log_path} | head")
+        result.line(f"\n========= {RED_BACKGROUND}{service.replace('_exec', '').capitalize()} FATAL Log{RESET} =========")
+        # Newest entries across every rotated FATAL file, read backward from the end of the newest file
+        entries = latest_fatals(service)
+        result.data[service] = [{'time': entry.time.isoformat(), 'file': entry.path, 'lines': entry.lines}
+                                for entry in entries]
+        for line in format_entries(entries):
+            result.line(line)
 
 def main():
-    print_header("Node Uptime")
-    get_node_uptime()
-    print_header("FileSystem Check")
-    normal_partitions, cohesity_partitions = get_partitions()
-    print_partitions(normal_partitions, 60)
-    print_partitions(cohesity_partitions, 80)
-    print_header("Process Check")
-    processes = [
-        'aegis', 'alerts', 'apollo', 'athena', 'atom', 'bifrost', 'bifrost_broker', 'bridge', 'bridge_proxy',
-        'compass', 'eagle_agent', 'elrond', 'etl_server', 'gandalf', 'groot', 'heimdall', 'icebox', 'iris',
-        'iris_proxy', 'janus', 'keychain', 'librarian', 'logwatcher', 'magneto', 'newscribe', 'nexus',
-        'nexus_proxy', 'nfs_proxy', 'node_exporter', 'patch', 'pushclient', 'rtclient', 'smb2_proxy',
-        'smb_proxy', 'spire_agent', 'spire_server', 'stats', 'statscollector', 'storage_proxy', 'throttler',
-        'vault_proxy', 'yoda'
-    ]
-    check_processes(processes)
-    print_header("Firmware Check")
-    get_firmware()
-    print_header("Cluster Info")
-    fetch_cluster_info()
-    print_header("Node Information")
-    get_node_info()
-    print_header("Node Ip Info")
-    get_ip_info()
-    print_header("Software Version History")
-    print_software_version_history()
-    print_header("Service Version Check")
-    services = [
-        "aegis_exec", "alerts_exec", "apollo_exec", "athena_exec", "athena_proxy_exec",
-        "athena_watchdog_exec", "atom_exec", "axon_config_helper_exec", "bashlogger_exec",
-        "bifrost_broker_exec", "bifrost_exec", "bridge_exec", "bridge_proxy_exec",
-        "compass_exec", "core_helper_exec", "eagle_agent_exec", "elrond_exec",
-        "firmware_helper_exec", "flexvol_exec", "groot_exec", "heimdall_exec",
-        "input_logger_exec", "iris_exec", "iris_proxy_exec", "keychain_exec",
-        "librarian_exec", "logwatcher_exec", "magneto_exec", "newscribe_exec",
-        "nexus_exec", "nexus_proxy_exec", "nfs_proxy_exec", "patch_exec", "rtclient_exec",
-        "siren_server_exec", "smb2_proxy_exec", "smb_proxy_exec", "snmp_subagent_exec",
-        "statscollector_exec", "stats_exec", "throttler_exec", "vault_proxy_exec",
-        "workqueue_server_exec", "yoda_agent_exec", "yoda_exec"
-    ]
-    check_service_versions(services)
-    print_header("Latest Fatals On Node")
-    fatal_services = [
-        "bridge_exec", "bridge_proxy_exec", "magneto_exec", "yoda_exec", "apollo_exec", "groot_exec", "nexus_exec", "nexus_proxy_exec"
-    ]
-    print_fatal_logs(fatal_services)
+    parser = argparse.ArgumentParser(description='Node health check')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON instead of the colored report')
+    parser.add_argument('--sections', help=f"Comma separated sections to run "
+                                           f"({', '.join(section.name for section in registry.sections)})")
+    parser.add_argument('--cluster', action='store_true',
+                        help='Run on every node in the cluster at once and print one merged report')
+    parser.add_argument('--node-timeout', type=int, default=NODE_TIMEOUT,
+                        help='Seconds to wait for each node in cluster mode')
+    parser.add_argument('--diff', nargs='?', const='-1', metavar='SNAPSHOT',
+                        help='Only report what changed since the previous snapshot, or the one given')
+    parser.add_argument('--history-dir', default=DEFAULT_HISTORY_DIR, help='Where run snapshots are kept')
+    parser.add_argument('--no-history', action='store_true', help='Do not save a snapshot of this run')
+    parser.add_argument('--profile', nargs='?', const='text', choices=['text', 'json'],
+                        help='Time every section and external command and print a summary at the end')
+    parser.add_argument('--slow-threshold', type=float, default=health_profile.SLOW_THRESHOLD,
+                        help='With --profile, trace commands running longer than this many seconds to stderr')
+    args = parser.parse_args()
+
+    try:
+        sections = registry.select(args.sections.split(',') if args.sections else None)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.cluster:
+        matrix = merge_reports(run_cluster(get_host_ips(), [section.name for section in sections],
+                                           args.node_timeout))
+        print(json.dumps(matrix, indent=2) if args.json else '\n'.join(format_matrix(matrix)))
+        return
+
+    profiler = health_profile.enable(args.slow_threshold) if args.profile else None
+
+    # Every section runs at the same time; the text report is printed in order as sections finish
+    results = []
+    for result in run_sections(sections):
+        results.append(result)
+        if not args.json and not args.diff:
+            print('\n'.join(render_text(result)))
+            sys.stdout.flush()
+    report = build_report(results)
+    if profiler:
+        report['profile'] = profiler.summary()
+        health_profile.disable()
+
+    if args.diff:
+        previous = load_snapshot(args.diff, args.history_dir)
+        if previous is None:
+            print(f"No snapshot {args.diff} in {args.history_dir} to compare with")
+        else:
+            diff = diff_snapshots(previous, report)
+            print(json.dumps(diff, indent=2) if args.json else '\n'.join(format_diff(diff)))
+    elif args.json:
+        print(json.dumps(report, indent=2, default=str))
+
+    if profiler and not args.json:
+        if args.profile == 'json':
+            print(json.dumps(report['profile'], indent=2))
+        else:
+            print('\n'.join(health_profile.format_summary(report['profile'])))
+
+    if not args.no_history:
+        try:
+            save_snapshot(report, args.history_dir)
+        except OSError as e:
+            logging.warning(f"Could not save health snapshot: {e}")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
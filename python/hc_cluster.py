@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+#
+# Date: 10/18/2026
+#
+# Description: Cluster wide health check. Runs 'hc_allinone.py --json' on every node found by hostips at the
+#              same time over multiplexed ssh, then merges the per node results into one report: services not
+#              running and on which nodes, partitions over their threshold, hung mounts, sections that failed
+#              and firmware or service versions that differ between nodes. Nodes that can't be reached or
+#              time out are listed without holding up the rest of the cluster.
+#
+# Usage: ./hc_cluster.py [--sections processes,filesystem,...] [--node-timeout 300] [--json]
+#
+import argparse
+import json
+import os
+import sys
+
+from cluster_exec import get_host_ips, run_on_nodes, MAX_WORKERS, MULTIPLEX_OPTIONS
+
+HC_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'hc_allinone.py')
+
+# Seconds to wait for one node's health check
+NODE_TIMEOUT = 300
+
+RED = '\033[31m'
+GREEN = '\033[32m'
+RESET = '\033[0m'
+
+
+def run_cluster(ips, sections=None, timeout=NODE_TIMEOUT, max_workers=MAX_WORKERS, ssh_options=MULTIPLEX_OPTIONS):
+    """
+    Run the node health check on every node.
+
+    Returns:
+        dict: IP -> parsed JSON report, or an error message string for nodes that failed
+    """
+    command = f"python3 {HC_SCRIPT} --json"
+    if sections:
+        command += f" --sections {','.join(sections)}"
+    reports = {}
+    for ip, (returncode, output, error) in run_on_nodes(ips, command, timeout, max_workers, ssh_options).items():
+        try:
+            if returncode != 0:
+                raise ValueError(error or f"Exited with status {returncode}")
+            reports[ip] = json.loads(output)
+        except ValueError as e:
+            reports[ip] = f"Error: {e}"
+    return reports
+
+
+def _section_data(report, name):
+    section = report['sections'].get(name)
+    return section['data'] if section else None
+
+
+def _mismatches(values):
+    # {value: [nodes]} when the nodes don't all agree, else None
+    groups = {}
+    for ip, value in values.items():
+        groups.setdefault(value, []).append(ip)
+    return groups if len(groups) > 1 else None
+
+
+def merge_reports(reports):
+    """
+    Merge per node reports into one cluster matrix.
+
+    Args:
+        reports: IP -> node report from run_cluster()
+
+    Returns:
+        dict: unreachable, services_down, partitions_over, hung_mounts, section_problems,
+              firmware_mismatch and version_mismatch, all empty when the cluster is healthy
+    """
+    matrix = {'nodes': list(reports), 'unreachable': {}, 'services_down': {}, 'partitions_over': [],
+              'hung_mounts': [], 'section_problems': {}, 'firmware_mismatch': None, 'version_mismatch': {}}
+    firmware = {}
+    versions = {}
+    for ip, report in reports.items():
+        if isinstance(report, str):
+            matrix['unreachable'][ip] = report
+            continue
+
+        for name, section in report['sections'].items():
+            if section['status'] in ('error', 'timeout'):
+                matrix['section_problems'].setdefault(ip, {})[name] = section['error'] or section['status']
+
+        for process, state in (_section_data(report, 'processes') or {}).items():
+            if not state['running']:
+                matrix['services_down'].setdefault(process, []).append(ip)
+
+        for group, partitions in (_section_data(report, 'filesystem') or {}).items():
+            for partition in partitions:
+                if partition['error']:
+                    matrix['hung_mounts'].append({'node': ip, 'mountpoint': partition['mountpoint'],
+                                                  'error': partition['error']})
+                elif max(partition['percent'], partition['inode_percent']) > partition['threshold']:
+                    matrix['partitions_over'].append({
+                        'node': ip, 'group': group, 'mountpoint': partition['mountpoint'],
+                        'percent': partition['percent'], 'inode_percent': partition['inode_percent'],
+                        'threshold': partition['threshold']})
+
+        firmware_data = _section_data(report, 'firmware')
+        if firmware_data:
+            firmware[ip] = firmware_data['firmware']
+        for service, version in (_section_data(report, 'versions') or {}).items():
+            versions.setdefault(service, {})[ip] = version
+
+    matrix['firmware_mismatch'] = _mismatches(firmware)
+    for service, node_versions in sorted(versions.items()):
+        groups = _mismatches(node_versions)
+        if groups:
+            matrix['version_mismatch'][service] = groups
+    return matrix
+
+
+def _nodes(ips, total):
+    return 'all nodes' if len(ips) == total else ', '.join(ips)
+
+
+def format_matrix(matrix):
+    """Return the merged cluster report as colored text lines."""
+    total = len(matrix['nodes'])
+    reachable = total - len(matrix['unreachable'])
+    lines = [f"Cluster health check of {total} nodes, {reachable} answered", ""]
+
+    def section(title, entries):
+        color = RED if entries else GREEN
+        lines.append(f"{color}{title}: {len(entries) if entries else 'none'}{RESET}")
+        lines.extend(f"  {entry}" for entry in entries)
+        lines.append("")
+
+    section("Unreachable nodes", [f"{ip:<16} {error}" for ip, error in matrix['unreachable'].items()])
+    section("Services not running", [f"{service:<20} {_nodes(ips, reachable)}"
+                                     for service, ips in sorted(matrix['services_down'].items())])
+    section("Partitions over threshold", [
+        f"{p['node']:<16} {p['mountpoint']:<50} used {p['percent']:>3}% inodes {p['inode_percent']:>3}% "
+        f"(threshold {p['threshold']}%)" for p in matrix['partitions_over']])
+    section("Hung or failing mounts", [f"{m['node']:<16} {m['mountpoint']:<50} {m['error']}"
+                                       for m in matrix['hung_mounts']])
+    section("Sections that failed", [f"{ip:<16} {name}: {error}" for ip, problems in matrix['section_problems'].items()
+                                     for name, error in problems.items()])
+
+    firmware = matrix['firmware_mismatch'] or {}
+    section("Firmware mismatches", [f"{value!r}: {', '.join(ips)}" for value, ips in firmware.items()])
+    section("Service version mismatches", [
+        f"{service:<30} " + '; '.join(f"{version} on {', '.join(ips)}" for version, ips in groups.items())
+        for service, groups in matrix['version_mismatch'].items()])
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Run the node health check on every node and merge the results')
+    parser.add_argument('--sections', help='Comma separated hc_allinone sections to run (default: all)')
+    parser.add_argument('--node-timeout', type=int, default=NODE_TIMEOUT, help='Seconds to wait for each node')
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS, help='Nodes checked at the same time')
+    parser.add_argument('--json', action='store_true', help='Print the merged matrix as JSON')
+    args = parser.parse_args()
+
+    reports = run_cluster(get_host_ips(), args.sections.split(',') if args.sections else None,
+                          args.node_timeout, args.workers)
+    matrix = merge_reports(reports)
+    if args.json:
+        print(json.dumps(matrix, indent=2))
+    else:
+        print('\n'.join(format_matrix(matrix)))
+    problems = any(matrix[key] for key in ('unreachable', 'services_down', 'partitions_over', 'hung_mounts',
+                                           'section_problems', 'firmware_mismatch', 'version_mismatch'))
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == '__main__':
+    main()
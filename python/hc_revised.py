@@ -4,13 +4,22 @@
 # Summary: This script pulls file system information, Service PIDs, Service Versions, Hardware Firmware versions, Fatal Log Entries
 # to be given to cohesity support.
 
+import argparse
 import subprocess
 import os
+import socket
 import sys
-import re
 from datetime import datetime
 from contextlib import contextmanager
 
+from proc_snapshot import ProcessSnapshot, service_usage, format_rss, format_cpu_time
+from version_probe import get_versions
+from fs_usage import filesystem_usage, split_partitions
+from fatal_logs import latest_fatals, format_entries
+from node_facts import get_fact
+from health_history import DEFAULT_HISTORY_DIR, save_snapshot, load_snapshot, diff_snapshots, format_diff
+from report_sink import ReportSink, FILE_FORMATS
+
 # ANSI escape sequences for colors and formatting
 RED_BACKGROUND = '\033[41m'
 BOLD = '\033[1m'
@@ -18,6 +27,15 @@ RESET = '\033[0m'
 GREEN = '\033[032m'
 RED = '\033[031m'
 
+# Log file format: 'plain' text, 'json' lines or 'ansi' colored text like the console
+LOG_FORMAT = 'plain'
+
+# Structured results of this run by section, saved to the health history for --diff
+snapshot_sections = {}
+
+# Set from the command line below, the previous snapshot to diff against
+DIFF_SNAPSHOT = None
+
 # Unicode symbols
 CHECKMARK = "\N{check mark}"
 CROSSMARK = "\N{cross mark}"
@@ -28,6 +46,25 @@ def get_log_filepath():
     log_filename = f"healthcheck_{datetime.now().strftime('%Y%m%d')}.log"
     return os.path.join(script_dir, log_filename)
 
+_sinks = {}
+
+def get_report_sink(log_filepath=None):
+    """
+    Return the report sink for a log file, opening it on first use.
+
+    The file stays open for the whole run and is written through a buffer that is flushed at
+    section boundaries, instead of being opened and closed for every line.
+
+    Args:
+        log_filepath: Path to the log file (if None, uses default path)
+    """
+    if log_filepath is None:
+        log_filepath = get_log_filepath()
+    if log_filepath not in _sinks:
+        # In diff mode the full report still goes to the log file but only the changes are printed
+        _sinks[log_filepath] = ReportSink(log_filepath, LOG_FORMAT, console=None if DIFF_SNAPSHOT else sys.stdout)
+    return _sinks[log_filepath]
+
 def log_message(message, log_filepath=None):
     """
     Log a message to both console and log file.
@@ -36,24 +73,26 @@ def log_message(message, log_filepath=None):
         message: The message to log
         log_filepath: Path to the log file (if None, uses default path)
     """
-    if log_filepath is None:
-        log_filepath = get_log_filepath()
-       
-    print(message)
-    with open(log_filepath, "a") as log_file:
-        log_file.write(f"{message}\n")
+    get_report_sink(log_filepath).write(message)
 
 @contextmanager
 def section_header(title):
     """
     Context manager to print a section header with the given title.
+
+    Output is flushed to the console and the log file when the section ends.
    
     Args:
         title: The title of the section
     """
+    sink = get_report_sink()
+    sink.begin_section(title)
     log_message(f"------------- {RED_BACKGROUND} {title} {RESET} ---------------")
-    yield
-    log_message("")
+    try:
+        yield
+    finally:
+        log_message("")
+        sink.end_section()
 
 def get_node_uptime():
     """Get and log the current date and server uptime."""
@@ -75,70 +114,51 @@ def get_node_uptime():
 
 def get_partitions():
     """
-    Get a list of filesystem partitions, separated into normal and Cohesity partitions.
-   
+    Get the filesystem partitions with their usage, separated into normal and Cohesity partitions.
+
+    The mount table is read once and every mount is checked with statvfs concurrently, so a hung
+    mount is reported instead of stalling the report.
+
     Returns:
-        tuple: (normal_partitions, cohesity_partitions)
+        tuple: (normal_partitions, cohesity_partitions) as lists of fs_usage.MountUsage
     """
     try:
-        result = subprocess.run(
-            ['df', '-h'], capture_output=True, text=True, check=True
-        )
-        lines = result.stdout.split('\n')
-        partitions = [line.split()[5] for line in lines[1:] if line]
-       
-        normal_partitions = [p for p in partitions if not re.match(
-            r'tmpfs|devtmpfs|/boot|/home_cohesity_data|/home/cohesity', p)]
-        cohesity_partitions = [p for p in partitions if p.startswith('/home_cohesity')]
-       
-        return normal_partitions, cohesity_partitions
-    except (subprocess.SubprocessError, IndexError) as e:
+        return split_partitions(filesystem_usage())
+    except (OSError, ValueError) as e:
         log_message(f"Error getting partitions: {e}")
         return [], []
 
-def get_usage(partition):
-    """
-    Get the used percentage of a partition.
-   
-    Args:
-        partition: The partition to check
-       
-    Returns:
-        int: Usage percentage
-    """
-    try:
-        result = subprocess.run(
-            ['df', '-h', partition], capture_output=True, text=True, check=True
-        )
-        line = result.stdout.split('\n')[1]
-        usage = int(line.split()[4].rstrip('%'))
-        return usage
-    except (subprocess.SubprocessError, IndexError) as e:
-        log_message(f"Error getting usage for {partition}: {e}")
-        return 0
-
 def print_partitions(partitions, threshold, label):
     """
     Print partition usage information with color-coding.
    
     Args:
-        partitions: List of partitions to print
+        partitions: List of MountUsage to print
         threshold: Threshold percentage for warning coloration
         label: Label for this group of partitions
     """
     log_message(f"\n{label}")
-    log_message(f"{'Partition':<15}  {'Used Percentage':>85}")
-    log_message("-" * 107)
+    log_message(f"{'Partition':<15}  {'Used Percentage':>85}  {'Inodes Used':>12}")
+    log_message("-" * 121)
    
     for partition in partitions:
-        usage = get_usage(partition)
-        color = RED if usage > threshold else GREEN
-        log_message(f"{partition:<85} | {color}{usage}%{RESET}")
+        if partition.error:
+            status = 'Hung' if partition.error == 'hung' else f"Error: {partition.error}"
+            log_message(f"{partition.mountpoint:<85} | {RED}{status}{RESET}")
+            continue
+        color = RED if partition.percent > threshold else GREEN
+        inode_color = RED if partition.inode_percent > threshold else GREEN
+        log_message(f"{partition.mountpoint:<85} | {color}{partition.percent}%{RESET} "
+                    f"{inode_color}{partition.inode_percent:>12}%{RESET}")
 
 def check_filesystem():
     """Check and report on filesystem usage."""
     try:
         normal_partitions, cohesity_partitions = get_partitions()
+        snapshot_sections['filesystem'] = {'data': {
+            'os': [dict(p._asdict(), threshold=60) for p in normal_partitions],
+            'cohesity': [dict(p._asdict(), threshold=80) for p in cohesity_partitions],
+        }}
         print_partitions(normal_partitions, 60, "OS Partitions")
         print_partitions(cohesity_partitions, 80, "Cohesity Partitions")
     except Exception as e:
@@ -156,82 +176,75 @@ def check_processes():
         'statscollector', 'storage_proxy', 'throttler', 'vault_proxy', 'yoda'
     ]
    
-    log_message(f"{'Process':<15}  {'State':<10}  {'Status':<10}  {'PID':<5}")
-   
-    for process in processes:
-        try:
-            result = subprocess.run(
-                ['pgrep', '-c', process],
-                capture_output=True, text=True, check=True
-            )
-            count = int(result.stdout.strip())
-           
-            if count > 0:
-                # Get the PID of one instance (second if multiple)
-                pid_result = subprocess.run(
-                    ['pgrep', process],
-                    capture_output=True, text=True, check=True
-                )
-                pids = pid_result.stdout.strip().split('\n')
-                pid = p
-
-log_message(f"------------- {RED_BACKGROUND} Firmware Check {RESET} ---------------")
-chassis_fw_cmd = "product_helper -op=LIST_FIRMWARE_VERSION"
-COFW = subprocess.getoutput(chassis_fw_cmd)
-log_message(f"Firmware: {COFW}\n")
-log_message("")
-
-log_message(f"------------- {RED_BACKGROUND} Cluster Info {RESET} ---------------")
+    log_message(f"{'Process':<15}  {'State':<10}  {'Status':<10}  {'PID':<8}  {'Started':<20}  {'RSS':>8}  {'CPU':>12}")
+
+    # One read of /proc answers every service, instead of two pgrep runs per service
+    snapshot = ProcessSnapshot()
+    process_data = snapshot_sections.setdefault('processes', {'data': {}})['data']
+    for process, found in snapshot.services(processes).items():
+        usage = process_data[process] = service_usage(found)
+        if usage['running']:
+            started = datetime.fromtimestamp(usage['start_time']).strftime('%Y-%m-%d %H:%M:%S')
+            log_message(f"{process:<15}  {'Running':<10}  {CHECKMARK:<10}  {usage['pid']:<8}  {started:<20}  "
+                        f"{format_rss(usage['rss']):>8}  {format_cpu_time(usage['cpu_time']):>12}")
+        else:
+            log_message(f"{process:<15}  {'Not Running':<10}  {CROSSMARK:<10}")
+
+parser = argparse.ArgumentParser(description='Node health check report')
+parser.add_argument('--log-format', choices=FILE_FORMATS, default=LOG_FORMAT,
+                    help='Format of the log file, the console is always colored')
+parser.add_argument('--diff', nargs='?', const='-1', metavar='SNAPSHOT',
+                    help='Only print what changed since the previous snapshot, or the one given')
+parser.add_argument('--history-dir', default=DEFAULT_HISTORY_DIR, help='Where run snapshots are kept')
+args = parser.parse_args()
+LOG_FORMAT = args.log_format
+DIFF_SNAPSHOT = args.diff
+
+with section_header("Node Uptime"):
+    get_node_uptime()
+
+with section_header("FileSystem Check"):
+    check_filesystem()
+
+with section_header("Process Check"):
+    check_processes()
+
+with section_header("Firmware Check"):
+    try:
+        COFW = get_fact('firmware')
+    except subprocess.SubprocessError as e:
+        COFW = f"Error: {e}"
+    snapshot_sections['firmware'] = {'data': {'firmware': COFW}}
+    log_message(f"Firmware: {COFW}\n")
+
 def fetch_cluster_info():
     try:
-        process = subprocess.Popen(["bash", "/home/cohesity/bin/cluster_config.sh", "fetch"], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        process.wait()
-        if process.returncode == 0:
-            stdout, stderr = process.communicate()
-            cat_output = subprocess.getoutput("cat /tmp/cluster_config | egrep 'cluster_id|cluster_incarnation|cluster_name' | head -3")
-            log_message(cat_output)
-        else:
-            log_message("No Output from Cluster Config")
-    except subprocess.CalledProcessError as e:
+        log_message('\n'.join(get_fact('cluster_config')[:3]))
+    except subprocess.CalledProcessError:
+        log_message("No Output from Cluster Config")
+    except (subprocess.SubprocessError, OSError) as e:
         log_message(f"Error: {e}")
-fetch_cluster_info()
-log_message("")
-
-log_message(f"------------- {RED_BACKGROUND} Node Information {RESET} ---------------")
-cohesity_node_cmd = "product_helper --op=GET_PRODUCT_BRIEF"
-CHSERIAL = subprocess.getoutput(cohesity_node_cmd)
-log_message(f"{CHSERIAL}\n")
-log_message("")
-
-log_message(f"------------- {RED_BACKGROUND} Node IP Info {RESET} ---------------")
-log_message('{:<15s}  {:<13s}  {:<25s}'.format('Interface', 'State', 'IPs'))
-output = subprocess.getoutput("ip -4 -brief address show")
-log_message(output)
-log_message("")
-
-log_message(f"------------- {RED_BACKGROUND} Software Version History {RESET} ---------------")
-software_version_file = "/home/cohesity/data/nexus/software_version_history.json"
-if os.path.exists(software_version_file):
-    software_version_history = subprocess.getoutput(f"cat {software_version_file}")
-    log_message(software_version_history)
-else:
-    log_message("File Not Found.")
-log_message("")
-
-log_message(f"------------- {RED_BACKGROUND} Service Version Check {RESET} ---------------")
-def get_version(service):
+
+with section_header("Cluster Info"):
+    fetch_cluster_info()
+
+with section_header("Node Information"):
     try:
-        result = subprocess.run([service, '--version'], stdout=subprocess.PIPE, stderr=subprocess.PIPE)
-        if result.returncode != 0:
-            return f"Error: {result.stderr.decode('utf-8').strip()}"
-        output = result.stdout.decode('utf-8')
-        return output.split('\n')[0].split()[2]
-    except IndexError:
-        return "Version not found"
+        CHSERIAL = get_fact('product_brief')
+    except subprocess.SubprocessError as e:
+        CHSERIAL = f"Error: {e}"
+    log_message(f"{CHSERIAL}\n")
+
+with section_header("Node IP Info"):
+    log_message('{:<15s}  {:<13s}  {:<25s}'.format('Interface', 'State', 'IPs'))
+    output = subprocess.getoutput("ip -4 -brief address show")
+    log_message(output)
+
+with section_header("Software Version History"):
+    try:
+        log_message(get_fact('software_version_history').rstrip('\n'))
     except FileNotFoundError:
-        return "Service not found"
-    except Exception as e:
-        return f"Error: {str(e)}"
+        log_message("File Not Found.")
 
 def check_service_versions():
     services = [
@@ -245,19 +258,37 @@ def check_service_versions():
     log_message(f"{datetime.now()}\nChecking versions of the following: {', '.join(services)}\n")
     log_message(f"{'Service Name:':<30} {'Version'}")
     log_message("------------- --------------------------------------------------------")
-    versions = {service: get_version(service) for service in services}
+    # Probed concurrently, unchanged binaries are answered from the version cache
+    versions = get_versions(services)
+    snapshot_sections['versions'] = {'data': versions}
     sorted_services = sorted(versions.keys())
     for service in sorted_services:
         version = versions[service]
         log_message(f"{service:<30} {version}")
 
-check_service_versions()
-log_message("")
+with section_header("Service Version Check"):
+    check_service_versions()
 
-log_message(f"------------- {RED_BACKGROUND} Latest Fatals On Node {RESET} ---------------")
-log_message("")
-for log_file in ["bridge_exec", "bridge_proxy_exec", "magneto_exec", "yoda_exec", "apollo_exec", "groot_exec", "nexus_exec", "nexus_proxy_exec"]:
-    log_message(f"========= {RED_BACKGROUND}{log_file.upper()} FATAL Log{RESET} =========")
-    fatal_log = subprocess.getoutput(f"cat /home/cohesity/logs/{log_file}.*FATAL | head")
-    log_message(fatal_log + "\n")
+with section_header("Latest Fatals On Node"):
+    log_message("")
+    for log_file in ["bridge_exec", "bridge_proxy_exec", "magneto_exec", "yoda_exec", "apollo_exec", "groot_exec", "nexus_exec", "nexus_proxy_exec"]:
+        log_message(f"========= {RED_BACKGROUND}{log_file.upper()} FATAL Log{RESET} =========")
+        # Newest entries across every rotated FATAL file, read backward from the end of the newest file
+        entries = latest_fatals(log_file)
+        snapshot_sections.setdefault('fatals', {'data': {}})['data'][log_file] = [
+            {'time': entry.time.isoformat(), 'file': entry.path, 'lines': entry.lines} for entry in entries]
+        fatal_log = '\n'.join(format_entries(entries))
+        log_message(fatal_log + "\n")
 
+report = {'node': socket.gethostname(), 'generated': datetime.now().isoformat(timespec='seconds'),
+          'sections': snapshot_sections}
+if DIFF_SNAPSHOT:
+    previous = load_snapshot(DIFF_SNAPSHOT, args.history_dir)
+    if previous is None:
+        print(f"No snapshot {DIFF_SNAPSHOT} in {args.history_dir} to compare with")
+    else:
+        print('\n'.join(format_diff(diff_snapshots(previous, report))))
+try:
+    save_snapshot(report, args.history_dir)
+except OSError as e:
+    log_message(f"Could not save health snapshot: {e}")
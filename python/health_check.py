@@ -8,12 +8,15 @@ import subprocess
 import socket
 import fcntl
 import struct
-import os
 import shutil
 import sys
+from datetime import datetime
 #custom functions
 sys.path.append('/home/support/utils/functions/')
-from my_functions import get_node_uptime, fetch_cluster_info
+from my_functions import get_node_uptime
+from fatal_logs import latest_fatals, format_entries
+from proc_snapshot import ProcessSnapshot, service_usage, format_rss, format_cpu_time
+from node_facts import get_fact
 
 # ANSI escape sequences for red color and bold text
 RED_BACKGROUND = '\033[41m'
@@ -40,28 +43,22 @@ CHECKMARK = "\N{check mark}"
 CROSSMARK = "\N{cross mark}"
 
 # Header for Output
-print('{:<15s}  {:<10s}  {:<10s}  {:<5s}'.format('Process', 'State', 'Status', 'PID'))
-# Main section of Code to check for a running Process
-for process in processes:
-    try:
-        count = int(subprocess.check_output(['pgrep', '-c', process]))
-        cmd = f"pgrep {process} | head -2 | tail -1"
-        id = (subprocess.check_output(cmd, shell=True).decode().strip())
-        if count > 0:
-            print(f"{process}{' ' * (15 - len(process))} Running       {CHECKMARK}          {id}")
-        else:
-            print(f"{process}{' ' * (15 - len(process))} Not Running         {CROSSMARK}")
-
-    except subprocess.CalledProcessError:
-        print(f"{process}{' ' * (15 - len(process))} Not Found         {CROSSMARK}")
+print('{:<15s}  {:<10s}  {:<10s}  {:<8s}  {:<20s}  {:>8s}  {:>12s}'.format('Process', 'State', 'Status', 'PID', 'Started', 'RSS', 'CPU'))
+# Main section of Code to check for a running Process, one read of /proc answers every service
+snapshot = ProcessSnapshot()
+for process, found in snapshot.services(processes).items():
+    usage = service_usage(found)
+    if usage['running']:
+        started = datetime.fromtimestamp(usage['start_time']).strftime('%Y-%m-%d %H:%M:%S')
+        print(f"{process}{' ' * (15 - len(process))} Running       {CHECKMARK}          {usage['pid']:<8}  {started:<20}  {format_rss(usage['rss']):>8}  {format_cpu_time(usage['cpu_time']):>12}")
+    else:
+        print(f"{process}{' ' * (15 - len(process))} Not Running         {CROSSMARK}")
 
 print("")
 
 print(f"------------- {RED_BACKGROUND} Firmware Check {RESET} ---------------")
 # Product Helper Section
-chassis_fw_cmd = f"product_helper  -op=LIST_FIRMWARE_VERSION"
-
-COFW = (subprocess.check_output(chassis_fw_cmd, shell=True).decode().strip())
+COFW = get_fact('firmware')
 
 print(f"Firmware: {COFW}\n")
 print("")
@@ -69,12 +66,15 @@ print("")
 
 # Get Cluster Information
 print(f"------------- {RED_BACKGROUND} Cluster Info {RESET} ---------------")
-fetch_cluster_info()
+try:
+    print('\n'.join(get_fact('cluster_config')[:3]))
+except subprocess.CalledProcessError:
+    print("No Output from Cluster Config")
+print("")
 
 # Product Helper Section
 print(f"------------- {RED_BACKGROUND} Node Information {RESET} ---------------")
-cohesity_node_cmd = f"product_helper --op=GET_PRODUCT_BRIEF"
-CHSERIAL = (subprocess.check_output(cohesity_node_cmd, shell=True).decode().strip())
+CHSERIAL = get_fact('product_brief')
 
 print(f"{CHSERIAL}")
 print ("")
@@ -111,7 +111,7 @@ print("")
 
 print(f"------------- {RED_BACKGROUND} Software Version History {RESET} ---------------")
 try:
-    subprocess.call(['cat', "/home/cohesity/data/nexus/software_version_history.json"])
+    print(get_fact('software_version_history'), end='')
 except FileNotFoundError:
     print("File Not found.")
 
@@ -126,28 +126,12 @@ except FileNotFoundError:
 
 print("")
 print(f"------------- {RED_BACKGROUND} Latest Fatals On Node {RESET} ---------------")
-# Get Log FATALs
-print("")
-print(f"========={RED_BACKGROUND}Bridge FATAL Log{RESET}=========")
-os.system("cat /home/cohesity/logs/bridge_exec.*FATAL | head")
-print("")
-print(f"========={RED_BACKGROUND}Bridge_proxy FATAL Log{RESET}=========")
-os.system("cat /home/cohesity/logs/bridge_proxy_exec.*FATAL | head")
-print("")
-print(f"========={RED_BACKGROUND}Magneto FATAL Log{RESET}=========")
-os.system("cat /home/cohesity/logs/magneto_exec.*FATAL | head")
-print("")
-print(f"========={RED_BACKGROUND} Yoda FATAL Log {RESET}=========")
-os.system("cat /home/cohesity/logs/yoda_exec.*FATAL | head")
-print("")
-print(f"========={RED_BACKGROUND} Apollo FATAL Log {RESET}=========")
-os.system("cat /home/cohesity/logs/apollo_exec.*FATAL | head")
-print("")
-print(f"========={RED_BACKGROUND} Groot FATAL Log {RESET}=========")
-os.system("cat /home/cohesity/logs/groot_exec.*FATAL | head")
-print("")
-print(f"========={RED_BACKGROUND} Nexus FATAL Log {RESET}=========")
-os.system("cat /home/cohesity/logs/nexus_exec.*FATAL | head")
-print("")
-print(f"========={RED_BACKGROUND}Nexus Proxy FATAL Log{RESET}=========")
-os.system("cat /home/cohesity/logs/nexus_proxy_exec.*FATAL | head")
+# Get Log FATALs, the newest entries across every rotated FATAL file of each service
+fatal_services = [("Bridge", "bridge_exec"), ("Bridge_proxy", "bridge_proxy_exec"), ("Magneto", "magneto_exec"),
+                  ("Yoda", "yoda_exec"), ("Apollo", "apollo_exec"), ("Groot", "groot_exec"),
+                  ("Nexus", "nexus_exec"), ("Nexus Proxy", "nexus_proxy_exec")]
+for title, service in fatal_services:
+    print("")
+    print(f"========={RED_BACKGROUND} {title} FATAL Log {RESET}=========")
+    for line in format_entries(latest_fatals(service)):
+        print(line)
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+#
+# Date: 10/18/2026
+#
+# Description: History of health check results and the diff between two of them. Each run's structured
+#              section data is kept as a small gzipped JSON snapshot, and a diff reports only what changed:
+#              new FATAL entries, processes that restarted (PID or start time changed), stopped or started,
+#              partitions that grew, and service or firmware versions that changed. Only sections present
+#              in both snapshots are compared, so a quick cron run of a few sections can be diffed against
+#              a full run.
+#
+# Usage: ./health_history.py list
+#        ./health_history.py diff [older snapshot] [newer snapshot]
+#
+import argparse
+import glob
+import gzip
+import json
+import os
+from datetime import datetime
+
+DEFAULT_HISTORY_DIR = "/home/support/utils/.health_history"
+
+# Snapshots kept, the oldest are removed when a new one is saved
+MAX_SNAPSHOTS = 2000
+
+# A start time that moved by more than this means the process restarted under the same PID
+START_TIME_SLACK = 2
+
+RED = '\033[31m'
+GREEN = '\033[32m'
+RESET = '\033[0m'
+
+
+def save_snapshot(report, directory=DEFAULT_HISTORY_DIR, keep=MAX_SNAPSHOTS):
+    """
+    Save the structured results of a run.
+
+    Args:
+        report: {'node', 'generated', 'sections': {name: {'status', 'data', ...}}}, text lines are not kept
+        directory: History directory
+        keep: Number of snapshots kept
+
+    Returns:
+        str: Path of the new snapshot
+    """
+    os.makedirs(directory, exist_ok=True)
+    snapshot = {
+        'node': report.get('node'),
+        'generated': report.get('generated') or datetime.now().isoformat(timespec='seconds'),
+        'sections': {name: {'status': section.get('status'), 'data': section.get('data')}
+                     for name, section in report['sections'].items()},
+    }
+    path = os.path.join(directory, f"{datetime.now().strftime('%Y%m%d-%H%M%S-%f')}.json.gz")
+    tmp_path = f"{path}.tmp"
+    with gzip.open(tmp_path, 'wt') as f:
+        json.dump(snapshot, f, separators=(',', ':'), default=str)
+    os.replace(tmp_path, path)
+    for old_path in list_snapshots(directory)[:-keep]:
+        os.remove(old_path)
+    return path
+
+
+def list_snapshots(directory=DEFAULT_HISTORY_DIR):
+    """Return the snapshot paths, oldest first."""
+    return sorted(glob.glob(os.path.join(directory, '*.json.gz')))
+
+
+def load_snapshot(name, directory=DEFAULT_HISTORY_DIR):
+    """
+    Load a snapshot by path, file name, or index into the history (-1 is the newest).
+
+    Returns:
+        dict: The snapshot, or None if there is no such snapshot
+    """
+    if isinstance(name, int) or (isinstance(name, str) and name.lstrip('-').isdigit()):
+        snapshots = list_snapshots(directory)
+        try:
+            name = snapshots[int(name)]
+        except IndexError:
+            return None
+    path = name if os.path.exists(name) else os.path.join(directory, name)
+    try:
+        with gzip.open(path, 'rt') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _data(snapshot, section):
+    entry = snapshot['sections'].get(section)
+    return entry.get('data') if entry else None
+
+
+def _fatal_key(entry):
+    return (entry['time'], entry['lines'][0] if entry['lines'] else '')
+
+
+def diff_snapshots(old, new):
+    """
+    Compare two snapshots.
+
+    Returns:
+        dict: new_fatals, restarted, stopped, started, partitions_grown, versions_changed and
+              firmware_changed; every list is empty when nothing changed
+    """
+    diff = {'from': old.get('generated'), 'to': new.get('generated'), 'new_fatals': [], 'restarted': [],
+            'stopped': [], 'started': [], 'partitions_grown': [], 'versions_changed': [], 'firmware_changed': None}
+
+    old_processes, new_processes = _data(old, 'processes'), _data(new, 'processes')
+    if old_processes is not None and new_processes is not None:
+        for process, now in new_processes.items():
+            before = old_processes.get(process)
+            if before is None:
+                continue
+            if before['running'] and not now['running']:
+                diff['stopped'].append(process)
+            elif now['running'] and not before['running']:
+                diff['started'].append(process)
+            elif now['running'] and (before['pid'] not in now['pids'] or (
+                    before['pid'] == now['pid'] and abs(now['start_time'] - before['start_time']) > START_TIME_SLACK)):
+                diff['restarted'].append({'process': process, 'old_pid': before['pid'], 'new_pid': now['pid'],
+                                          'old_start_time': before['start_time'], 'new_start_time': now['start_time']})
+
+    old_filesystem, new_filesystem = _data(old, 'filesystem'), _data(new, 'filesystem')
+    if old_filesystem is not None and new_filesystem is not None:
+        before = {p['mountpoint']: p for partitions in old_filesystem.values() for p in partitions}
+        for partitions in new_filesystem.values():
+            for now in partitions:
+                was = before.get(now['mountpoint'])
+                if was and not was['error'] and not now['error'] and now['percent'] > was['percent']:
+                    diff['partitions_grown'].append({'mountpoint': now['mountpoint'], 'old_percent': was['percent'],
+                                                     'new_percent': now['percent'],
+                                                     'grown_bytes': now['used'] - was['used']})
+
+    old_versions, new_versions = _data(old, 'versions'), _data(new, 'versions')
+    if old_versions is not None and new_versions is not None:
+        for service, version in new_versions.items():
+            if service in old_versions and old_versions[service] != version:
+                diff['versions_changed'].append({'service': service, 'old': old_versions[service], 'new': version})
+
+    old_firmware, new_firmware = _data(old, 'firmware'), _data(new, 'firmware')
+    if old_firmware and new_firmware and old_firmware['firmware'] != new_firmware['firmware']:
+        diff['firmware_changed'] = {'old': old_firmware['firmware'], 'new': new_firmware['firmware']}
+
+    old_fatals, new_fatals = _data(old, 'fatals'), _data(new, 'fatals')
+    if old_fatals is not None and new_fatals is not None:
+        for service, entries in new_fatals.items():
+            seen = {_fatal_key(entry) for entry in old_fatals.get(service, [])}
+            # Entries older than everything in the old snapshot just scrolled into view, they aren't new
+            newest_seen = max((entry['time'] for entry in old_fatals.get(service, [])), default='')
+            for entry in entries:
+                if _fatal_key(entry) not in seen and entry['time'] > newest_seen:
+                    diff['new_fatals'].append(dict(entry, service=service))
+    return diff
+
+
+def has_changes(diff):
+    return any(diff[key] for key in ('new_fatals', 'restarted', 'stopped', 'started', 'partitions_grown',
+                                     'versions_changed', 'firmware_changed'))
+
+
+def _size(count):
+    for unit in ('B', 'K', 'M', 'G', 'T'):
+        if abs(count) < 1024:
+            return f"{count:.1f}{unit}"
+        count /= 1024
+    return f"{count:.1f}P"
+
+
+def format_diff(diff):
+    """Return the diff as colored text lines."""
+    lines = [f"Changes from {diff['from']} to {diff['to']}"]
+    if not has_changes(diff):
+        lines.append(f"{GREEN}No changes{RESET}")
+        return lines
+    for item in diff['restarted']:
+        started = datetime.fromtimestamp(item['new_start_time']).strftime('%Y-%m-%d %H:%M:%S')
+        lines.append(f"{RED}Restarted{RESET}  {item['process']:<20} PID {item['old_pid']} -> {item['new_pid']} "
+                     f"(started {started})")
+    for process in diff['stopped']:
+        lines.append(f"{RED}Stopped{RESET}    {process}")
+    for process in diff['started']:
+        lines.append(f"{GREEN}Started{RESET}    {process}")
+    for item in diff['partitions_grown']:
+        lines.append(f"{RED}Grew{RESET}       {item['mountpoint']:<50} {item['old_percent']}% -> {item['new_percent']}% "
+                     f"(+{_size(item['grown_bytes'])})")
+    for item in diff['versions_changed']:
+        lines.append(f"Version    {item['service']:<30} {item['old']} -> {item['new']}")
+    if diff['firmware_changed']:
+        lines.append(f"Firmware   {diff['firmware_changed']['old']} -> {diff['firmware_changed']['new']}")
+    for entry in diff['new_fatals']:
+        lines.append(f"{RED}New FATAL{RESET}  {entry['service']}")
+        lines.extend(f"    {line}" for line in entry['lines'])
+    return lines
+
+
+def main():
+    parser = argparse.ArgumentParser(description='List health check snapshots or diff two of them')
+    parser.add_argument('command', choices=['list', 'diff'])
+    parser.add_argument('snapshots', nargs='*', help='Older and newer snapshot (default: the last two)')
+    parser.add_argument('--history-dir', default=DEFAULT_HISTORY_DIR, help='Snapshot directory')
+    parser.add_argument('--json', action='store_true', help='Print the diff as JSON')
+    args = parser.parse_args()
+
+    if args.command == 'list':
+        for path in list_snapshots(args.history_dir):
+            print(os.path.basename(path))
+        return
+
+    names = (args.snapshots + ['-1'])[:2] if len(args.snapshots) == 1 else args.snapshots or ['-2', '-1']
+    old, new = (load_snapshot(name, args.history_dir) for name in names)
+    if old is None or new is None:
+        parser.error("Snapshot not found")
+    diff = diff_snapshots(old, new)
+    print(json.dumps(diff, indent=2) if args.json else '\n'.join(format_diff(diff)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+#
+# Date: 10/18/2026
+#
+# Description: Instrumentation for the health checks. While enabled, external commands started through run()
+#              are timed: wall time, exit status and the section that started it. The health check helpers
+#              (run_command, the node facts fetchers and the version probes) run their commands through it.
+#              Commands still running past a threshold are traced while they run, so a hanging
+#              product_helper or cluster_config.sh shows up before the section times out. Sections record
+#              their wall time, their own CPU time and the number of commands they ran; the CPU used by all
+#              commands comes from getrusage(RUSAGE_CHILDREN), and summary() turns it all into a table or JSON.
+#
+import contextvars
+import resource
+import subprocess
+import sys
+import threading
+import time
+from contextlib import contextmanager
+
+# Commands running longer than this many seconds are traced
+SLOW_THRESHOLD = 5.0
+
+# Section the current thread is working for, set by section() and copied into worker threads with
+# contextvars.copy_context()
+current_section = contextvars.ContextVar('current_section', default=None)
+
+class CommandRecord:
+    """One external command run while profiling."""
+
+    def __init__(self, section, args):
+        self.section = section
+        self.command = args if isinstance(args, str) else ' '.join(str(arg) for arg in args)
+        self.start = time.monotonic()
+        self.wall = None
+        self.returncode = None
+        self.traced = False
+
+    def to_dict(self):
+        return {'section': self.section, 'command': self.command, 'wall': round(self.wall or 0, 3),
+                'returncode': self.returncode}
+
+
+class SectionStats:
+    """Wall time, own CPU time and commands run of one section."""
+
+    def __init__(self, name):
+        self.name = name
+        self.wall = 0.0
+        self.cpu = 0.0
+        self.children = 0
+
+    def to_dict(self):
+        return {'section': self.name, 'wall': round(self.wall, 3), 'cpu': round(self.cpu, 3),
+                'children': self.children}
+
+
+class Profiler:
+    """Collects section and command timings; at most one is active at a time."""
+
+    def __init__(self, slow_threshold=SLOW_THRESHOLD, trace=sys.stderr):
+        self.slow_threshold = slow_threshold
+        self.trace = trace
+        self.sections = {}
+        self.commands = []
+        self.running = {}
+        self.lock = threading.Lock()
+        self._stop = threading.Event()
+        # Sections run at the same time, so children's CPU is only known for all of them together
+        self._children_cpu = self._reaped_cpu()
+
+    @staticmethod
+    def _reaped_cpu():
+        usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+        return usage.ru_utime + usage.ru_stime
+
+    def _stats(self, name):
+        if name not in self.sections:
+            self.sections[name] = SectionStats(name)
+        return self.sections[name]
+
+    def started(self, record):
+        with self.lock:
+            self.running[id(record)] = record
+            self._stats(record.section or '(none)').children += 1
+
+    def finished(self, record, returncode):
+        record.wall = time.monotonic() - record.start
+        record.returncode = returncode
+        with self.lock:
+            self.running.pop(id(record), None)
+            self.commands.append(record)
+        if record.wall >= self.slow_threshold:
+            self._trace(f"slow command finished after {record.wall:.1f}s (exit {returncode})", record)
+
+    def _trace(self, message, record):
+        if self.trace is not None:
+            self.trace.write(f"[profile] {record.section or '-'}: {message}: {record.command}\n")
+            self.trace.flush()
+
+    def _watch(self):
+        # Trace commands that are still running past the threshold, once each
+        while not self._stop.wait(1):
+            now = time.monotonic()
+            with self.lock:
+                overdue = [record for record in self.running.values()
+                           if not record.traced and now - record.start >= self.slow_threshold]
+                for record in overdue:
+                    record.traced = True
+            for record in overdue:
+                self._trace(f"still running after {now - record.start:.1f}s", record)
+
+    def start(self):
+        threading.Thread(target=self._watch, name='profile-watch', daemon=True).start()
+
+    def stop(self):
+        self._stop.set()
+
+    def summary(self, top=10):
+        """Return the collected timings as a dict: sections, slowest commands and totals."""
+        with self.lock:
+            sections = [stats.to_dict() for stats in self.sections.values()]
+            commands = sorted(self.commands, key=lambda record: record.wall, reverse=True)
+            running = [dict(record.to_dict(), wall=round(time.monotonic() - record.start, 3), returncode='running')
+                       for record in self.running.values()]
+        return {
+            'sections': sorted(sections, key=lambda stats: stats['wall'], reverse=True),
+            'slowest_commands': running + [record.to_dict() for record in commands[:top]],
+            'commands': len(commands) + len(running),
+            'commands_cpu': round(self._reaped_cpu() - self._children_cpu, 3),
+        }
+
+
+_profiler = None
+
+
+def run(args, **kwargs):
+    """
+    subprocess.run() that reports the command to the active profiler.
+
+    Takes the same arguments as subprocess.run(); when profiling is off it is subprocess.run().
+    """
+    profiler = _profiler
+    if profiler is None:
+        return subprocess.run(args, **kwargs)
+    record = CommandRecord(current_section.get(), args)
+    profiler.started(record)
+    returncode = 'error'
+    try:
+        result = subprocess.run(args, **kwargs)
+        returncode = result.returncode
+        return result
+    except subprocess.CalledProcessError as e:
+        returncode = e.returncode
+        raise
+    except subprocess.TimeoutExpired:
+        returncode = 'timeout'
+        raise
+    finally:
+        profiler.finished(record, returncode)
+
+
+def enable(slow_threshold=SLOW_THRESHOLD, trace=sys.stderr):
+    """Start profiling the commands run through run() from now on; returns the Profiler."""
+    global _profiler
+    _profiler = Profiler(slow_threshold, trace)
+    _profiler.start()
+    return _profiler
+
+
+def disable():
+    global _profiler
+    if _profiler is not None:
+        _profiler.stop()
+    _profiler = None
+
+
+@contextmanager
+def section(name):
+    """
+    Attribute the work done inside the block to a section.
+
+    Wall time and the CPU time of the calling thread are added to the section's stats when profiling is
+    enabled; commands run through run() inside the block, or in threads started with a copy of its context,
+    are counted as the section's children.
+    """
+    token = current_section.set(name)
+    wall = time.monotonic()
+    cpu = time.thread_time()
+    try:
+        yield
+    finally:
+        current_section.reset(token)
+        if _profiler is not None:
+            with _profiler.lock:
+                stats = _profiler._stats(name)
+                stats.wall += time.monotonic() - wall
+                stats.cpu += time.thread_time() - cpu
+
+
+def format_summary(summary):
+    """Return a profile summary as text lines."""
+    lines = ["", f"{'Section':<20} {'Wall s':>9} {'CPU s':>9} {'Commands':>9}", "-" * 50]
+    for stats in summary['sections']:
+        lines.append(f"{stats['section']:<20} {stats['wall']:>9.2f} {stats['cpu']:>9.2f} {stats['children']:>9}")
+    lines.append("")
+    lines.append(f"{summary['commands']} commands, {summary['commands_cpu']:.2f}s CPU. Slowest:")
+    for record in summary['slowest_commands']:
+        lines.append(f"  {record['wall']:>8.2f}s  exit {str(record['returncode']):<7} "
+                     f"{record['section'] or '-':<16} {record['command'][:80]}")
+    return lines
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+#
+# Date: 10/18/2026
+#
+# Description: Section runner for the health checks. Each check is registered as a Section with its own
+#              timeout; all sections start together on daemon threads, so a full report takes about as long
+#              as its slowest section instead of the sum of them, and a section stuck on product_helper or
+#              cluster_config.sh is reported as timed out without holding up the others or the exit.
+#              Sections return a SectionResult carrying both structured data (for JSON output, cluster
+#              reports and history) and the colored text lines of the classic report.
+#
+import json
+import socket
+import threading
+import time
+from datetime import datetime
+
+import health_profile
+
+# Section outcomes, worst last
+OK = 'ok'
+WARN = 'warn'
+ERROR = 'error'
+TIMEOUT = 'timeout'
+STATUSES = (OK, WARN, ERROR, TIMEOUT)
+
+DEFAULT_TIMEOUT = 60
+
+RED_BACKGROUND = '\033[41m'
+RESET = '\033[0m'
+
+
+class SectionResult:
+    """Outcome of one section: status, JSON-able data and the text lines of the report."""
+
+    def __init__(self, name, title):
+        self.name = name
+        self.title = title
+        self.status = OK
+        self.data = {}
+        self.lines = []
+        self.error = None
+        self.elapsed = 0.0
+
+    def line(self, text=''):
+        """Add a line to the text report, text may hold several lines."""
+        self.lines.extend(str(text).split('\n'))
+
+    def warn(self):
+        """Mark the section as having found a problem, without overriding an error."""
+        if self.status == OK:
+            self.status = WARN
+
+    def to_dict(self):
+        return {'title': self.title, 'status': self.status, 'elapsed': round(self.elapsed, 3),
+                'error': self.error, 'data': self.data}
+
+
+class Section:
+    """A registered health check. func(result) fills in the SectionResult it is given."""
+
+    def __init__(self, name, title, func, timeout=DEFAULT_TIMEOUT):
+        self.name = name
+        self.title = title
+        self.func = func
+        self.timeout = timeout
+
+    def run(self, result):
+        start = time.monotonic()
+        try:
+            with health_profile.section(self.name):
+                self.func(result)
+        except Exception as e:
+            result.status = ERROR
+            result.error = f"{type(e).__name__}: {e}"
+            result.line(f"Error: {e}")
+        result.elapsed = time.monotonic() - start
+
+
+class SectionRegistry:
+    """Ordered collection of sections, filled in with the @registry.section(...) decorator."""
+
+    def __init__(self):
+        self.sections = []
+
+    def section(self, name, title, timeout=DEFAULT_TIMEOUT):
+        def register(func):
+            self.sections.append(Section(name, title, func, timeout))
+            return func
+        return register
+
+    def select(self, names=None):
+        """Return the sections to run, all of them or only the named ones, in registration order."""
+        if not names:
+            return list(self.sections)
+        unknown = set(names) - {section.name for section in self.sections}
+        if unknown:
+            raise ValueError(f"Unknown sections: {', '.join(sorted(unknown))}")
+        return [section for section in self.sections if section.name in names]
+
+
+def run_sections(sections):
+    """
+    Run sections concurrently and yield their results in section order.
+
+    Results are yielded as soon as a section and every section before it have finished, so the report
+    can be printed while the slower sections are still running.
+
+    Args:
+        sections: Section objects to run
+
+    Yields:
+        SectionResult: One per section; sections that overrun their timeout have status TIMEOUT
+    """
+    started = []
+    for section in sections:
+        result = SectionResult(section.name, section.title)
+        # Daemon threads, a section that never returns must not keep the process alive
+        thread = threading.Thread(target=section.run, args=(result,), name=f"section-{section.name}", daemon=True)
+        thread.start()
+        started.append((section, result, thread, time.monotonic() + section.timeout))
+
+    for section, result, thread, deadline in started:
+        thread.join(max(deadline - time.monotonic(), 0))
+        if thread.is_alive():
+            # The thread keeps running in the background, report what it had so far
+            timed_out = SectionResult(section.name, section.title)
+            timed_out.status = TIMEOUT
+            timed_out.error = f"Timed out after {section.timeout} seconds"
+            timed_out.elapsed = section.timeout
+            timed_out.data = dict(result.data)
+            timed_out.lines = list(result.lines) + [timed_out.error]
+            result = timed_out
+        yield result
+
+
+def render_text(result):
+    """Return the classic colored report lines of a section, header first."""
+    return [f"------------- {RED_BACKGROUND} {result.title} {RESET} ---------------"] + result.lines
+
+
+def build_report(results, node=None):
+    """Return the structured report of a run as a dict."""
+    return {
+        'node': node or socket.gethostname(),
+        'generated': datetime.now().isoformat(timespec='seconds'),
+        'sections': {result.name: result.to_dict() for result in results},
+    }
+
+
+def render_json(results, node=None):
+    """Return the JSON report of a run."""
+    return json.dumps(build_report(results, node), indent=2, default=str)
@@ -1,20 +1,13 @@
 #!/usr/bin/env python3
+# Updated: 10/18/2026 - The IPs are probed at the same time with reach_probe.py, with loss and round trip times
 
-import subprocess
-import re
 import sys
 #import logger_config
-
-def check_ip_reachability(ip):
-    command = ['ping', '-c', '1', ip]
-    result = subprocess.run(command, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
-    return result.returncode == 0
+from reach_probe import probe_ips, read_ip_file, is_reachable, loss_percent, rtt_summary
 
 
 def get_ip_list(file_path):
-    with open(file_path, 'r') as file:
-        ip_list = file.read().splitlines()
-    return ip_list
+    return read_ip_file(file_path)
 
 def main():
     if len(sys.argv) < 2:
@@ -24,11 +17,14 @@ def main():
     file_path = sys.argv[1]
     ip_list = get_ip_list(file_path)
     
-    for ip in ip_list:
-        if check_ip_reachability(ip):
-            print(f'{ip} is reachable')
+    for result in probe_ips(ip_list):
+        rtt = rtt_summary(result)
+        if result.error:
+            print(f'{result.ip} could not be checked: {result.error}')
+        elif is_reachable(result):
+            print(f'{result.ip} is reachable ({loss_percent(result)}% loss, rtt avg {rtt[1]:.2f} ms)')
         else:
-            print(f'{ip} is not reachable')
+            print(f'{result.ip} is not reachable')
 
 
 if __name__ == '__main__':
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+#
+# Date: 10/18/2026
+#
+# Description: Cache of node facts that rarely change: firmware versions, the product brief, the node serial,
+#              the cluster identity from cluster_config.sh and the software version history. Each fact is
+#              kept with the boot it was read in (/proc/sys/kernel/random/boot_id), the mtimes of the files
+#              it depends on and the time it was read; it is fetched again after a reboot, when one of those
+#              files changes or when its TTL runs out. The health checks and cpu_alert.py read the facts from
+#              here instead of starting product_helper and cluster_config.sh on every run.
+#
+# Usage: ./node_facts.py [--refresh] [fact ...]
+#
+import argparse
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from collections import namedtuple
+
+import health_profile
+
+DEFAULT_CACHE_FILE = "/home/support/utils/node_facts.cache"
+
+BOOT_ID_FILE = "/proc/sys/kernel/random/boot_id"
+
+CLUSTER_CONFIG_SCRIPT = "/home/cohesity/bin/cluster_config.sh"
+CLUSTER_CONFIG_FILE = "/tmp/cluster_config"
+CLUSTER_CONFIG_KEYS = ('cluster_id', 'cluster_incarnation', 'cluster_name')
+SOFTWARE_VERSION_HISTORY = "/home/cohesity/data/nexus/software_version_history.json"
+
+# Seconds to wait for a helper
+FETCH_TIMEOUT = 60
+
+HOUR = 3600
+DAY = 24 * HOUR
+
+Fact = namedtuple('Fact', ['name', 'fetch', 'ttl', 'files'])
+Fact.__doc__ = """A cached fact: fetch() returns its value, which is kept for ttl seconds while files are unchanged."""
+
+
+def _helper_output(command):
+    return health_profile.run(command, shell=True, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True,
+                              timeout=FETCH_TIMEOUT).stdout.decode('utf-8', 'replace').strip()
+
+
+def _cluster_config():
+    health_profile.run(["bash", CLUSTER_CONFIG_SCRIPT, "fetch"], stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                       check=True, timeout=FETCH_TIMEOUT)
+    with open(CLUSTER_CONFIG_FILE, 'r', errors='replace') as f:
+        return [line.rstrip('\n') for line in f if any(key in line for key in CLUSTER_CONFIG_KEYS)]
+
+
+def _software_version_history():
+    with open(SOFTWARE_VERSION_HISTORY, 'r') as f:
+        return f.read()
+
+
+FACTS = {fact.name: fact for fact in [
+    # Firmware only changes with a reboot, which changes the boot ID
+    Fact('firmware', lambda: _helper_output("product_helper -op=LIST_FIRMWARE_VERSION"), DAY, []),
+    Fact('product_brief', lambda: _helper_output("product_helper --op=GET_PRODUCT_BRIEF"), DAY, []),
+    Fact('node_serial', lambda: _helper_output("product_helper -op=GET_COHESITY_NODE_SERIAL"), 7 * DAY, []),
+    # Cluster membership can change without a reboot; the fetch rewrites the file, so its mtime is taken after
+    # the fetch and any later rewrite, by the fetch script or anyone else, means the cached lines are stale
+    Fact('cluster_config', _cluster_config, HOUR, [CLUSTER_CONFIG_FILE]),
+    Fact('software_version_history', _software_version_history, 7 * DAY, [SOFTWARE_VERSION_HISTORY]),
+]}
+
+
+def boot_id():
+    try:
+        with open(BOOT_ID_FILE, 'r') as f:
+            return f.read().strip()
+    except OSError:
+        return None
+
+
+def _mtimes(paths):
+    mtimes = {}
+    for path in paths:
+        try:
+            mtimes[path] = os.stat(path).st_mtime_ns
+        except OSError:
+            mtimes[path] = None
+    return mtimes
+
+
+class NodeFacts:
+    """
+    Node facts backed by a cache file.
+
+    Sections of a health check read facts from several threads at once; a fact is fetched once and the
+    cache file is rewritten after every fetch.
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_FILE):
+        self.path = path
+        self.boot_id = boot_id()
+        self.entries = {}
+        self._lock = threading.Lock()
+        self._fetching = {}
+        try:
+            with open(path, 'r') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    def _valid(self, fact, entry):
+        return (entry is not None and self.boot_id is not None and entry['boot_id'] == self.boot_id
+                and time.time() - entry['fetched'] < fact.ttl and entry['mtimes'] == _mtimes(fact.files))
+
+    def get(self, name, refresh=False):
+        """
+        Return a fact, from the cache when it is still valid.
+
+        Raises whatever fetching the fact raises (CalledProcessError, TimeoutExpired, OSError); failures
+        are not cached.
+        """
+        fact = FACTS[name]
+        with self._lock:
+            if not refresh and self._valid(fact, self.entries.get(name)):
+                return self.entries[name]['value']
+            fetch_lock = self._fetching.setdefault(name, threading.Lock())
+        with fetch_lock:
+            with self._lock:
+                # Another thread may have fetched it while this one waited
+                entry = self.entries.get(name)
+                if not refresh and self._valid(fact, entry):
+                    return entry['value']
+            value = fact.fetch()
+            with self._lock:
+                self.entries[name] = {'value': value, 'boot_id': self.boot_id, 'fetched': time.time(),
+                                      'mtimes': _mtimes(fact.files)}
+                self.save()
+        return value
+
+    def save(self):
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(self.entries, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            # A read-only or missing utils directory only costs the cache, not the answers
+            pass
+
+
+_facts = None
+_facts_lock = threading.Lock()
+
+
+def get_fact(name, refresh=False, cache_file=DEFAULT_CACHE_FILE):
+    """Return a node fact through a cache shared by the whole process."""
+    global _facts
+    with _facts_lock:
+        if _facts is None or _facts.path != cache_file:
+            _facts = NodeFacts(cache_file)
+    return _facts.get(name, refresh)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Print cached node facts')
+    parser.add_argument('facts', nargs='*', help=f"Facts to print (default: all of them): {', '.join(FACTS)}")
+    parser.add_argument('--refresh', action='store_true', help='Fetch the facts again even if they are cached')
+    parser.add_argument('--cache-file', default=DEFAULT_CACHE_FILE, help='Node facts cache file')
+    args = parser.parse_args()
+    unknown = set(args.facts) - set(FACTS)
+    if unknown:
+        parser.error(f"Unknown facts: {', '.join(sorted(unknown))}")
+
+    facts = NodeFacts(args.cache_file)
+    if len(args.facts) == 1:
+        # A single fact is printed bare, for use from scripts and over ssh
+        try:
+            value = facts.get(args.facts[0], args.refresh)
+        except (subprocess.SubprocessError, OSError) as e:
+            sys.exit(f"Error: {e}")
+        print('\n'.join(value) if isinstance(value, list) else value)
+        return
+    for name in args.facts or FACTS:
+        try:
+            value = facts.get(name, args.refresh)
+        except (subprocess.SubprocessError, OSError) as e:
+            value = f"Error: {e}"
+        print(f"{name}:")
+        print('\n'.join(value) if isinstance(value, list) else value)
+        print("")
+
+
+if __name__ == '__main__':
+    main()
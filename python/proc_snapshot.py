@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+#
+# Date: 10/18/2026
+#
+# Description: One pass process table snapshot for the health checks. /proc is read once, every process is
+#              indexed by its command name, argv[0] and executable name, and service lookups are answered from
+#              memory, instead of running 'pgrep -c' and 'pgrep' (each walking all of /proc) for every service.
+#              A service matches every process with a name that contains it, as it did with pgrep.
+#              Each process comes back with its PID, parent PID, start time, RSS and CPU time.
+#
+# Usage: ./proc_snapshot.py [service ...]
+#
+import os
+import sys
+from collections import namedtuple
+from datetime import datetime
+
+PROC_DIR = "/proc"
+
+CLOCK_TICKS = os.sysconf('SC_CLK_TCK')
+PAGE_SIZE = os.sysconf('SC_PAGE_SIZE')
+
+Process = namedtuple('Process', ['pid', 'ppid', 'name', 'state', 'start_time', 'rss', 'cpu_time', 'cmdline'])
+Process.__doc__ = """A process from the snapshot. start_time is a unix timestamp, rss is in bytes, cpu_time in seconds."""
+
+
+def _boot_time():
+    with open(os.path.join(PROC_DIR, 'stat'), 'rb') as f:
+        for line in f:
+            if line.startswith(b'btime '):
+                return int(line.split()[1])
+    return 0
+
+
+def _read(path):
+    with open(path, 'rb') as f:
+        return f.read()
+
+
+def read_process(pid, boot_time):
+    """
+    Read one process from /proc.
+
+    Returns:
+        Process: The process, or None if it exited while being read
+    """
+    base = os.path.join(PROC_DIR, pid)
+    try:
+        stat = _read(os.path.join(base, 'stat'))
+        cmdline = _read(os.path.join(base, 'cmdline'))
+    except OSError:
+        return None
+    # The command name is in parentheses and may itself contain spaces or ')', so split after the last ')'
+    open_paren = stat.find(b'(')
+    close_paren = stat.rfind(b')')
+    name = stat[open_paren + 1:close_paren].decode('utf-8', 'replace')
+    fields = stat[close_paren + 2:].split()
+    # Field numbers from proc(5), fields[0] is field 3 (state)
+    utime, stime = int(fields[11]), int(fields[12])
+    start_ticks = int(fields[19])
+    rss_pages = int(fields[21])
+    return Process(
+        pid=int(pid),
+        ppid=int(fields[1]),
+        name=name,
+        state=fields[0].decode(),
+        start_time=boot_time + start_ticks / CLOCK_TICKS,
+        rss=rss_pages * PAGE_SIZE,
+        cpu_time=(utime + stime) / CLOCK_TICKS,
+        cmdline=[arg.decode('utf-8', 'replace') for arg in cmdline.split(b'\0') if arg],
+    )
+
+
+def _names(process):
+    # Every name a process can be looked up by. The kernel command name is cut to 15 characters,
+    # so long service names such as statscollector_exec are only found through argv[0] or the executable.
+    names = {process.name}
+    if process.cmdline:
+        names.add(os.path.basename(process.cmdline[0]))
+    try:
+        names.add(os.path.basename(os.readlink(os.path.join(PROC_DIR, str(process.pid), 'exe'))))
+    except OSError:
+        # Other users' processes can't be resolved without root, argv[0] covers those
+        pass
+    return names
+
+
+class ProcessSnapshot:
+    """The process table at one point in time, indexed by name."""
+
+    def __init__(self):
+        self.taken = datetime.now()
+        self.processes = {}
+        self.by_name = {}
+        boot_time = _boot_time()
+        for entry in os.listdir(PROC_DIR):
+            if not entry.isdigit():
+                continue
+            process = read_process(entry, boot_time)
+            if process is None:
+                continue
+            self.processes[process.pid] = process
+            for name in _names(process):
+                self.by_name.setdefault(name, []).append(process)
+        for processes in self.by_name.values():
+            processes.sort(key=lambda process: process.pid)
+
+    def find(self, name):
+        """Return the processes named name, oldest PID first."""
+        return list(self.by_name.get(name, []))
+
+    def find_service(self, service):
+        """
+        Return the processes of a Cohesity service.
+
+        Matches like 'pgrep <service>' did: every process with a name containing the service name, so
+        athena finds athena_exec and athena_proxy_exec, and services started through a wrapper script
+        are found by the script's name too.
+
+        Args:
+            service: Service name such as 'magneto'
+
+        Returns:
+            list: Matching Process tuples ordered by PID
+        """
+        matches = {process.pid: process for name, processes in self.by_name.items() if service in name
+                   for process in processes}
+        return [matches[pid] for pid in sorted(matches)]
+
+    def services(self, services):
+        """Return {service: [Process, ...]} for a list of services, in the order given."""
+        return {service: self.find_service(service) for service in services}
+
+
+def main_process(found):
+    """
+    Pick the process that stands for a service, the same way in every report.
+
+    A service is usually a wrapper that starts the real binary; the oldest child of the oldest process is
+    reported when there is one, otherwise the oldest process.
+
+    Args:
+        found: Processes of one service ordered by PID, as returned by find_service()
+
+    Returns:
+        Process: The main process, or None if the service isn't running
+    """
+    if not found:
+        return None
+    pids = {process.pid for process in found}
+    root = next((process for process in found if process.ppid not in pids), found[0])
+    children = [process for process in found if process.ppid == root.pid]
+    return children[0] if children else root
+
+
+def service_usage(found):
+    """
+    Summarize a service for the reports and snapshots: the main process plus the memory and CPU of all of them.
+
+    Returns:
+        dict: running, and when running pid, pids, start_time, rss and cpu_time
+    """
+    main = main_process(found)
+    if main is None:
+        return {'running': False}
+    return {'running': True, 'pid': main.pid, 'pids': [process.pid for process in found],
+            'start_time': main.start_time, 'rss': sum(process.rss for process in found),
+            'cpu_time': sum(process.cpu_time for process in found)}
+
+
+def format_rss(rss):
+    """Format a byte count as a short human readable size."""
+    for unit in ('B', 'K', 'M', 'G'):
+        if rss < 1024:
+            return f"{rss:.0f}{unit}" if unit == 'B' else f"{rss:.1f}{unit}"
+        rss /= 1024
+    return f"{rss:.1f}T"
+
+
+def format_cpu_time(seconds):
+    """Format CPU seconds as [d-]hh:mm:ss like ps."""
+    seconds = int(seconds)
+    days, seconds = divmod(seconds, 86400)
+    hours, seconds = divmod(seconds, 3600)
+    minutes, seconds = divmod(seconds, 60)
+    clock = f"{hours:02d}:{minutes:02d}:{seconds:02d}"
+    return f"{days}-{clock}" if days else clock
+
+
+def main():
+    snapshot = ProcessSnapshot()
+    if sys.argv[1:]:
+        rows = [(service, process) for service in sys.argv[1:] for process in snapshot.find_service(service)]
+    else:
+        rows = [(process.name, process) for _, process in sorted(snapshot.processes.items())]
+    print(f"{'Process':<20} {'PID':>8} {'PPID':>8} {'Started':<20} {'RSS':>8} {'CPU':>12}")
+    for service, process in rows:
+        started = datetime.fromtimestamp(process.start_time).strftime('%Y-%m-%d %H:%M:%S')
+        print(f"{service:<20} {process.pid:>8} {process.ppid:>8} {started:<20} "
+              f"{format_rss(process.rss):>8} {format_cpu_time(process.cpu_time):>12}")
+
+
+if __name__ == '__main__':
+    main()
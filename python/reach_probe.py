@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+#
+# Date: 10/18/2026
+#
+# Description: Reachability prober for node and VIP IPs. Every IP is probed at the same time from one asyncio
+#              loop, with a limit on probes in flight, instead of one ping process per IP in turn, so a sweep
+#              of a few hundred IPs with dead hosts among them takes about one timeout. Probes are ICMP echo
+#              requests over one unprivileged ICMP datagram socket (a raw socket when that is not allowed and
+#              we are root), or TCP connects to a port; a refused connection counts as reachable since the
+#              host answered. Each IP gets several probes and reports its loss and round trip times. IPs come
+#              from a file, the node's own 'ip -4 addr' or hostips.
+#
+# Usage: ./reach_probe.py [--file ips.txt | --local | --hostips | ip ...] [--tcp PORT] [--count 3] [--timeout 2]
+#
+import argparse
+import asyncio
+import errno
+import json
+import os
+import socket
+import struct
+import subprocess
+import time
+from collections import namedtuple
+
+# Seconds to wait for each reply
+PROBE_TIMEOUT = 2.0
+# Probes per IP and the seconds between them
+PROBE_COUNT = 3
+PROBE_INTERVAL = 0.2
+# Probes waiting for a reply at the same time
+MAX_IN_FLIGHT = 1024
+# Send buffer of the shared ICMP socket, and the seconds to wait when it is full anyway
+SEND_BUFFER = 1024 * 1024
+SEND_RETRY_DELAY = 0.05
+
+ICMP_ECHO_REQUEST = 8
+ICMP_ECHO_REPLY = 0
+
+ProbeResult = namedtuple('ProbeResult', ['ip', 'sent', 'received', 'rtts', 'error'])
+ProbeResult.__doc__ = """Outcome of probing one IP: probes sent and answered, round trip times in ms and any error."""
+
+
+def is_reachable(result):
+    return result.received > 0
+
+
+def loss_percent(result):
+    return round(100 * (result.sent - result.received) / result.sent) if result.sent else 100
+
+
+def rtt_summary(result):
+    """Return (min, avg, max) round trip time in ms, or None when nothing answered."""
+    if not result.rtts:
+        return None
+    return min(result.rtts), sum(result.rtts) / len(result.rtts), max(result.rtts)
+
+
+def read_ip_file(path):
+    """Return the IPs listed in a file, one per line; blank lines and # comments are skipped."""
+    with open(path, 'r') as f:
+        return [line.split('#')[0].strip() for line in f if line.split('#')[0].strip()]
+
+
+def local_addresses():
+    """
+    Return the IPv4 addresses configured on this node.
+
+    Returns:
+        list: (interface label, ip) tuples from 'ip -4 -o addr show'
+    """
+    output = subprocess.check_output(['ip', '-4', '-o', 'addr', 'show']).decode('utf-8', 'replace')
+    addresses = []
+    for line in output.splitlines():
+        fields = line.split()
+        if 'inet' not in fields:
+            continue
+        ip = fields[fields.index('inet') + 1].split('/')[0]
+        # The label (br0:1 for an alias address) ends the address part of the line, just before valid_lft
+        label = fields[1]
+        if 'valid_lft' in fields:
+            label = fields[fields.index('valid_lft') - 1].rstrip('\\') or label
+        addresses.append((label, ip))
+    return addresses
+
+
+def host_ips():
+    """Return the IPs of every node in the cluster, from hostips."""
+    return subprocess.check_output(['hostips']).decode().strip().split()
+
+
+def _checksum(data):
+    if len(data) % 2:
+        data += b'\0'
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xffff)
+    total += total >> 16
+    return ~total & 0xffff
+
+
+def _echo_request(ident, sequence):
+    payload = struct.pack('!d', time.monotonic()) + b'reach_probe'
+    header = struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, 0, ident, sequence)
+    return struct.pack('!BBHHH', ICMP_ECHO_REQUEST, 0, _checksum(header + payload), ident, sequence) + payload
+
+
+def _icmp_socket():
+    # Datagram ICMP sockets need net.ipv4.ping_group_range to include our group, raw sockets need root
+    try:
+        return socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP), False
+    except PermissionError:
+        if os.geteuid() != 0:
+            raise
+    return socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP), True
+
+
+class IcmpPinger:
+    """
+    One ICMP socket shared by every echo request of a sweep.
+
+    Replies are matched to their requests by source address and sequence number, so hundreds of probes
+    cost one socket and one reader instead of a socket each.
+    """
+
+    def __init__(self, loop):
+        self.loop = loop
+        self.sock, self.raw = _icmp_socket()
+        self.sock.setblocking(False)
+        # Requests to hosts that don't answer ARP sit in the send buffer until resolution gives up
+        self.sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, SEND_BUFFER)
+        self.ident = os.getpid() & 0xffff
+        if not self.raw:
+            # The kernel replaces the identifier with the socket's port and only hands us our replies
+            self.sock.bind(('', 0))
+            self.ident = self.sock.getsockname()[1]
+        self.sequence = 0
+        self.waiting = {}
+        loop.add_reader(self.sock.fileno(), self._read)
+
+    def _read(self):
+        while True:
+            try:
+                packet, address = self.sock.recvfrom(2048)
+            except (BlockingIOError, InterruptedError):
+                return
+            except OSError:
+                # An ICMP error for an earlier request, the probe simply times out
+                continue
+            if self.raw:
+                # Raw sockets see every ICMP packet with its IP header
+                packet = packet[(packet[0] & 0x0f) * 4:]
+            if len(packet) < 8:
+                continue
+            kind, _, _, ident, sequence = struct.unpack('!BBHHH', packet[:8])
+            if kind != ICMP_ECHO_REPLY or (self.raw and ident != self.ident):
+                continue
+            waiter = self.waiting.pop((address[0], sequence), None)
+            if waiter is not None and not waiter[1].done():
+                waiter[1].set_result((time.monotonic() - waiter[0]) * 1000)
+
+    async def ping(self, ip, timeout):
+        """
+        Send one echo request and wait for its reply.
+
+        Returns:
+            float: Round trip time in ms, or None when no reply came within timeout
+        """
+        self.sequence = (self.sequence + 1) & 0xffff
+        key = (ip, self.sequence)
+        future = self.loop.create_future()
+        deadline = time.monotonic() + timeout
+        try:
+            while True:
+                try:
+                    self.sock.sendto(_echo_request(self.ident, self.sequence), (ip, 0))
+                    break
+                except (BlockingIOError, OSError) as e:
+                    # A full send buffer drains as ARP resolves or fails, try again until the probe times out
+                    if e.errno not in (errno.ENOBUFS, errno.EAGAIN) or time.monotonic() >= deadline:
+                        raise
+                    await asyncio.sleep(SEND_RETRY_DELAY)
+            self.waiting[key] = (time.monotonic(), future)
+            return await asyncio.wait_for(future, max(deadline - time.monotonic(), 0))
+        except asyncio.TimeoutError:
+            return None
+        finally:
+            self.waiting.pop(key, None)
+
+    def close(self):
+        self.loop.remove_reader(self.sock.fileno())
+        self.sock.close()
+
+
+async def tcp_probe(ip, port, timeout):
+    """
+    Open and close a TCP connection.
+
+    Returns:
+        float: Round trip time in ms, or None when the host did not answer within timeout
+    """
+    start = time.monotonic()
+    try:
+        _, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), timeout)
+        writer.close()
+    except ConnectionRefusedError:
+        # A reset comes from the host itself, so it is up even if nothing listens on the port
+        pass
+    except (asyncio.TimeoutError, OSError):
+        return None
+    return (time.monotonic() - start) * 1000
+
+
+async def _probe_ip(ip, count, timeout, interval, tcp_port, limit, pinger):
+    async def one(sequence):
+        await asyncio.sleep(sequence * interval)
+        async with limit:
+            if tcp_port:
+                return await tcp_probe(ip, tcp_port, timeout)
+            return await pinger.ping(ip, timeout)
+
+    try:
+        rtts = await asyncio.gather(*(one(sequence) for sequence in range(count)))
+    except OSError as e:
+        return ProbeResult(ip, count, 0, [], str(e))
+    answered = [round(rtt, 3) for rtt in rtts if rtt is not None]
+    return ProbeResult(ip, count, len(answered), answered, None)
+
+
+def probe_ips(ips, count=PROBE_COUNT, timeout=PROBE_TIMEOUT, interval=PROBE_INTERVAL, tcp_port=None,
+              max_in_flight=MAX_IN_FLIGHT):
+    """
+    Probe many IPs at the same time.
+
+    Args:
+        ips: IPs to probe
+        count: Probes per IP
+        timeout: Seconds to wait for each reply
+        interval: Seconds between the probes of one IP
+        tcp_port: Probe with TCP connects to this port instead of ICMP echo
+        max_in_flight: Probes outstanding at the same time
+
+    Returns:
+        list: ProbeResult per IP, in the order given; a sweep takes about timeout + (count - 1) * interval
+    """
+    async def sweep():
+        # Created inside the loop, asyncio objects bind to the loop that is running when they are made
+        limit = asyncio.Semaphore(max_in_flight)
+        pinger = None if tcp_port else IcmpPinger(loop)
+        try:
+            return await asyncio.gather(*(_probe_ip(ip, count, timeout, interval, tcp_port, limit, pinger)
+                                          for ip in ips))
+        finally:
+            if pinger:
+                pinger.close()
+
+    if not ips:
+        return []
+    # A loop of our own, so the alert daemon can call this from any of its threads
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(sweep())
+    finally:
+        loop.close()
+
+
+def format_result(result):
+    if result.error:
+        return f"{result.ip:<16} error: {result.error}"
+    rtt = rtt_summary(result)
+    rtt_text = f"rtt min/avg/max {rtt[0]:.2f}/{rtt[1]:.2f}/{rtt[2]:.2f} ms" if rtt else ''
+    state = 'reachable' if is_reachable(result) else 'not reachable'
+    return f"{result.ip:<16} {state:<14} {loss_percent(result):>3}% loss  {rtt_text}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check that IPs answer, all at the same time')
+    parser.add_argument('ips', nargs='*', help='IPs to probe')
+    parser.add_argument('--file', help='File with one IP per line')
+    parser.add_argument('--local', action='store_true', help="Probe this node's own IPv4 addresses")
+    parser.add_argument('--hostips', action='store_true', help='Probe every node of the cluster')
+    parser.add_argument('--tcp', type=int, metavar='PORT', help='Probe with TCP connects to this port instead of ICMP')
+    parser.add_argument('--count', type=int, default=PROBE_COUNT, help='Probes per IP')
+    parser.add_argument('--timeout', type=float, default=PROBE_TIMEOUT, help='Seconds to wait for each reply')
+    parser.add_argument('--max-in-flight', type=int, default=MAX_IN_FLIGHT, help='Probes outstanding at once')
+    parser.add_argument('--json', action='store_true', help='Print the results as JSON')
+    args = parser.parse_args()
+
+    ips = list(args.ips)
+    if args.file:
+        ips += read_ip_file(args.file)
+    if args.local:
+        ips += [ip for _, ip in local_addresses()]
+    if args.hostips:
+        ips += host_ips()
+    if not ips:
+        parser.error('No IPs to probe, give IPs, --file, --local or --hostips')
+
+    results = probe_ips(ips, args.count, args.timeout, tcp_port=args.tcp, max_in_flight=args.max_in_flight)
+    if args.json:
+        print(json.dumps([dict(result._asdict(), loss=loss_percent(result)) for result in results], indent=2))
+    else:
+        for result in results:
+            print(format_result(result))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+#
+# Date: 10/18/2026
+#
+# Description: Buffered output for the health check reports. The log file is opened once and written
+#              through a buffer, and both the console and the file are flushed at section boundaries, so a
+#              report of hundreds of lines costs a handful of write calls instead of an open, write and
+#              close per line. The console keeps the ANSI colors; the file gets plain text, JSON lines or
+#              the colored text.
+#
+import atexit
+import json
+import re
+import sys
+from datetime import datetime
+
+FILE_FORMATS = ('plain', 'json', 'ansi')
+
+# Bytes buffered before a write is forced between section boundaries
+BUFFER_SIZE = 64 * 1024
+
+ANSI_ESCAPE = re.compile(r'\033\[[0-9;]*m')
+
+
+def strip_ansi(text):
+    """Remove ANSI color and formatting codes."""
+    return ANSI_ESCAPE.sub('', text)
+
+
+class ReportSink:
+    """
+    Writes report lines to the console and a log file.
+
+    Args:
+        path: Log file, appended to; None for console only
+        file_format: 'plain' (colors removed), 'json' (one JSON object per line) or 'ansi' (as printed)
+        console: Stream for the console output, None for file only
+    """
+
+    def __init__(self, path=None, file_format='plain', console=sys.stdout):
+        if file_format not in FILE_FORMATS:
+            raise ValueError(f"Unknown file format {file_format}, expected one of {', '.join(FILE_FORMATS)}")
+        self.path = path
+        self.file_format = file_format
+        self.console = console
+        self.section = None
+        self.file = open(path, 'a', buffering=BUFFER_SIZE) if path else None
+        self._console_lines = []
+        atexit.register(self.close)
+
+    def write(self, message):
+        """Add a message, which may span several lines, to the report."""
+        message = str(message)
+        if self.console is not None:
+            self._console_lines.append(message)
+        if self.file is None:
+            return
+        if self.file_format == 'json':
+            self.file.write(json.dumps({'time': datetime.now().isoformat(timespec='seconds'),
+                                        'section': self.section, 'message': strip_ansi(message)}) + '\n')
+        elif self.file_format == 'plain':
+            self.file.write(strip_ansi(message) + '\n')
+        else:
+            self.file.write(message + '\n')
+
+    def begin_section(self, title):
+        """Start a section; JSON lines written until end_section() carry its title."""
+        self.section = title
+
+    def end_section(self):
+        """Finish the current section and flush everything written so far."""
+        self.section = None
+        self.flush()
+
+    def flush(self):
+        if self.console is not None and self._console_lines:
+            self.console.write('\n'.join(self._console_lines) + '\n')
+            self._console_lines = []
+            self.console.flush()
+        if self.file is not None:
+            self.file.flush()
+
+    def close(self):
+        self.flush()
+        if self.file is not None:
+            self.file.close()
+            self.file = None
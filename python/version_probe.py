@@ -0,0 +1,189 @@
+#!/usr/bin/env python3
+#
+# Date: 10/18/2026
+#
+# Description: Service version probing for the health checks. Runs '<service>_exec --version' for many
+#              services at once on a bounded pool, each with its own timeout, and keeps the answers in a
+#              cache keyed by binary path, inode and mtime. An unchanged software install is answered from
+#              the cache without starting any binaries; an upgrade replaces the binaries, which changes
+#              their inode or mtime, so they are probed again. Callers with a time budget pass a deadline;
+#              probes that would run past it are cut short or skipped and report that on their own line.
+#
+# Usage: ./version_probe.py [--workers 8] [--timeout 30] [--no-cache] [service ...]
+#
+import argparse
+import contextvars
+import json
+import os
+import shutil
+import subprocess
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import health_profile
+
+DEFAULT_CACHE_FILE = "/home/support/utils/versions.cache"
+
+# Upper bound on binaries started at the same time, they are large and slow to start
+MAX_WORKERS = 8
+
+# Seconds to wait for one binary to print its version
+PROBE_TIMEOUT = 30
+
+SERVICES = [
+    "aegis_exec", "alerts_exec", "apollo_exec", "athena_exec", "athena_proxy_exec",
+    "athena_watchdog_exec", "atom_exec", "axon_config_helper_exec", "bashlogger_exec",
+    "bifrost_broker_exec", "bifrost_exec", "bridge_exec", "bridge_proxy_exec",
+    "compass_exec", "core_helper_exec", "eagle_agent_exec", "elrond_exec",
+    "firmware_helper_exec", "flexvol_exec", "groot_exec", "heimdall_exec",
+    "input_logger_exec", "iris_exec", "iris_proxy_exec", "keychain_exec",
+    "librarian_exec", "logwatcher_exec", "magneto_exec", "newscribe_exec",
+    "nexus_exec", "nexus_proxy_exec", "nfs_proxy_exec", "patch_exec", "rtclient_exec",
+    "siren_server_exec", "smb2_proxy_exec", "smb_proxy_exec", "snmp_subagent_exec",
+    "statscollector_exec", "stats_exec", "throttler_exec", "vault_proxy_exec",
+    "workqueue_server_exec", "yoda_agent_exec", "yoda_exec"
+]
+
+
+def probe(path, timeout=PROBE_TIMEOUT):
+    """
+    Run one binary with --version.
+
+    Returns:
+        tuple: (version or error message, True if the answer can be cached)
+    """
+    try:
+        result = health_profile.run([path, '--version'], stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+                                    timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return f"Error: timed out after {timeout:.0f} seconds", False
+    except OSError as e:
+        return f"Error: {e}", False
+    if result.returncode != 0:
+        return f"Error: {result.stderr.decode('utf-8', 'replace').strip()}", False
+    try:
+        # First line looks like '<name> version <version> ...'
+        return result.stdout.decode('utf-8', 'replace').split('\n')[0].split()[2], True
+    except IndexError:
+        return "Version not found", True
+
+
+def _probe_by(path, timeout, deadline):
+    # Waiting in the pool can use up the budget, so the time left is worked out when the probe starts
+    if deadline is None:
+        return probe(path, timeout)
+    remaining = deadline - time.monotonic()
+    if remaining <= 0:
+        return "Error: not probed, the version check ran out of time", False
+    return probe(path, min(timeout, remaining))
+
+
+class VersionCache:
+    """Versions by binary path, only trusted while the binary keeps the same inode and mtime."""
+
+    def __init__(self, path=DEFAULT_CACHE_FILE):
+        self.path = path
+        self.entries = {}
+        self.changed = False
+        try:
+            with open(path, 'r') as f:
+                self.entries = json.load(f)
+        except (OSError, ValueError):
+            pass
+
+    @staticmethod
+    def _identity(st):
+        return [st.st_ino, st.st_mtime_ns, st.st_size]
+
+    def get(self, path, st):
+        entry = self.entries.get(path)
+        if entry and entry['identity'] == self._identity(st):
+            return entry['version']
+        return None
+
+    def put(self, path, st, version):
+        self.entries[path] = {'identity': self._identity(st), 'version': version}
+        self.changed = True
+
+    def save(self):
+        if not self.changed:
+            return
+        tmp_path = f"{self.path}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                json.dump(self.entries, f, indent=1, sort_keys=True)
+            os.replace(tmp_path, self.path)
+        except OSError:
+            # A read-only or missing utils directory only costs the cache, not the answers
+            pass
+
+
+def get_versions(services, workers=MAX_WORKERS, timeout=PROBE_TIMEOUT, cache_file=DEFAULT_CACHE_FILE,
+                 deadline=None):
+    """
+    Get the version of every service.
+
+    Args:
+        services: Binary names looked up on PATH, or paths to binaries
+        workers: Maximum number of binaries probed at the same time
+        timeout: Seconds to wait for each binary
+        cache_file: Version cache, None to always probe
+        deadline: Seconds the whole call may take, None for no limit. Binaries still running or not yet
+                  started when it passes are reported as timed out, the rest keep their versions
+
+    Returns:
+        dict: service -> version or error message, in the order of services
+    """
+    end = time.monotonic() + deadline if deadline is not None else None
+    cache = VersionCache(cache_file) if cache_file else None
+    versions = {}
+    to_probe = {}
+    for service in services:
+        path = shutil.which(service)
+        if path is None:
+            versions[service] = "Service not found"
+            continue
+        path = os.path.realpath(path)
+        st = os.stat(path)
+        version = cache.get(path, st) if cache else None
+        if version is not None:
+            versions[service] = version
+        else:
+            to_probe[service] = (path, st)
+
+    if to_probe:
+        with ThreadPoolExecutor(max_workers=min(workers, len(to_probe))) as pool:
+            # Each probe runs in a copy of the caller's context so profiling attributes it to the right section
+            futures = {service: pool.submit(contextvars.copy_context().run, _probe_by, path, timeout, end)
+                       for service, (path, _) in to_probe.items()}
+            for service, future in futures.items():
+                version, cacheable = future.result()
+                versions[service] = version
+                if cache and cacheable:
+                    path, st = to_probe[service]
+                    cache.put(path, st, version)
+        if cache:
+            cache.save()
+    return {service: versions[service] for service in services}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Print the version of every Cohesity service')
+    parser.add_argument('services', nargs='*', default=SERVICES, help='Services to check (default: all core services)')
+    parser.add_argument('--workers', type=int, default=MAX_WORKERS, help='Binaries probed at the same time')
+    parser.add_argument('--timeout', type=int, default=PROBE_TIMEOUT, help='Seconds to wait for each binary')
+    parser.add_argument('--cache-file', default=DEFAULT_CACHE_FILE, help='Version cache file')
+    parser.add_argument('--no-cache', action='store_true', help='Probe every binary even if it is unchanged')
+    args = parser.parse_args()
+
+    versions = get_versions(args.services, args.workers, args.timeout, None if args.no_cache else args.cache_file)
+    print(f"{datetime.now()}\nChecking versions of the following: {' '.join(args.services)}\n")
+    print(f"{'Service Name:':<30} {'Version'}")
+    print("------------- --------------------------------------------------------")
+    for service in sorted(versions):
+        print(f"{service + ':':<30} {versions[service]}")
+
+
+if __name__ == '__main__':
+    main()
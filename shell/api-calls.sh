@@ -13,10 +13,34 @@
 # Total backup calls:   2150
 
 
-mmdd=$(date -d "-$1 hour" '+%m%d')
-hour=$(date -d "-$1 hour" '+%H')
+slot=$(date -d "-$1 hour" '+%s')
+mmdd=$(date -d "@$slot" '+%m%d')
+hour=$(date -d "@$slot" '+%H')
 duration=$1
 
+# Timestamp index helper, used to read only the hour being counted instead of every line of every file
+GLOG_INDEX=/home/support/utils/glog_index.py
+
+magneto_slice=$(mktemp)
+bridge_proxy_slice=$(mktemp)
+trap 'rm -f "$magneto_slice" "$bridge_proxy_slice"' EXIT
+
+# Write the lines logged in the current hour by a service to a file
+hour_slice() {
+    local files=()
+    for file in logs/$1.*INFO*; do
+        # Skip the <service>.INFO symlink, the active file it points at is already in the list
+        [ -f "$file" ] && [ ! -L "$file" ] && files+=("$file")
+    done
+    if [ ${#files[@]} -eq 0 ]; then
+        : > "$2"
+    elif [ -f "$GLOG_INDEX" ]; then
+        python3 "$GLOG_INDEX" slice "$mmdd $hour" "$next_mmdd $next_hour" "${files[@]}" > "$2"
+    else
+        zgrep -h "^I$mmdd $hour" "${files[@]}" > "$2"
+    fi
+}
+
 echo "For date $mmdd, hour $hour, and duration of $duration hour(s)"
 
 overall_total_calls=0
@@ -26,21 +50,27 @@ total_throttled_calls=0
 
 for (( i=1; i<=$duration; i++ ))
     do
-    magneto_single_calls_one_hour=$(zgrep "I$mmdd $hour.*graph_base_op.cc.*Refreshing the token. Attempt number" logs/magneto_exec.*INFO* | wc -l)
+    next_mmdd=$(date -d "@$((slot + 3600))" '+%m%d')
+    next_hour=$(date -d "@$((slot + 3600))" '+%H')
+
+    hour_slice magneto_exec "$magneto_slice"
+    hour_slice bridge_proxy_exec "$bridge_proxy_slice"
+
+    magneto_single_calls_one_hour=$(grep -c "I$mmdd $hour.*graph_base_op.cc.*Refreshing the token. Attempt number" "$magneto_slice")
 
-    magneto_batch_calls_one_hour=$(zgrep "I$mmdd $hour.*generic_batch_request_op.cc.*Making a batch request of size" logs/magneto_exec.*INFO* | wc -l)
+    magneto_batch_calls_one_hour=$(grep -c "I$mmdd $hour.*generic_batch_request_op.cc.*Making a batch request of size" "$magneto_slice")
 
-    bridge_proxy_single_calls_one_hour=$(zgrep "I$mmdd $hour.*graph_base_op.cc.*Refreshing the token. Attempt number" logs/bridge_proxy_exec.*INFO* | wc -l)
+    bridge_proxy_single_calls_one_hour=$(grep -c "I$mmdd $hour.*graph_base_op.cc.*Refreshing the token. Attempt number" "$bridge_proxy_slice")
 
-    bridge_proxy_batch_calls_one_hour=$(zgrep "I$mmdd $hour.*generic_batch_request_op.cc.*Making a batch request of size" logs/bridge_proxy_exec.*INFO* | wc -l)
+    bridge_proxy_batch_calls_one_hour=$(grep -c "I$mmdd $hour.*generic_batch_request_op.cc.*Making a batch request of size" "$bridge_proxy_slice")
 
-    refresh_single_calls_one_hour=$(zgrep "I$mmdd $hour.*graph_base_op.cc.*Task id -1: Refreshing the token. Attempt number" logs/magneto_exec.*INFO* | wc -l)
+    refresh_single_calls_one_hour=$(grep -c "I$mmdd $hour.*graph_base_op.cc.*Task id -1: Refreshing the token. Attempt number" "$magneto_slice")
 
-    refresh_batch_calls_one_hour=$(zgrep "I$mmdd $hour.*generic_batch_request_op.cc.*Task id -1: Making a batch request of size" logs/magneto_exec.*INFO* | wc -l)
+    refresh_batch_calls_one_hour=$(grep -c "I$mmdd $hour.*generic_batch_request_op.cc.*Task id -1: Making a batch request of size" "$magneto_slice")
 
-    magneto_throttled_calls_one_hour=$(zgrep "I$mmdd $hour.*graph_base_op.cc.*Received error in MS Graph Response.*The request has been throttled" logs/magneto_exec.*INFO* | wc -l)
+    magneto_throttled_calls_one_hour=$(grep -c "I$mmdd $hour.*graph_base_op.cc.*Received error in MS Graph Response.*The request has been throttled" "$magneto_slice")
 
-    bridge_proxy_throttled_calls_one_hour=$(zgrep "I$mmdd $hour.*graph_base_op.cc.*Received error in MS Graph Response.*The request has been throttled" logs/bridge_proxy_exec.*INFO* | wc -l)
+    bridge_proxy_throttled_calls_one_hour=$(grep -c "I$mmdd $hour.*graph_base_op.cc.*Received error in MS Graph Response.*The request has been throttled" "$bridge_proxy_slice")
 
     total_calls_one_hour=$(( $magneto_single_calls_one_hour + $magneto_batch_calls_one_hour * 19 + $bridge_proxy_single_calls_one_hour + $bridge_proxy_batch_calls_one_hour * 19 ))
 
@@ -54,7 +84,9 @@ for (( i=1; i<=$duration; i++ ))
 
     total_throttled_calls=$(( $total_throttled_calls + $magneto_throttled_calls_one_hour + $bridge_proxy_throttled_calls_one_hour))
 
-    hour=$(date -d "$hour +1 hour" +"%H")
+    slot=$((slot + 3600))
+    mmdd=$next_mmdd
+    hour=$next_hour
 
 done
 
@@ -2,8 +2,15 @@
 # Author: Doug Austin
 # Filesystem Log check
 # Updated: 6/1/2023
+# Updated: 10/18/2026 - Use fs_usage.py when installed, one statvfs per mount instead of a df per partition
 #
 
+# fs_usage.py reads the mount table once and reports hung mounts instead of blocking on them
+fs_usage="/home/support/utils/fs_usage.py"
+if command -v python3 >/dev/null 2>&1 && [[ -f "$fs_usage" ]]; then
+    exec python3 "$fs_usage" "$@"
+fi
+
 # Define Partition Types to Check
 partitions=$(df -h | awk 'NR>1{print $6}' | grep -v -E 'tmpfs|devtmpfs|/boot|/home_cohesity_data|/home/cohesity')
 cohesity_partitions=$(df -h | awk 'NR>1{print $6}' | grep '^/home_cohesity')
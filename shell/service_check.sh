@@ -2,8 +2,15 @@
 # Author: Doug Austin
 # Check Services Version for all core services
 # Updated: 5/5/23 - Added bridge_proxy service
+# Updated: 10/18/2026 - Use version_probe.py when installed, it probes in parallel and caches versions
 #
 #
+# version_probe.py probes every binary at once and answers unchanged binaries from its cache
+version_probe="/home/support/utils/version_probe.py"
+if command -v python3 >/dev/null 2>&1 && [[ -f "$version_probe" ]]; then
+    exec python3 "$version_probe" "$@"
+fi
+
 # Define a function to get the version of a service
 get_version() {
     "$1" --version | awk 'NR==1{print $3}'
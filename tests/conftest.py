@@ -0,0 +1,8 @@
+# The scripts are flat modules deployed to /home/support/utils (python/) and /home/support/alerts (hw_alerts/),
+# so the tests import them the same way the scripts import each other.
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(ROOT, 'python'))
+sys.path.insert(0, os.path.join(ROOT, 'hw_alerts'))
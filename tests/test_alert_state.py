@@ -0,0 +1,65 @@
+import multiprocessing
+
+import alert_state
+from alert_state import AlertState
+
+
+def test_fire_sends_once_then_reminds(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(alert_state.time, 'time', lambda: now[0])
+    state = AlertState(str(tmp_path / 'state.json'))
+    assert state.fire('CH00000001', 'sda', repeat_interval=60)
+    now[0] += 30
+    assert not state.fire('CH00000001', 'sda', repeat_interval=60)
+    now[0] += 31
+    assert state.fire('CH00000001', 'sda', repeat_interval=60)
+    assert state.alerts['CH00000001|sda']['sent'] == 2
+    assert state.fire('CH00000001', 'sdb', repeat_interval=None)
+    now[0] += 10 ** 6
+    assert not state.fire('CH00000001', 'sdb', repeat_interval=None)
+
+
+def test_clear_returns_the_active_alert_once(tmp_path):
+    state = AlertState(str(tmp_path / 'state.json'))
+    assert state.clear('CH00000002', 'eth0') is None
+    state.fire('CH00000002', 'eth0')
+    assert state.clear('CH00000002', 'eth0')['subject'] == 'eth0'
+    assert state.clear('CH00000002', 'eth0') is None
+    # Cleared alerts fire again as new
+    assert state.fire('CH00000002', 'eth0')
+
+
+def test_reconcile_clears_subjects_no_longer_present(tmp_path):
+    state = AlertState(str(tmp_path / 'state.json'))
+    for subject in ('a', 'b', 'c'):
+        state.fire('CH00000007', subject)
+    state.fire('CH00000001', 'a')
+    cleared = state.reconcile('CH00000007', ['b'])
+    assert sorted(alert['subject'] for alert in cleared) == ['a', 'c']
+    assert state.active('CH00000007') == ['b']
+    assert state.active('CH00000001') == ['a']
+
+
+def test_state_is_shared_through_the_file(tmp_path):
+    path = str(tmp_path / 'state.json')
+    first, second = AlertState(path), AlertState(path)
+    assert first.fire('CH00000004', '10.0.0.1')
+    assert not second.fire('CH00000004', '10.0.0.1')
+    assert second.clear('CH00000004', '10.0.0.1') is not None
+    assert first.clear('CH00000004', '10.0.0.1') is None
+
+
+def _fire_many(path, worker, count):
+    state = AlertState(path)
+    for n in range(count):
+        state.fire('CH00000001', f"{worker}-{n}")
+
+
+def test_processes_do_not_lose_each_others_alerts(tmp_path):
+    path = str(tmp_path / 'state.json')
+    workers = [multiprocessing.Process(target=_fire_many, args=(path, worker, 25)) for worker in range(4)]
+    for process in workers:
+        process.start()
+    for process in workers:
+        process.join()
+    assert len(AlertState(path).active('CH00000001')) == 100
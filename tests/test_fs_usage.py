@@ -0,0 +1,64 @@
+import errno
+import os
+import threading
+import time
+
+import fs_usage
+from fs_usage import Mount, filesystem_usage, read_mounts
+
+
+class Statvfs:
+    def __init__(self, blocks, free, avail, files=1000, ffree=900):
+        self.f_frsize = 4096
+        self.f_blocks, self.f_bfree, self.f_bavail = blocks, free, avail
+        self.f_files, self.f_ffree, self.f_favail = files, ffree, ffree
+
+
+def test_hung_mount_is_reported_without_waiting_for_it(monkeypatch):
+    release = threading.Event()
+
+    def statvfs(path):
+        if path == '/mnt/nfs':
+            # Never answers while the test runs, like a dead NFS server
+            release.wait()
+        if path == '/mnt/gone':
+            raise OSError(errno.ESTALE, os.strerror(errno.ESTALE))
+        if path == '/proc':
+            return Statvfs(0, 0, 0, 0, 0)
+        return Statvfs(1000, 250, 200)
+
+    monkeypatch.setattr(fs_usage.os, 'statvfs', statvfs)
+    mounts = [Mount('/', '/dev/sda1', 'xfs'), Mount('/mnt/nfs', 'server:/export', 'nfs'),
+              Mount('/proc', 'proc', 'proc'), Mount('/mnt/gone', 'server:/old', 'nfs'),
+              Mount('/home_cohesity_data', '/dev/sdb1', 'xfs')]
+    start = time.monotonic()
+    try:
+        usages = filesystem_usage(mounts, timeout=0.5)
+    finally:
+        release.set()
+    assert time.monotonic() - start < 2
+
+    assert [usage.mountpoint for usage in usages] == ['/', '/mnt/nfs', '/mnt/gone', '/home_cohesity_data']
+    root, nfs, gone, data = usages
+    assert nfs.error == 'hung'
+    assert gone.error == os.strerror(errno.ESTALE)
+    assert root.error is None
+    assert (root.size, root.used, root.avail) == (1000 * 4096, 750 * 4096, 200 * 4096)
+    # df rounds up used / (used + available)
+    assert root.percent == 79
+    assert root.inodes_used == 100 and root.inode_percent == 10
+
+    normal, cohesity = fs_usage.split_partitions(usages)
+    assert [usage.mountpoint for usage in normal] == ['/', '/mnt/nfs', '/mnt/gone']
+    assert cohesity == [data]
+
+
+def test_read_mounts_keeps_the_last_mount_on_a_mountpoint(tmp_path):
+    mountinfo = tmp_path / 'mountinfo'
+    mountinfo.write_text(
+        "22 1 8:1 / / rw,relatime shared:1 - xfs /dev/sda1 rw\n"
+        "30 22 0:40 / /mnt/my\\040share rw - nfs server:/a rw\n"
+        "31 22 0:41 / /mnt/my\\040share rw shared:7 master:2 - nfs4 server:/b rw\n"
+    )
+    assert read_mounts(str(mountinfo)) == [Mount('/', '/dev/sda1', 'xfs'),
+                                           Mount('/mnt/my share', 'server:/b', 'nfs4')]
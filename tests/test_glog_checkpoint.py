@@ -0,0 +1,107 @@
+import gzip
+import os
+
+from glog_checkpoint import CheckpointStore
+from glog_scanner import scan_file, scan_files_parallel
+
+CALL = b"I1018 10:00:00.000000  1234 graph_base_op.cc:10] Task id 7: Refreshing the token. Attempt number 1\n"
+
+
+def append(path, data):
+    with open(path, 'ab') as f:
+        f.write(data)
+
+
+def read_new(store_path, log_path, during_read=b''):
+    """One checkpointed run; during_read is appended after the scan and before the checkpoint is recorded."""
+    store = CheckpointStore(store_path)
+    offset = store.start_offset(log_path)
+    count = 0
+    if offset is not None:
+        result = scan_file(log_path, offset=offset)
+        append(log_path, during_read)
+        store.update(log_path, result.offset)
+        count = result.counts['single']
+    store.save(1.0)
+    return count
+
+
+def test_first_run_skips_history(tmp_path):
+    log, store = str(tmp_path / 'magneto.INFO'), str(tmp_path / 'cp')
+    append(log, CALL * 3)
+    assert read_new(store, log) == 0
+    append(log, CALL * 2)
+    assert read_new(store, log) == 2
+    assert read_new(store, log) == 0
+
+
+def test_lines_appended_after_the_read_are_not_lost(tmp_path):
+    log, store = str(tmp_path / 'magneto.INFO'), str(tmp_path / 'cp')
+    append(log, CALL)
+    read_new(store, log)
+    append(log, CALL)
+    assert read_new(store, log, during_read=CALL * 4) == 1
+    assert read_new(store, log) == 4
+
+
+def test_partial_line_is_read_once_complete(tmp_path):
+    log, store = str(tmp_path / 'magneto.INFO'), str(tmp_path / 'cp')
+    append(log, CALL)
+    read_new(store, log)
+    append(log, CALL + CALL[:20])
+    assert read_new(store, log) == 1
+    append(log, CALL[20:])
+    assert read_new(store, log) == 1
+
+
+def test_gzip_of_rotated_file_resumes_inside_the_stream(tmp_path):
+    log, store = str(tmp_path / 'magneto.INFO'), str(tmp_path / 'cp')
+    append(log, CALL)
+    read_new(store, log)
+    append(log, CALL * 2)
+    assert read_new(store, log) == 2
+    append(log, CALL * 5)
+    with open(log, 'rb') as f, gzip.open(log + '.gz', 'wb') as out:
+        out.write(f.read())
+    os.remove(log)
+    assert read_new(store, log + '.gz') == 5
+    assert read_new(store, log + '.gz') == 0
+
+
+def test_truncated_file_is_read_from_the_start(tmp_path):
+    log, store = str(tmp_path / 'magneto.INFO'), str(tmp_path / 'cp')
+    append(log, CALL * 5)
+    read_new(store, log)
+    with open(log, 'wb') as f:
+        f.write(CALL * 2)
+    assert read_new(store, log) == 2
+
+
+def test_file_gzipped_during_the_run_keeps_its_checkpoint(tmp_path):
+    log, store_path = str(tmp_path / 'magneto.INFO'), str(tmp_path / 'cp')
+    append(log, CALL)
+    read_new(store_path, log)
+    append(log, CALL * 2)
+    store = CheckpointStore(store_path)
+    offset = store.start_offset(log)
+    result = scan_file(log, offset=offset)
+    # glog's compressor moves the file away before the checkpoint is recorded
+    append(log, CALL * 3)
+    with open(log, 'rb') as f, gzip.open(log + '.gz', 'wb') as out:
+        out.write(f.read())
+    os.remove(log)
+    store.update(log, result.offset)
+    store.save(2.0)
+    assert result.counts['single'] == 2
+    assert read_new(store_path, log + '.gz') == 3
+
+
+def _path(path):
+    return path
+
+
+def test_parallel_scan_survives_a_file_gone_before_it_starts(tmp_path):
+    log = str(tmp_path / 'magneto.INFO')
+    append(log, CALL)
+    missing = str(tmp_path / 'rotated.INFO')
+    assert scan_files_parallel([(missing,), (log,)], 2, scan=_path) == [missing, log]
@@ -0,0 +1,47 @@
+import gzip
+
+import glog_index
+
+
+def _write_log(path, lines=3000):
+    data = b''.join(b"I0814 10:%02d:%02d.%06d 123 graph_base_op.cc:1] line %d\n"
+                    % (n // 60 % 60, n % 60, n, n) + (b"  continuation\n" if n % 7 == 0 else b'')
+                    for n in range(lines))
+    with open(path, 'wb') as f:
+        f.write(data)
+    with gzip.open(f"{path}.gz", 'wb') as f:
+        f.write(data)
+    return data
+
+
+def test_gzip_index_is_built_in_one_forward_pass(tmp_path, monkeypatch):
+    monkeypatch.setattr(glog_index, 'INDEX_DIR', str(tmp_path / 'index'))
+    monkeypatch.setattr(glog_index, 'INDEX_INTERVAL', 4096)
+    monkeypatch.setattr(glog_index, 'SAMPLE_SIZE', 1024)
+    path = str(tmp_path / 'magneto_exec.INFO.1')
+    data = _write_log(path)
+
+    rewinds = []
+    rewind = gzip._GzipReader._rewind
+    monkeypatch.setattr(gzip._GzipReader, '_rewind', lambda self: rewinds.append(1) or rewind(self))
+    compressed = glog_index.build_index(f"{path}.gz")
+    assert not rewinds
+
+    plain = glog_index.build_index(path)
+    assert compressed['indexed_to'] == plain['indexed_to'] == len(data)
+    assert compressed['last_key'] == plain['last_key'] == '0814 10:49:59.002999'
+    assert len(compressed['entries']) > 10
+    for key, offset in compressed['entries']:
+        assert offset == 0 or data[offset - 1:offset] == b'\n'
+        assert data[offset + 1:offset + 21].decode() == key
+
+
+def test_windows_match_between_plain_and_gzip(tmp_path, monkeypatch):
+    monkeypatch.setattr(glog_index, 'INDEX_DIR', str(tmp_path / 'index'))
+    monkeypatch.setattr(glog_index, 'INDEX_INTERVAL', 4096)
+    path = str(tmp_path / 'magneto_exec.INFO.1')
+    data = _write_log(path)
+    for window in (('0814 10:10', '0814 10:20'), ('0814 10', '0814 11'), ('0814 09', '0814 10')):
+        plain = b''.join(glog_index.iter_window(path, *window))
+        assert b''.join(glog_index.iter_window(f"{path}.gz", *window)) == plain
+    assert b''.join(glog_index.iter_window(path, '0814 10', '0814 11')) == data
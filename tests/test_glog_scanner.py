@@ -0,0 +1,49 @@
+import random
+from collections import Counter
+
+from glog_scanner import TopK
+
+
+def test_topk_exact_while_under_capacity():
+    top = TopK(k=3)
+    for key in 'abacab':
+        top.add(key)
+    assert top.top() == [('a', 3), ('b', 2), ('c', 1)]
+    assert top.top(1) == [('a', 3)]
+
+
+def test_topk_keeps_heavy_hitters_with_long_tail():
+    rng = random.Random(7)
+    stream = ['heavy1'] * 500 + ['heavy2'] * 300 + [f"tail{rng.randrange(5000)}" for _ in range(3000)]
+    rng.shuffle(stream)
+    top = TopK(k=20)
+    for key in stream:
+        top.add(key)
+
+    exact = Counter(stream)
+    assert len(top.counts) == 20
+    # Space-Saving hands the evicted count on, so the total is kept and counts are never under-estimated
+    assert sum(top.counts.values()) == len(stream)
+    assert [key for key, _ in top.top(2)] == ['heavy1', 'heavy2']
+    for key, n in top.counts.items():
+        assert n >= exact[key]
+
+
+def test_topk_evicts_a_smallest_key():
+    top = TopK(k=2)
+    top.add('a', 5)
+    top.add('b', 1)
+    top.add('c')
+    assert top.counts == {'a': 5, 'c': 2}
+    # b's cached entry is stale once c took its place, the next eviction must find c
+    top.add('d')
+    assert top.counts == {'a': 5, 'd': 3}
+
+
+def test_topk_merge():
+    left, right = TopK(k=5), TopK(k=5)
+    left.add('a', 4)
+    left.add('b', 1)
+    right.add('a', 2)
+    right.add('c', 3)
+    assert left.merge(right).top() == [('a', 6), ('c', 3), ('b', 1)]
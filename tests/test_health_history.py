@@ -0,0 +1,68 @@
+from health_history import diff_snapshots, has_changes, save_snapshot, load_snapshot, list_snapshots
+
+
+def snapshot(generated, **sections):
+    return {'node': 'node1', 'generated': generated,
+            'sections': {name: {'status': 'ok', 'data': data} for name, data in sections.items()}}
+
+
+def running(pid, start_time, pids=None):
+    return {'running': True, 'pid': pid, 'pids': pids or [pid], 'start_time': start_time, 'rss': 1, 'cpu_time': 1}
+
+
+def partition(mountpoint, percent, used):
+    return {'mountpoint': mountpoint, 'percent': percent, 'used': used, 'error': None}
+
+
+def test_identical_snapshots_have_no_changes():
+    data = {'processes': {'magneto': running(10, 100.0)}, 'versions': {'magneto_exec': '7.1'}}
+    assert not has_changes(diff_snapshots(snapshot('a', **data), snapshot('b', **data)))
+
+
+def test_process_changes():
+    old = snapshot('a', processes={'magneto': running(10, 100.0), 'bridge': running(20, 100.0),
+                                   'yoda': {'running': False}, 'iris': running(30, 100.0),
+                                   'groot': running(40, 100.0)})
+    new = snapshot('b', processes={'magneto': running(11, 500.0), 'bridge': {'running': False},
+                                   'yoda': running(50, 600.0), 'iris': running(30, 900.0),
+                                   'groot': running(41, 100.0, pids=[40, 41])})
+    diff = diff_snapshots(old, new)
+    assert diff['stopped'] == ['bridge']
+    assert diff['started'] == ['yoda']
+    # A new PID, or the same PID with a new start time, is a restart; a main PID that is still running isn't
+    assert [item['process'] for item in diff['restarted']] == ['magneto', 'iris']
+
+
+def test_partitions_that_grew():
+    old = snapshot('a', filesystem={'os': [partition('/', 50, 500), partition('/var', 70, 700)]})
+    new = snapshot('b', filesystem={'os': [partition('/', 55, 550), partition('/var', 60, 600)]})
+    assert diff_snapshots(old, new)['partitions_grown'] == [
+        {'mountpoint': '/', 'old_percent': 50, 'new_percent': 55, 'grown_bytes': 50}]
+
+
+def test_only_sections_in_both_snapshots_are_compared():
+    old = snapshot('a', versions={'magneto_exec': '7.1'})
+    new = snapshot('b', processes={'magneto': {'running': False}}, versions={'magneto_exec': '7.2'},
+                   firmware={'firmware': 'fw2'})
+    diff = diff_snapshots(old, new)
+    assert diff['versions_changed'] == [{'service': 'magneto_exec', 'old': '7.1', 'new': '7.2'}]
+    assert diff['stopped'] == [] and diff['firmware_changed'] is None
+
+
+def test_new_fatals_skip_older_entries_scrolling_into_view():
+    seen = {'time': '1018 10:00:00', 'lines': ['F1018 10:00:00 old']}
+    old = snapshot('a', fatals={'magneto_exec': [seen]})
+    new = snapshot('b', fatals={'magneto_exec': [{'time': '1018 11:00:00', 'lines': ['F1018 11:00:00 new']}, seen,
+                                                 {'time': '1018 09:00:00', 'lines': ['F1018 09:00:00 older']}]})
+    assert [entry['lines'][0] for entry in diff_snapshots(old, new)['new_fatals']] == ['F1018 11:00:00 new']
+
+
+def test_snapshots_round_trip_and_are_pruned(tmp_path):
+    directory = str(tmp_path)
+    report = {'node': 'node1', 'generated': 'g', 'sections': {'versions': {'status': 'ok', 'data': {'a': '1'},
+                                                                           'lines': ['text is not kept']}}}
+    for _ in range(3):
+        save_snapshot(report, directory, keep=2)
+    assert len(list_snapshots(directory)) == 2
+    assert load_snapshot('-1', directory)['sections'] == {'versions': {'status': 'ok', 'data': {'a': '1'}}}
+    assert load_snapshot('5', directory) is None
@@ -0,0 +1,84 @@
+import json
+import threading
+import time
+
+import pytest
+
+from health_sections import ERROR, OK, TIMEOUT, WARN, SectionRegistry, render_json, run_sections
+
+
+def test_results_come_back_in_section_order():
+    registry = SectionRegistry()
+    finished = []
+    release = threading.Event()
+
+    def sleeper(name, delay):
+        def run(result):
+            time.sleep(delay)
+            finished.append(name)
+            result.data['delay'] = delay
+            result.line(f"{name} done")
+        return run
+
+    # Registered slowest first, so the threads finish in the opposite order
+    for name, delay in (('slow', 0.3), ('middle', 0.2), ('fast', 0.1)):
+        registry.section(name, name.title())(sleeper(name, delay))
+
+    @registry.section('warns', 'Warns')
+    def warns(result):
+        result.warn()
+        result.line('a\nb')
+
+    @registry.section('fails', 'Fails')
+    def fails(result):
+        raise ValueError('no data')
+
+    @registry.section('stuck', 'Stuck', timeout=0.5)
+    def stuck(result):
+        result.line('partial')
+        release.wait()
+
+    start = time.monotonic()
+    try:
+        results = list(run_sections(registry.select()))
+    finally:
+        release.set()
+    elapsed = time.monotonic() - start
+
+    assert [result.name for result in results] == ['slow', 'middle', 'fast', 'warns', 'fails', 'stuck']
+    assert finished == ['fast', 'middle', 'slow']
+    # Sections run at the same time, the run takes about as long as the stuck section's timeout
+    assert elapsed < 1.0
+    assert [result.status for result in results] == [OK, OK, OK, WARN, ERROR, TIMEOUT]
+    assert results[0].lines == ['slow done']
+    assert results[3].lines == ['a', 'b']
+    assert results[4].error == 'ValueError: no data'
+    assert results[5].lines == ['partial', 'Timed out after 0.5 seconds']
+
+    report = json.loads(render_json(results, node='node1'))
+    assert list(report['sections']) == ['slow', 'middle', 'fast', 'warns', 'fails', 'stuck']
+    assert report['sections']['fast']['data'] == {'delay': 0.1}
+
+
+def test_first_result_is_yielded_before_later_sections_finish():
+    registry = SectionRegistry()
+    release = threading.Event()
+    registry.section('first', 'First')(lambda result: result.line('ready'))
+    registry.section('second', 'Second')(lambda result: release.wait(5))
+
+    results = run_sections(registry.select())
+    try:
+        first = next(results)
+        assert first.name == 'first' and not release.is_set()
+    finally:
+        release.set()
+    assert [result.name for result in results] == ['second']
+
+
+def test_select_keeps_registration_order():
+    registry = SectionRegistry()
+    for name in ('a', 'b', 'c'):
+        registry.section(name, name)(lambda result: None)
+    assert [section.name for section in registry.select(['c', 'a'])] == ['a', 'c']
+    with pytest.raises(ValueError, match='Unknown sections: x'):
+        registry.select(['x'])
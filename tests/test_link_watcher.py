@@ -0,0 +1,110 @@
+import socket
+import struct
+
+import link_watcher as lw
+from link_watcher import LinkWatcher
+
+UP = lw.IFF_UP | lw.IFF_RUNNING
+
+
+def _attribute(kind, value):
+    length = 4 + len(value)
+    return struct.pack('=HH', length, kind) + value + b'\0' * (lw._align(length) - length)
+
+
+def _message(kind, body, sequence=0):
+    return lw._NLMSGHDR.pack(lw._NLMSGHDR.size + len(body), kind, 0, sequence, 0) + body
+
+
+def _link(index, name, flags=UP, operstate=6, master=0, parent=0, kind=None, message=lw.RTM_NEWLINK):
+    body = lw._IFINFOMSG.pack(socket.AF_UNSPEC, 0, index, flags, 0)
+    body += _attribute(lw.IFLA_IFNAME, name.encode() + b'\0')
+    body += _attribute(lw.IFLA_OPERSTATE, bytes([operstate]))
+    if master:
+        body += _attribute(lw.IFLA_MASTER, struct.pack('=I', master))
+    if parent:
+        body += _attribute(lw.IFLA_LINK, struct.pack('=i', parent))
+    if kind:
+        body += _attribute(lw.IFLA_LINKINFO, _attribute(lw.IFLA_INFO_KIND, kind.encode() + b'\0'))
+    return _message(message, body)
+
+
+def _address(index, address, message=lw.RTM_NEWADDR):
+    body = lw._IFADDRMSG.pack(socket.AF_INET, 24, 0, 0, index)
+    body += _attribute(lw.IFA_LOCAL, socket.inet_aton(address))
+    return _message(message, body)
+
+
+class FakeSocket:
+    def __init__(self, reads):
+        self.reads = list(reads)
+
+    def recv(self, size):
+        return self.reads.pop(0)
+
+
+def _watcher(*reads):
+    changes = []
+    watcher = LinkWatcher(on_change=changes.append)
+    watcher.sock = FakeSocket(reads)
+    return watcher, changes
+
+
+def test_parse_link_attributes():
+    link = lw._parse_link(_link(7, 'bond0.20', parent=3, kind='vlan')[lw._NLMSGHDR.size:])
+    assert (link['index'], link['name'], link['link'], link['kind'], link['master']) == (7, 'bond0.20', 3, 'vlan', 0)
+    assert lw._is_up(link)
+    # Virtual interfaces leave operstate UNKNOWN and go by IFF_RUNNING
+    assert lw._is_up(lw._parse_link(_link(1, 'br0', operstate=0)[lw._NLMSGHDR.size:]))
+    assert not lw._is_up(lw._parse_link(_link(1, 'br0', flags=lw.IFF_UP, operstate=0)[lw._NLMSGHDR.size:]))
+
+
+def test_watches_bond_slaves_vlans_and_addressed_interfaces():
+    dump = b''.join([
+        _link(1, 'lo', flags=UP | lw.IFF_LOOPBACK, operstate=0),
+        _link(2, 'eth0', master=3),
+        _link(3, 'bond0', kind='bond'),
+        _link(4, 'eth1', master=3, operstate=2),
+        _link(5, 'bond0.20', parent=3, kind='vlan'),
+        _link(6, 'eth2'),
+        _link(7, 'eth3'),
+        _message(lw.NLMSG_DONE, b'\0' * 4, sequence=1),
+    ])
+    addresses = _address(1, '127.0.0.1') + _address(6, '10.0.0.5') + _message(lw.NLMSG_DONE, b'\0' * 4, sequence=2)
+    watcher, changes = _watcher(dump, addresses)
+    watcher.sock.sendto = lambda data, address: None
+    watcher.resync()
+
+    links = {link.name: link for link in watcher.links()}
+    assert sorted(links) == ['bond0', 'bond0.20', 'eth0', 'eth1', 'eth2']
+    assert links['eth0'].master == 'bond0'
+    assert not links['eth1'].up and links['eth1'].state == 'DOWN'
+    assert links['eth2'].addresses == ('10.0.0.5',)
+    assert sorted(link.name for link in changes) == sorted(links)
+
+
+def test_events_report_changes_and_missing_slaves():
+    watcher, changes = _watcher(
+        _link(3, 'bond0', kind='bond') + _link(2, 'eth0', master=3),
+        _link(2, 'eth0', master=3, operstate=2),
+        _link(2, 'eth0', master=3, message=lw.RTM_DELLINK),
+        _link(2, 'eth0', master=3),
+    )
+    watcher._receive()
+    watcher._report()
+    changes.clear()
+
+    watcher._receive()
+    watcher._report()
+    assert [(link.name, link.up) for link in changes] == [('eth0', False)]
+
+    # A deleted slave stays listed as missing until it comes back
+    watcher._receive()
+    watcher._report()
+    assert [link for link in watcher.links() if link.name == 'eth0'][0].state == 'MISSING'
+    assert len(changes) == 1
+
+    watcher._receive()
+    watcher._report()
+    assert [(link.name, link.up) for link in changes[1:]] == [('eth0', True)]
+    assert [link.state for link in watcher.links()] == ['UP', 'UP']
@@ -0,0 +1,94 @@
+import os
+import subprocess
+import threading
+import time
+
+import pytest
+
+import node_facts
+from node_facts import Fact, NodeFacts
+
+
+@pytest.fixture
+def facts(tmp_path, monkeypatch):
+    boot = tmp_path / 'boot_id'
+    boot.write_text('boot-1\n')
+    depends = tmp_path / 'cluster_config'
+    depends.write_text('cluster_id=1\n')
+    fetches = []
+
+    def fetch():
+        fetches.append(1)
+        return f"value {len(fetches)}"
+
+    monkeypatch.setattr(node_facts, 'BOOT_ID_FILE', str(boot))
+    monkeypatch.setattr(node_facts, 'FACTS', {
+        'config': Fact('config', fetch, 3600, [str(depends)]),
+        'serial': Fact('serial', fetch, 3600, []),
+    })
+    return {'cache': str(tmp_path / 'facts.cache'), 'boot': boot, 'depends': depends, 'fetches': fetches}
+
+
+def test_cached_until_the_file_changes(facts):
+    store = NodeFacts(facts['cache'])
+    assert store.get('config') == 'value 1'
+    assert store.get('config') == 'value 1'
+    # Another run reads the cache file
+    assert NodeFacts(facts['cache']).get('config') == 'value 1'
+    assert len(facts['fetches']) == 1
+
+    st = os.stat(str(facts['depends']))
+    os.utime(str(facts['depends']), ns=(st.st_atime_ns, st.st_mtime_ns + 1000))
+    assert store.get('config') == 'value 2'
+    # Facts without files are not affected
+    assert store.get('serial') == 'value 3'
+    assert store.get('serial') == 'value 3'
+
+
+def test_fetched_again_after_a_reboot(facts):
+    assert NodeFacts(facts['cache']).get('serial') == 'value 1'
+    facts['boot'].write_text('boot-2\n')
+    store = NodeFacts(facts['cache'])
+    assert store.get('serial') == 'value 2'
+    assert store.get('serial') == 'value 2'
+
+
+def test_ttl_and_refresh(facts, monkeypatch):
+    store = NodeFacts(facts['cache'])
+    store.get('serial')
+    assert store.get('serial', refresh=True) == 'value 2'
+    now = time.time()
+    monkeypatch.setattr(node_facts.time, 'time', lambda: now + 3601)
+    assert store.get('serial') == 'value 3'
+
+
+def test_failures_are_not_cached(facts, monkeypatch):
+    def fail():
+        raise subprocess.CalledProcessError(1, 'product_helper')
+
+    monkeypatch.setitem(node_facts.FACTS, 'serial', Fact('serial', fail, 3600, []))
+    store = NodeFacts(facts['cache'])
+    with pytest.raises(subprocess.CalledProcessError):
+        store.get('serial')
+    assert 'serial' not in store.entries
+
+
+def test_threads_share_one_fetch(facts, monkeypatch):
+    release = threading.Event()
+    fetch = node_facts.FACTS['serial'].fetch
+
+    def slow_fetch():
+        release.wait(5)
+        return fetch()
+
+    monkeypatch.setitem(node_facts.FACTS, 'serial', Fact('serial', slow_fetch, 3600, []))
+    store = NodeFacts(facts['cache'])
+    values = []
+    threads = [threading.Thread(target=lambda: values.append(store.get('serial'))) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    release.set()
+    for thread in threads:
+        thread.join(5)
+    assert values == ['value 1'] * 8
+    assert len(facts['fetches']) == 1
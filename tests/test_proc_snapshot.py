@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+import proc_snapshot
+
+
+def _process(proc, pid, ppid, comm, argv, exe=None, start_ticks=100, rss_pages=10):
+    base = proc / str(pid)
+    base.mkdir()
+    # Fields 3 to 24 of /proc/<pid>/stat, utime and stime are 1 second each at 100 ticks
+    fields = ['S', ppid] + [0] * 9 + [100, 100] + [0] * 6 + [start_ticks, 0, rss_pages]
+    (base / 'stat').write_text(f"{pid} ({comm}) {' '.join(str(field) for field in fields)}\n")
+    (base / 'cmdline').write_bytes(b''.join(arg.encode() + b'\0' for arg in argv))
+    if exe:
+        os.symlink(exe, str(base / 'exe'))
+
+
+@pytest.fixture
+def proc(tmp_path, monkeypatch):
+    (tmp_path / 'stat').write_text("cpu 1 2 3\nbtime 1700000000\n")
+    monkeypatch.setattr(proc_snapshot, 'PROC_DIR', str(tmp_path))
+    monkeypatch.setattr(proc_snapshot, 'CLOCK_TICKS', 100)
+    _process(tmp_path, 1, 0, 'systemd', ['/sbin/init'])
+    _process(tmp_path, 100, 1, 'athena_exec', ['/home/cohesity/bin/athena_exec'], '/home/cohesity/bin/athena_exec')
+    _process(tmp_path, 101, 1, 'athena_proxy_ex', ['/home/cohesity/bin/athena_proxy_exec'])
+    _process(tmp_path, 200, 1, 'spire_agent.sh', ['/bin/bash', '/home/cohesity/bin/spire_agent.sh'])
+    _process(tmp_path, 201, 200, 'agent', ['/opt/spire/bin/agent', 'run'])
+    # The command name is cut to 15 characters, argv[0] still has the full name
+    _process(tmp_path, 300, 1, 'statscollector_', ['/home/cohesity/bin/statscollector_exec'])
+    _process(tmp_path, 400, 1, 'magneto_exec', ['/home/cohesity/bin/magneto_exec'], start_ticks=200)
+    _process(tmp_path, 401, 400, 'magneto_exec', ['/home/cohesity/bin/magneto_exec'], start_ticks=300)
+    (tmp_path / 'self').mkdir()
+    return tmp_path
+
+
+def test_services_match_names_containing_them(proc):
+    snapshot = proc_snapshot.ProcessSnapshot()
+    assert [process.pid for process in snapshot.find_service('athena')] == [100, 101]
+    assert [process.pid for process in snapshot.find_service('athena_proxy')] == [101]
+    assert [process.pid for process in snapshot.find_service('spire_agent')] == [200]
+    assert [process.pid for process in snapshot.find_service('statscollector')] == [300]
+    assert snapshot.find_service('yoda') == []
+    services = snapshot.services(['magneto', 'yoda'])
+    assert list(services) == ['magneto', 'yoda']
+    assert [process.pid for process in services['magneto']] == [400, 401]
+
+
+def test_process_fields(proc):
+    process = proc_snapshot.ProcessSnapshot().processes[401]
+    assert (process.ppid, process.name, process.state) == (400, 'magneto_exec', 'S')
+    assert process.start_time == 1700000003
+    assert process.rss == 10 * proc_snapshot.PAGE_SIZE
+    assert process.cpu_time == 2
+    assert process.cmdline == ['/home/cohesity/bin/magneto_exec']
+
+
+def test_service_usage_reports_the_child_of_the_wrapper(proc):
+    snapshot = proc_snapshot.ProcessSnapshot()
+    usage = proc_snapshot.service_usage(snapshot.find_service('magneto'))
+    assert usage['running']
+    assert (usage['pid'], usage['pids']) == (401, [400, 401])
+    assert usage['rss'] == 20 * proc_snapshot.PAGE_SIZE
+    assert usage['cpu_time'] == 4
+    assert proc_snapshot.service_usage([]) == {'running': False}
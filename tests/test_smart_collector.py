@@ -0,0 +1,91 @@
+import json
+
+import smart_collector
+from smart_collector import SmartHistory, SmartReport, growth_alerts, parse_report
+
+
+def _report(counters, disk='sda', serial='S1'):
+    return SmartReport(disk, True, 'ATA', 'model', serial, 30, counters, [], None)
+
+
+def test_parse_ata_report():
+    data = {
+        'device': {'protocol': 'ATA'},
+        'model_name': 'ST4000', 'serial_number': 'ZC1', 'temperature': {'current': 34},
+        'smart_status': {'passed': True},
+        'ata_smart_attributes': {'table': [
+            {'id': 5, 'name': 'Reallocated_Sector_Ct', 'raw': {'value': 8, 'string': '8'}},
+            {'id': 197, 'name': 'Current_Pending_Sector', 'raw': {'value': 2, 'string': '2'}},
+            # Upper bytes hold other data, the string starts with the count
+            {'id': 199, 'name': 'UDMA_CRC_Error_Count', 'raw': {'value': 4295032833, 'string': '1 (65536 1)'}},
+            {'id': 9, 'name': 'Power_On_Hours', 'raw': {'value': 100}},
+            {'id': 184, 'name': 'End-to-End_Error', 'when_failed': 'now', 'raw': {'value': 1}},
+        ]},
+    }
+    report = parse_report('sda', data)
+    assert report.passed is True
+    assert (report.model, report.serial, report.temperature) == ('ST4000', 'ZC1', 34)
+    assert report.counters == {'reallocated': 8, 'pending': 2, 'crc_errors': 1}
+    assert report.failing_attributes == ['End-to-End_Error']
+    assert report.error is None
+
+
+def test_parse_nvme_and_scsi_reports():
+    nvme = parse_report('nvme0n1', {
+        'smart_status': {'passed': False},
+        'nvme_smart_health_information_log': {'media_errors': 3, 'critical_warning': 4, 'percentage_used': 12,
+                                              'available_spare': 5, 'available_spare_threshold': 10},
+    })
+    assert nvme.passed is False
+    assert nvme.counters['media_errors'] == 3
+    assert nvme.failing_attributes == ['critical_warning=0x4', 'available_spare']
+
+    scsi = parse_report('sdb', {
+        'scsi_grown_defect_list': 7,
+        'scsi_error_counter_log': {'read': {'total_uncorrected_errors': 1},
+                                   'write': {'total_uncorrected_errors': 2}},
+    })
+    assert scsi.passed is None
+    assert scsi.counters == {'grown_defects': 7, 'uncorrected_errors': 3}
+
+
+def test_parse_report_smartctl_failure():
+    report = parse_report('sdc', {'smartctl': {'exit_status': 2, 'messages': [
+        {'string': 'Smartctl open device: /dev/sdc failed: No such device', 'severity': 'error'}]}})
+    assert report.error == 'Smartctl open device: /dev/sdc failed: No such device'
+    # Bits above the first two only describe the disk, not a failed run
+    assert parse_report('sdc', {'smartctl': {'exit_status': 8}}).error is None
+
+
+def test_growth_alerts_use_oldest_sample_in_window():
+    now = 10 * smart_collector.GROWTH_WINDOW
+    samples = [
+        [now - 2 * smart_collector.GROWTH_WINDOW, {'pending': 0}],
+        [now - 12 * 3600, {'pending': 1, 'crc_errors': 0}],
+        [now - 3600, {'pending': 1, 'crc_errors': 9}],
+    ]
+    assert growth_alerts(samples, {'pending': 2, 'crc_errors': 9}, now) == [('pending', 1, 2, 12.0)]
+    assert growth_alerts(samples, {'pending': 1, 'crc_errors': 10}, now) == [('crc_errors', 0, 10, 12.0)]
+    assert growth_alerts([], {'pending': 50}, now) == []
+
+
+def test_history_follows_serial_and_drops_absent_disks(tmp_path):
+    path = str(tmp_path / 'history.json')
+    history = SmartHistory(path)
+    assert history.add(_report({'reallocated': 0}), now=1000) == []
+    assert history.add(_report({'reallocated': 6}, disk='sdb'), now=2000) == [('reallocated', 0, 6, 0.3)]
+    history.add(_report({'reallocated': 0}, disk='sdc', serial=None), now=2000)
+    assert sorted(history.disks) == ['S1', 'sdc']
+
+    history.retain(['S1'])
+    history.save()
+    with open(path) as f:
+        assert list(json.load(f)) == ['S1']
+    assert len(SmartHistory(path).disks['S1']) == 2
+
+
+def test_history_drops_old_samples(tmp_path):
+    history = SmartHistory(str(tmp_path / 'history.json'))
+    history.add(_report({'pending': 0}), now=0)
+    history.add(_report({'pending': 0}), now=smart_collector.MAX_SAMPLE_AGE + 1)
+    assert len(history.disks['S1']) == 1
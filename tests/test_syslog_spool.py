@@ -0,0 +1,90 @@
+import syslog_spool
+from syslog_spool import Spool, frame, parse_frames
+
+
+def _spool(tmp_path):
+    return Spool(str(tmp_path / 'spool'))
+
+
+def _replay_all(spool, sent, limit=20):
+    for _ in range(limit):
+        if spool.replay(lambda frames: sent.extend(frames) or True):
+            return True
+    return False
+
+
+def test_frame_round_trip_keeps_partial_tail():
+    frames = [frame(message) for message in ('one', 'twó', 'x' * 300)]
+    data = b''.join(frames)
+    assert frames[1] == b'4 tw\xc3\xb3'
+    assert parse_frames(data) == (frames, len(data))
+    # A frame cut off at the end is left for the next read
+    assert parse_frames(data[:-5]) == (frames[:2], len(frames[0]) + len(frames[1]))
+    assert parse_frames(data + b'12') == (frames, len(data))
+    assert parse_frames(data, max_frames=1) == (frames[:1], len(frames[0]))
+
+
+def test_parse_frames_skips_only_the_corrupt_entry():
+    good = [frame(f"alert {n}") for n in range(3)]
+    # A crash can leave a block of zeros where a write should be
+    data = good[0] + b'\0' * 20 + good[1] + b'x-y' + good[2]
+    frames, consumed = parse_frames(data)
+    assert frames == good
+    assert consumed == len(data)
+    # Nothing to resync on: the read is skipped except a tail that may be the start of a frame
+    assert parse_frames(b'\0' * 40) == ([], 40)
+    assert parse_frames(b'\0' * 40 + b'12') == ([], 40)
+
+
+def test_append_stops_at_max_bytes(tmp_path):
+    spool = Spool(str(tmp_path / 'spool'), max_bytes=100)
+    assert spool.append([frame('a' * 40)])
+    assert spool.append([frame('b' * 40)])
+    assert not spool.append([frame('c' * 40)])
+    sent = []
+    assert _replay_all(spool, sent)
+    assert sent == [frame('a' * 40), frame('b' * 40)]
+
+
+def test_append_refuses_frames_larger_than_a_batch(tmp_path):
+    spool = _spool(tmp_path)
+    assert not spool.append([frame('x' * syslog_spool.BATCH_BYTES)])
+    assert spool.append([frame('x' * syslog_spool.BATCH_BYTES), frame('small')])
+    sent = []
+    assert _replay_all(spool, sent)
+    assert sent == [frame('small')]
+
+
+def test_failed_send_keeps_the_offset(tmp_path):
+    spool = _spool(tmp_path)
+    spool.append([frame('one'), frame('two')])
+    assert not spool.replay(lambda frames: False)
+    assert spool._offset() == 0
+    assert spool.pending()
+    sent = []
+    assert _replay_all(spool, sent)
+    assert sent == [frame('one'), frame('two')]
+    assert not spool.pending()
+
+
+def test_replay_skips_a_torn_tail(tmp_path):
+    spool = _spool(tmp_path)
+    spool.append([frame('one'), frame('two')])
+    with open(spool.path, 'ab') as f:
+        f.write(frame('three')[:4])
+    sent = []
+    assert _replay_all(spool, sent)
+    assert sent == [frame('one'), frame('two')]
+    assert not spool.pending()
+
+
+def test_replay_sends_frames_larger_than_a_batch(tmp_path, monkeypatch):
+    monkeypatch.setattr(syslog_spool, 'BATCH_BYTES', 64)
+    spool = _spool(tmp_path)
+    frames = [frame('before'), frame('x' * 200), frame('after'), frame('y' * 100), frame('last')]
+    # Written directly, as a spool from before oversized frames were refused
+    with open(spool.path, 'wb') as f:
+        f.write(b''.join(frames))
+    sent = []
+    assert _replay_all(spool, sent)
+    assert sent == frames
@@ -0,0 +1,83 @@
+import os
+import stat
+
+import pytest
+
+import version_probe
+from version_probe import get_versions
+
+
+def _binary(path, version, log):
+    # Prints its version and records every start in log
+    with open(path, 'w') as f:
+        f.write(f"#!/bin/sh\necho started >> {log}\necho \"$(basename $0) version {version} (build)\"\n")
+    os.chmod(path, os.stat(path).st_mode | stat.S_IXUSR)
+
+
+@pytest.fixture
+def binaries(tmp_path):
+    log = tmp_path / 'starts'
+    paths = {}
+    for name, version in (('magneto_exec', '7.1.2'), ('bridge_exec', '7.1.2')):
+        paths[name] = str(tmp_path / name)
+        _binary(paths[name], version, log)
+    return {'paths': paths, 'log': log, 'cache': str(tmp_path / 'versions.cache')}
+
+
+def _starts(binaries):
+    return len(binaries['log'].read_text().splitlines()) if binaries['log'].exists() else 0
+
+
+def test_unchanged_binaries_are_answered_from_the_cache(binaries):
+    paths = list(binaries['paths'].values())
+    assert list(get_versions(paths, cache_file=binaries['cache']).values()) == ['7.1.2', '7.1.2']
+    assert _starts(binaries) == 2
+    assert list(get_versions(paths, cache_file=binaries['cache']).values()) == ['7.1.2', '7.1.2']
+    assert _starts(binaries) == 2
+    # Without a cache every binary is started
+    get_versions(paths, cache_file=None)
+    assert _starts(binaries) == 4
+
+
+def test_changed_binaries_are_probed_again(binaries):
+    path = binaries['paths']['magneto_exec']
+    get_versions([path], cache_file=binaries['cache'])
+    st = os.stat(path)
+
+    # New mtime
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1000))
+    get_versions([path], cache_file=binaries['cache'])
+    assert _starts(binaries) == 2
+
+    # Same mtime, new size
+    _binary(path, '7.1.20', binaries['log'])
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 1000))
+    assert get_versions([path], cache_file=binaries['cache'])[path] == '7.1.20'
+    assert _starts(binaries) == 3
+
+    # Replaced by an upgrade with the same mtime and size, only the inode differs
+    st = os.stat(path)
+    _binary(f"{path}.new", '7.1.30', binaries['log'])
+    os.utime(f"{path}.new", ns=(st.st_atime_ns, st.st_mtime_ns))
+    os.replace(f"{path}.new", path)
+    assert get_versions([path], cache_file=binaries['cache'])[path] == '7.1.30'
+    assert _starts(binaries) == 4
+
+
+def test_errors_are_not_cached(binaries, tmp_path):
+    broken = str(tmp_path / 'yoda_exec')
+    with open(broken, 'w') as f:
+        f.write(f"#!/bin/sh\necho started >> {binaries['log']}\necho boom >&2\nexit 1\n")
+    os.chmod(broken, 0o755)
+    missing = str(tmp_path / 'gone_exec')
+    for _ in range(2):
+        versions = get_versions([broken, missing], cache_file=binaries['cache'])
+        assert versions == {broken: 'Error: boom', missing: 'Service not found'}
+    assert _starts(binaries) == 2
+
+
+def test_deadline_skips_probes_that_cannot_start(binaries, monkeypatch):
+    monkeypatch.setattr(version_probe.time, 'monotonic', iter([0, 100, 100]).__next__)
+    versions = get_versions(list(binaries['paths'].values()), workers=1, cache_file=None, deadline=10)
+    assert set(versions.values()) == {"Error: not probed, the version check ran out of time"}
+    assert _starts(binaries) == 0